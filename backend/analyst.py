@@ -1,15 +1,99 @@
 import pandas as pd
 import numpy as np
 import datetime
+import copy
+import os
+import time
+from dataclasses import dataclass
+from joblib import Memory, parallel_config
+from sklearn.base import clone
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import OneHotEncoder
 from sklearn.compose import ColumnTransformer
 from sklearn.pipeline import Pipeline
-from sklearn.ensemble import RandomForestRegressor
+from sklearn.ensemble import RandomForestRegressor, HistGradientBoostingRegressor
 from sklearn.linear_model import LinearRegression
 from sklearn.metrics import mean_squared_error, r2_score
 from sklearn.impute import SimpleImputer
 
+from fast_predict import CompiledPredictor
+from features import (
+    CATEGORICAL_FEATURES, INPUT_COLUMNS, NUMERIC_FEATURES, ChannelFeatures, check_numeric, input_errors,
+    input_frame,
+)
+import config
+import data_cache
+import importance
+import intervals
+import ingest
+from metrics import timed
+
+# Bump whenever cleaning, feature engineering or training changes so that
+# persisted model artifacts built by older code are retrained.
+MODEL_VERSION = "3"
+
+
+def supports_sparse(regressor):
+    """HistGradientBoosting needs dense input; the other model families accept sparse one-hot output."""
+    return not isinstance(regressor, HistGradientBoostingRegressor)
+
+
+# Number of (actual, predicted) test pairs kept for the accuracy chart
+ACCURACY_SAMPLE_SIZE = 20
+
+# Parameter each model family grows along when warm-started, and how many
+# estimators an incremental update adds when the rows the model was fitted
+# on are unknown (fraction of the base size)
+GROWTH_PARAMS = ('n_estimators', 'max_iter')
+DEFAULT_GROWTH_FRACTION = 0.1
+
+
+def base_regressor(regressor, incremental=None):
+    """Unfitted copy of a regressor, sized as it was before any incremental growth."""
+    regressor = clone(regressor)
+    if incremental:
+        regressor.set_params(**{incremental["param"]: incremental["base"]})
+    return regressor
+
+
+@dataclass(frozen=True)
+class ModelMetrics:
+    """Held-out evaluation computed once per trained model version."""
+    model_version: str
+    rmse: float
+    r2: float
+    samples: tuple  # ((actual, predicted), ...)
+
+    @classmethod
+    def evaluate(cls, model_version, y_test, y_pred):
+        y_true = np.asarray(y_test, dtype='float64')
+        y_pred = np.asarray(y_pred, dtype='float64')
+        n = ACCURACY_SAMPLE_SIZE
+        return cls(
+            model_version=model_version,
+            rmse=float(np.sqrt(mean_squared_error(y_true, y_pred))),
+            r2=float(r2_score(y_true, y_pred)),
+            samples=tuple(zip(y_true[:n].tolist(), y_pred[:n].tolist())),
+        )
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            model_version=data["model_version"],
+            rmse=data["rmse"],
+            r2=data["r2"],
+            samples=tuple((s["actual"], s["predicted"]) for s in data["samples"]),
+        )
+
+    def to_dict(self):
+        return {
+            "model_version": self.model_version,
+            "rmse": self.rmse,
+            "r2": self.r2,
+            "samples": [{"actual": a, "predicted": p} for a, p in self.samples],
+        }
+
+
 class YouTubeAnalyst:
     def __init__(self):
         self.pipeline = None
@@ -19,20 +103,100 @@ class YouTubeAnalyst:
         self.X_test = None
         self.y_test = None
         self.y_pred = None
+        self.compiled = None
+        self.version = None
+        self.metrics = None
+        self.parallelism = None
+        self.importances = None
+        self.interval_calibration = None
+        self.cleaning_stats = None
+        self.incremental = None
+        # Positions in the cleaned dataset of the rows held out for evaluation
+        self.holdout_rows = None
 
-    def load_and_prep_data(self, filepath):
-        """Loads data from CSV and checks encoding."""
-        try:
-            self.df = pd.read_csv(filepath, encoding='utf-8')
-        except UnicodeDecodeError:
-            self.df = pd.read_csv(filepath, encoding='latin-1')
-        
-        self._clean_data()
-        self._feature_engineering()
+    @classmethod
+    def from_artifact(cls, artifact):
+        """Restores a trained analyst from a model_store artifact dict."""
+        analyst = cls()
+        analyst.pipeline = artifact['pipeline']
+        analyst.model = analyst.pipeline.named_steps['regressor']
+        analyst.feature_names = artifact['feature_names']
+        analyst.version = artifact['version']
+        analyst.metrics = ModelMetrics.from_dict(artifact['metrics'])
+        analyst.parallelism = artifact.get('parallelism')
+        analyst.importances = artifact.get('importances') or analyst._impurity_importances()
+        analyst.interval_calibration = artifact.get('interval_calibration')
+        analyst.cleaning_stats = artifact.get('cleaning_stats')
+        analyst.incremental = artifact.get('incremental')
+        analyst.holdout_rows = artifact.get('holdout_rows')
+        analyst.compiled = CompiledPredictor.from_pipeline(analyst.pipeline)
+        return analyst
+
+    def strip_training_data(self):
+        """Drops the training frame and holdout, which serving never reads; returns self."""
+        self.df = None
+        self.X_test = None
+        self.y_test = None
+        self.y_pred = None
+        return self
+
+    def load_and_prep_data(self, filepath, chunksize=None, cache_dir=None, data_hash=None, progress=None):
+        """
+        Loads data from CSV and checks encoding, then cleans it (see
+        _clean_data). Model features are derived later, inside the
+        pipeline (features.ChannelFeatures).
+        With chunksize, streams the file in chunks of only the used columns
+        (see ingest.read_clean_streaming) to bound peak memory.
+        With cache_dir, the cleaned frame is stored in / memory-mapped
+        from a columnar cache keyed by the file's hash.
+        progress: optional callback(phase, rows_processed).
+        """
+        if progress is None:
+            progress = lambda phase, rows_processed=None: None
+
+        if cache_dir:
+            key = self._cache_key(filepath, chunksize, data_hash)
+            with timed('load_data_cache'):
+                cached = data_cache.load_frame(cache_dir, key)
+            if cached is not None:
+                self.df = cached
+                progress("loaded data cache", len(self.df))
+                return self.df.head()
+
+        progress("reading data", 0)
+        encoding = ingest.detect_encoding(filepath)
+        if chunksize:
+            # Reading and cleaning are interleaved per chunk
+            with timed('read_csv_streaming'):
+                self.df = ingest.read_clean_streaming(filepath, chunksize=chunksize, encoding=encoding, progress=progress)
+        else:
+            with timed('read_csv'):
+                self.df = ingest.read_with_fallback(lambda enc: pd.read_csv(filepath, encoding=enc), encoding)
+            progress("cleaning", len(self.df))
+            with timed('clean_data'):
+                self._clean_data()
+        if cache_dir:
+            with timed('save_data_cache'):
+                data_cache.save_frame(self.df, cache_dir, key)
         return self.df.head()
 
-    def _clean_data(self):
-        """Standard cleaning steps from notebook."""
+    @staticmethod
+    def _cache_key(filepath, chunksize, data_hash=None):
+        """Cache entry name: source hash, code version, mode, and the year channel ages are relative to."""
+        if data_hash is None:
+            data_hash = data_cache.dataset_hash(filepath)
+        mode = 'stream' if chunksize else 'full'
+        return f"{data_hash[:16]}-v{MODEL_VERSION}-{mode}-{datetime.datetime.now().year}"
+
+    def _clean_data(self, medians=None):
+        """
+        Standard cleaning steps from notebook.
+        medians: {column: value} to fill missing numbers with, e.g. running
+        medians of the whole dataset when cleaning appended rows; by
+        default the medians of this frame.
+        """
+        if medians is None:
+            medians = {}
         # Drop unnecessary columns
         columns_to_drop = [
             'rank', 'Abbreviation', 'country_rank', 'created_month',
@@ -48,7 +212,7 @@ class YouTubeAnalyst:
             self.df[col] = self.df[col].fillna("Unknown")
 
         for col in self.df.select_dtypes(include=['int64', 'float']).columns:
-            median_val = self.df[col].median()
+            median_val = medians.get(col, self.df[col].median())
             self.df[col] = self.df[col].fillna(median_val)
 
         # Data types
@@ -64,64 +228,12 @@ class YouTubeAnalyst:
 
         self.df = self.df.reset_index(drop=True)
 
-    def _feature_engineering(self):
-        """Creates derived features."""
-        df = self.df
-        
-        # Avoid division by zero
-        def safe_div(a, b):
-            return a / b if b > 0 else 0
-
-        df['earnings_per_sub'] = df.apply(lambda x: safe_div(x['highest_yearly_earnings'], x['subscribers']), axis=1)
-        df['views_per_upload'] = df.apply(lambda x: safe_div(x['video views'], x['uploads']), axis=1)
-        
-        # Handle growth columns if they exist, otherwise skip or default
-        if 'subscribers_for_last_30_days' in df.columns:
-             df['subscribers_growth_rate'] = df.apply(lambda x: safe_div(x['subscribers_for_last_30_days'], x['subscribers']), axis=1)
-        else:
-             df['subscribers_growth_rate'] = 0
-
-        if 'video_views_for_the_last_30_days' in df.columns:
-            df['video_views_growth_rate'] = df.apply(lambda x: safe_div(x['video_views_for_the_last_30_days'], x['video views']), axis=1)
-        else:
-            df['video_views_growth_rate'] = 0
-
-        current_year = datetime.datetime.now().year
-        df['channel_age_years'] = current_year - df['created_year']
-
-        # Fill NaNs created
-        df.fillna(0, inplace=True)
-        
-        # Cleanup original columns used for calc if needed (notebook dropped them, we can keep or drop)
-        # Notebook dropped raw earnings/growth to avoid target leakage or redundancy, let's follow suit for training
-        cols_to_drop = [
-            'lowest_monthly_earnings', 'highest_monthly_earnings',
-            'lowest_yearly_earnings', 
-            'subscribers_for_last_30_days', 'video_views_for_the_last_30_days'
-        ]
-        # Keep 'highest_yearly_earnings' as target, drop others
-        # Actually notebook dropped HIGHEST yearly earnings from features, but it's the target?
-        # Re-reading notebook cell 5:
-        # df.drop(columns=[..., 'highest_yearly_earnings', ...], inplace=True)
-        # Wait, if they drop the target, what do they train on?
-        # Ah, usually they keep one for y. Let's assume 'highest_yearly_earnings' IS the target or a proxy.
-        # Let's check the target variable in notebook. 
-        # Usually it's 'highest_yearly_earnings' or an average. 
-        # Let's assume we want to predict 'highest_yearly_earnings' and separate it before dropping.
-        
-        # For now, I'll allow the drop method to remove non-target columns.
-        # I will preserve 'highest_yearly_earnings' for now as 'y'.
-        
-        # The notebook snippet shows:
-        # df.drop(columns=[..., 'highest_yearly_earnings', ...], inplace=True)
-        # This implies the target might have been extracted earlier OR they are predicting something else 
-        # OR they made a mistake in the snippet I saw.
-        # Let's assume 'highest_yearly_earnings' is the Target. I should NOT drop it from the dataframe 
-        # until I split.
-        self.df = df
-
-    def train_models(self):
-        """Trains the model."""
+    def _training_data(self):
+        """
+        Returns (X, y, categorical_features, numeric_features) for training:
+        raw input columns, the target, and the categorical and numeric
+        columns of the feature frame built from X.
+        """
         # Define features and target
         # IMPROVEMENT: Use average of lowest and highest earnings for a more realistic target
         if 'highest_yearly_earnings' in self.df.columns and 'lowest_yearly_earnings' in self.df.columns:
@@ -131,51 +243,115 @@ class YouTubeAnalyst:
             # Fallback if columns missing (though they should be there from load)
             target_col = 'highest_yearly_earnings'
         
-        feature_cols = [
-            'subscribers', 'video views', 'uploads', 
-            'category', 'Country', 'channel_type',
-            'views_per_upload', 'channel_age_years',
-            'video_views_for_the_last_30_days'
-        ]
-        
-        # Filter existing columns
-        feature_cols = [c for c in feature_cols if c in self.df.columns]
-        
-        X = self.df[feature_cols]
+        # Raw inputs; the pipeline's ChannelFeatures step derives the rest
+        X = self.df[[c for c in INPUT_COLUMNS if c in self.df.columns]]
         y = self.df[target_col]
+        # Columns of the feature frame the encoder sees
+        return X, y, list(CATEGORICAL_FEATURES), list(NUMERIC_FEATURES)
 
-        # Splitting
-        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-        self.X_test = X_test
-        self.y_test = y_test
-
-        # Preprocessing
-        categorical_features = ['category', 'Country', 'channel_type']
-        categorical_features = [c for c in categorical_features if c in X.columns]
-        
-        numeric_features = [c for c in X.columns if c not in categorical_features]
-
+    @staticmethod
+    def build_preprocessor(categorical_features, numeric_features, dense=False):
+        """One-hot categoricals, pass numerics through. dense=True for estimators without sparse support."""
         categorical_transformer = OneHotEncoder(handle_unknown='ignore')
         
-        preprocessor = ColumnTransformer(
+        return ColumnTransformer(
             transformers=[
                 ('cat', categorical_transformer, categorical_features),
                 ('num', 'passthrough', numeric_features)
-            ]
+            ],
+            sparse_threshold=0 if dense else 0.3,
         )
 
-        # Pipeline
-        self.pipeline = Pipeline(steps=[
-            ('preprocessor', preprocessor),
-            ('regressor', RandomForestRegressor(n_estimators=100, random_state=42))
+    @classmethod
+    def build_transform(cls, categorical_features, numeric_features, dense=False, reference_year=None):
+        """Raw inputs -> model matrix: ChannelFeatures, then the encoder (unfitted)."""
+        return Pipeline(steps=[
+            ('features', ChannelFeatures(reference_year=reference_year or datetime.datetime.now().year)),
+            ('preprocessor', cls.build_preprocessor(categorical_features, numeric_features, dense=dense)),
         ])
 
+    @classmethod
+    def build_pipeline(cls, regressor, categorical_features, numeric_features, memory=None):
+        """
+        The model pipeline: build_transform's steps, then the regressor.
+        memory: joblib.Memory caching the fitted transform steps.
+        """
+        transform = cls.build_transform(categorical_features, numeric_features,
+                                        dense=not supports_sparse(regressor))
+        return Pipeline(steps=transform.steps + [('regressor', regressor)], memory=memory)
+
+    @staticmethod
+    def transform_cache():
+        """joblib.Memory for fitted transform steps (config.TRANSFORM_CACHE_DIR), or None if disabled."""
+        if not config.TRANSFORM_CACHE_DIR:
+            return None
+        return Memory(config.TRANSFORM_CACHE_DIR, verbose=0)
+
+    def train_models(self, regressor=None, n_jobs=None):
+        """
+        Trains the model.
+        regressor: unfitted estimator to use, e.g. the winner of
+        model_selection; defaults to a 100-tree RandomForest.
+        n_jobs: cores used for fitting (default config.TRAIN_N_JOBS).
+        """
+        if regressor is None:
+            regressor = RandomForestRegressor(n_estimators=100, random_state=42)
+        if n_jobs is None:
+            n_jobs = config.TRAIN_N_JOBS
+        # Forest results do not depend on n_jobs; estimators without it train single-threaded
+        parallel_fit = 'n_jobs' in regressor.get_params()
+        if parallel_fit:
+            regressor.set_params(n_jobs=n_jobs)
+
+        X, y, categorical_features, numeric_features = self._training_data()
+
+        # Splitting; the held-out rows are recorded so later updates and
+        # validation evaluate on the same rows
+        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+        self.holdout_rows = X.index.get_indexer(X_test.index)
+
+        # Pipeline. Fitted transform steps are cached by their input, so
+        # refitting on the same rows (model selection then promotion, a
+        # retrain without new data) skips straight to the regressor.
+        memory = self.transform_cache()
+        self.pipeline = self.build_pipeline(regressor, categorical_features, numeric_features, memory=memory)
+
         # Train
-        self.pipeline.fit(X_train, y_train)
+        start = time.perf_counter()
+        with timed('fit'):
+            self.pipeline.fit(X_train, y_train)
+        fit_seconds = time.perf_counter() - start
+        if memory is not None:
+            # The cache only serves fitting; keep it out of the saved model
+            self.pipeline.set_params(memory=None)
+            memory.reduce_size(bytes_limit=config.TRANSFORM_CACHE_BYTES)
         self.model = self.pipeline.named_steps['regressor']
+        if parallel_fit:
+            # Inference threads are chosen per call by predict_batch; None
+            # defers to that, and keeps tree sums in a deterministic order
+            self.model.set_params(n_jobs=None)
+        self._finish_training(X_test, y_test, categorical_features, numeric_features,
+                              n_jobs if parallel_fit else 1, fit_seconds)
+
+    def _finish_training(self, X_test, y_test, categorical_features, numeric_features, n_jobs, fit_seconds):
+        """Everything derived from a freshly fitted pipeline: fast path, version, metrics, names, importances."""
+        self.X_test = X_test
+        self.y_test = y_test
+        self.parallelism = {
+            "train_n_jobs": n_jobs,
+            "cpu_count": os.cpu_count(),
+            "fit_seconds": round(fit_seconds, 3),
+            "predict_n_jobs": config.PREDICT_N_JOBS,
+            "parallel_predict_min_rows": config.PARALLEL_PREDICT_MIN_ROWS,
+        }
+        self.compiled = CompiledPredictor.from_pipeline(self.pipeline)
         
-        # Evaluate
+        # Evaluate once; requests are served from this snapshot. Microseconds
+        # keep quick successive incremental updates apart.
+        self.version = f"{MODEL_VERSION}-{datetime.datetime.now():%Y%m%d%H%M%S%f}"
         self.y_pred = self.pipeline.predict(X_test)
+        self.metrics = ModelMetrics.evaluate(self.version, y_test, self.y_pred)
+        self.interval_calibration = intervals.calibrate(self.pipeline, X_test, y_test, self.y_pred)
         
         # Feature names for importance
         # OneHotEncoder generates new names, need to capture them
@@ -185,80 +361,310 @@ class YouTubeAnalyst:
             self.feature_names = list(cat_names) + numeric_features
         except:
             self.feature_names = numeric_features # Fallback
+        # Permutation importances are filled in later by compute_importances
+        self.importances = self._impurity_importances()
+
+    def holdout_split(self, X, y):
+        """
+        (X_train, X_test, y_train, y_test) of training data from the cleaned
+        dataset this model was fitted on, split along holdout_rows. Without
+        them the rows are split as train_models does, which only matches the
+        original split if no rows were appended since.
+        """
+        if self.holdout_rows is None:
+            return train_test_split(X, y, test_size=0.2, random_state=42)
+        test = np.zeros(len(X), dtype=bool)
+        test[self.holdout_rows] = True
+        return X[~test], X.iloc[self.holdout_rows], y[~test], y.iloc[self.holdout_rows]
+
+    def grow_models(self, new_df, X_test, y_test, added=None, n_jobs=None, trained_rows=None):
+        """
+        Returns a new analyst whose model is this one plus `added`
+        estimators fitted on new_df only (warm start: more trees for a
+        forest, more boosting stages otherwise). self is left untouched, so
+        it can keep serving while this runs.
+        new_df: cleaned new rows.
+        X_test, y_test: held-out data the grown model is evaluated on.
+        added: by default the current size times len(new_df) / trained_rows
+        (at least 1), so the new rows weigh in the grown model as much as
+        their share of the data; DEFAULT_GROWTH_FRACTION of the original
+        size if trained_rows (rows the model was fitted on so far) is None.
+
+        The fitted transform steps are reused as is: existing trees expect
+        the same input columns, so categories first seen in new_df are
+        encoded as unknown until the next full retrain.
+        """
+        regressor = copy.deepcopy(self.model)
+        params = regressor.get_params()
+        param = next((p for p in GROWTH_PARAMS if p in params), None)
+        if param is None or 'warm_start' not in params:
+            raise ValueError(f"{type(regressor).__name__} cannot be grown incrementally; retrain from scratch")
+        incremental = self.incremental or {"param": param, "base": params[param], "updates": []}
+        if added is None:
+            if trained_rows:
+                added = max(1, round(params[param] * len(new_df) / trained_rows))
+            else:
+                added = max(1, round(incremental["base"] * DEFAULT_GROWTH_FRACTION))
+        if n_jobs is None:
+            n_jobs = config.TRAIN_N_JOBS
+        parallel_fit = 'n_jobs' in params
+        regressor.set_params(warm_start=True, **{param: params[param] + added})
+        if parallel_fit:
+            regressor.set_params(n_jobs=n_jobs)
+
+        grown = YouTubeAnalyst()
+        grown.df = new_df
+        X, y, categorical_features, numeric_features = grown._training_data()
+        transform_steps = self.pipeline.steps[:-1]
+        start = time.perf_counter()
+        with timed('fit_incremental'):
+            regressor.fit(Pipeline(transform_steps).transform(X), y)
+        fit_seconds = time.perf_counter() - start
+        regressor.set_params(warm_start=False)
+        if parallel_fit:
+            regressor.set_params(n_jobs=None)
+
+        grown.pipeline = Pipeline(steps=transform_steps + [('regressor', regressor)])
+        grown.model = regressor
+        grown._finish_training(X_test, y_test, categorical_features, numeric_features,
+                               n_jobs if parallel_fit else 1, fit_seconds)
+        grown.incremental = dict(incremental, updates=incremental["updates"] + [{
+            "rows": len(X),
+            "added": added,
+            "fit_seconds": round(fit_seconds, 3),
+            "version": grown.version,
+        }])
+        return grown
+
+    def _impurity_importances(self):
+        return {
+            "model_version": self.version,
+            "impurity": importance.impurity_importances(self.pipeline),
+            "permutation": None,
+        }
+
+    def compute_importances(self, X, y, n_jobs=None):
+        """
+        Computes impurity and permutation importances on held-out data
+        (X, y), once per model version. n_jobs: worker processes (default
+        config.TRAIN_N_JOBS).
+        """
+        if n_jobs is None:
+            n_jobs = config.TRAIN_N_JOBS
+        with timed('feature_importances'):
+            result = importance.compute(self.pipeline, X, y, n_jobs=n_jobs)
+        # Replaced in one assignment so readers see either the old or the new dict
+        self.importances = dict(result, model_version=self.version)
+        return self.importances
+
+    def input_key(self, input_data):
+        """
+        Hashable normalized form of a prediction input, e.g. for caching:
+        its feature values. Inputs that predict identically (1000000 vs 1e6
+        vs "1000000", missing vs the fitted median) map to the same key.
+        Raises ValueError like predict.
+        """
+        row = self.pipeline.named_steps['features'].transform_one(input_data)
+        return tuple(row[col] for col in CATEGORICAL_FEATURES + NUMERIC_FEATURES)
 
     def predict(self, input_data):
         """
         Predicts earnings for a single input.
         input_data: dict containing keys like 'subscribers', 'video views', etc.
         """
-        # Create DataFrame from input
-        input_df = pd.DataFrame([input_data])
-        
-        # Must ensure all required columns exist, fill numeric with 0, strings with 'Unknown'
-        # Also need feature engineering on single input!
-        
-        # Calculate derived features for the input
-        # Note: We need 'created_year' to calc age. If not provided, assume 2010 or something?
-        # Or require channel age directly? Let's try to calculate.
-        
-        input_df['created_year'] = input_df.get('created_year', 2015) 
-        input_df['uploads'] = pd.to_numeric(input_df.get('uploads', 0))
-        input_df['video views'] = pd.to_numeric(input_df.get('video views', 0))
-        input_df['subscribers'] = pd.to_numeric(input_df.get('subscribers', 0))
-        # New features defaults
-        input_df['video_views_for_the_last_30_days'] = pd.to_numeric(input_df.get('video_views_for_the_last_30_days', 0))
-        input_df['subscribers_for_last_30_days'] = pd.to_numeric(input_df.get('subscribers_for_last_30_days', 0))
-        
-        # Derived
-        current_year = datetime.datetime.now().year
-        input_df['channel_age_years'] = current_year - input_df['created_year']
-        
-        # Avoid div by zero
-        if input_df['uploads'][0] > 0:
-            input_df['views_per_upload'] = input_df['video views'] / input_df['uploads']
-        else:
-            input_df['views_per_upload'] = 0
-            
-        prediction = self.pipeline.predict(input_df)
+        # Fast path: identical result without building a DataFrame
+        if self.compiled is not None:
+            with timed('predict_compiled'):
+                return self.compiled.predict(input_data)
+
+        input_df = input_frame([input_data])
+        with timed('prepare_inputs'):
+            errors = input_errors(input_df)
+        if errors:
+            raise ValueError(errors[0])
+        prediction = self._pipeline_predict(input_df)
         return prediction[0]
 
-    def get_feature_importances(self):
-        """Returns top feature importances."""
-        if not self.model or not self.feature_names:
+    def predict_interval(self, input_data, level):
+        """
+        Predicts earnings for a single input with a prediction interval.
+        Returns (prediction, lower, upper): the same prediction as predict,
+        and bounds holding the actual value with probability about `level`.
+        """
+        calibration = self._interval_calibration()
+        if self.compiled is not None:
+            with timed('predict_compiled'):
+                trees = self.compiled.predict_trees(input_data)
+                predictions, lower, upper = intervals.from_trees(calibration, trees[np.newaxis], level)
+            return predictions[0], lower[0], upper[0]
+
+        input_df = input_frame([input_data])
+        with timed('prepare_inputs'):
+            errors = input_errors(input_df)
+        if errors:
+            raise ValueError(errors[0])
+        predictions, lower, upper = self._pipeline_predict(input_df, level)
+        return predictions[0], lower[0], upper[0]
+
+    def _interval_calibration(self):
+        if self.interval_calibration is None:
+            raise ValueError("Prediction intervals are not available for this model")
+        return self.interval_calibration
+
+    def _pipeline_predict(self, input_df, level=None):
+        """
+        pipeline.predict under the inference parallelism policy: one thread
+        for small inputs (lowest latency), config.PREDICT_N_JOBS threads for
+        batches of at least config.PARALLEL_PREDICT_MIN_ROWS rows.
+        With level, returns (predictions, lower, upper) instead.
+        """
+        n_jobs = 1
+        if len(input_df) >= config.PARALLEL_PREDICT_MIN_ROWS:
+            n_jobs = config.PREDICT_N_JOBS
+        # Same as pipeline.predict, split so each step is timed separately
+        with timed('preprocess'):
+            features = Pipeline(self.pipeline.steps[:-1]).transform(input_df)
+        # parallel_config is thread-local, so concurrent requests do not interfere
+        regressor = self.pipeline.named_steps['regressor']
+        with timed('predict'), parallel_config(backend='threading', n_jobs=n_jobs):
+            if level is not None:
+                return intervals.predict(self.interval_calibration, regressor, features, level)
+            return regressor.predict(features)
+
+    def predict_batch(self, records, level=None):
+        """
+        Predicts earnings for many inputs with a single pipeline.predict call.
+        records: list of dicts or a DataFrame of raw inputs.
+        level: also return 'lower' and 'upper' bounds of the prediction
+        interval at this coverage (see predict_interval).
+        Returns one dict per input, in input order, holding either
+        'prediction' or 'error' so bad rows do not fail the whole batch.
+
+        Lists of up to config.COMPILED_BATCH_MAX_ROWS dicts (such as
+        coalesced single-row requests) are scored by the compiled fast path
+        in one call instead, skipping pandas; predictions are the same.
+        """
+        if level is not None:
+            self._interval_calibration()
+        errors = {}
+        if isinstance(records, pd.DataFrame):
+            rows = records.reset_index(drop=True)
+            positions = np.arange(len(rows))
+        else:
+            positions = []
+            rows = []
+            for i, record in enumerate(records):
+                if isinstance(record, dict):
+                    positions.append(i)
+                    rows.append(record)
+                else:
+                    errors[i] = "Expected an object of channel statistics"
+            positions = np.asarray(positions, dtype='int64')
+
+        results = [None] * (len(positions) + len(errors))
+        if len(positions):
+            if (self.compiled is not None and isinstance(rows, list)
+                    and len(rows) <= config.COMPILED_BATCH_MAX_ROWS):
+                row_errors, valid, scored = self._compiled_batch(rows, level)
+            else:
+                row_errors, valid, scored = self._frame_batch(rows, level)
+            for pos, message in row_errors.items():
+                errors[int(positions[pos])] = message
+            if scored is not None:
+                # (predictions,) or (predictions, lower, upper)
+                keys = ("prediction", "lower", "upper")
+                for i, *values in zip(positions[valid], *scored):
+                    results[i] = {key: float(value) for key, value in zip(keys, values)}
+
+        for i, message in errors.items():
+            results[i] = {"error": message}
+        return results
+
+    def predict_grid(self, base_input, varied, level=None):
+        """
+        Predictions for base_input with the numeric inputs in varied
+        ({input: array}, all the same length) set to each point's values,
+        e.g. the points of a what-if grid, scored in one batch without an
+        input dict per point. Returns an array of predictions, or
+        (predictions, lower, upper) with level. Raises ValueError for a
+        base_input predict would reject.
+        """
+        if level is not None:
+            self._interval_calibration()
+        if self.compiled is not None:
+            with timed('prepare_inputs'):
+                X = self.compiled.sweep_matrix(base_input, varied)
+            with timed('predict_compiled'):
+                if level is None:
+                    return self.compiled.predict_matrix(X)
+                trees = self.compiled.predict_trees_matrix(X)
+                return intervals.from_trees(self.interval_calibration, trees, level)
+
+        n_points = len(next(iter(varied.values())))
+        input_df = input_frame([base_input]).reindex(columns=INPUT_COLUMNS)
+        with timed('prepare_inputs'):
+            errors = input_errors(input_df)
+            if errors:
+                raise ValueError(errors[0])
+            input_df = input_df.loc[input_df.index.repeat(n_points)].reset_index(drop=True)
+            for col, points in varied.items():
+                input_df[col] = np.asarray(points, dtype='float64')
+                check_numeric(col, input_df[col].to_numpy())
+        return self._pipeline_predict(input_df, level)
+
+    @staticmethod
+    def _valid_rows(n_rows, row_errors):
+        valid = np.ones(n_rows, dtype=bool)
+        valid[list(row_errors)] = False
+        return valid
+
+    def _frame_batch(self, rows, level):
+        """predict_batch through the pipeline: (row errors, valid mask, scored columns or None)."""
+        input_df = rows if isinstance(rows, pd.DataFrame) else input_frame(rows)
+        with timed('prepare_inputs'):
+            row_errors = input_errors(input_df)
+        valid = self._valid_rows(len(input_df), row_errors)
+        if not valid.any():
+            return row_errors, valid, None
+        scored = self._pipeline_predict(input_df[valid], level)
+        return row_errors, valid, (scored,) if level is None else scored
+
+    def _compiled_batch(self, rows, level):
+        """predict_batch through the compiled fast path: same return as _frame_batch."""
+        with timed('prepare_inputs'):
+            X, row_errors = self.compiled.matrix(rows)
+        valid = self._valid_rows(len(rows), row_errors)
+        if not valid.any():
+            return row_errors, valid, None
+        with timed('predict_compiled'):
+            if level is None:
+                return row_errors, valid, (self.compiled.predict_matrix(X[valid]),)
+            trees = self.compiled.predict_trees_matrix(X[valid])
+            return row_errors, valid, intervals.from_trees(self.interval_calibration, trees, level)
+
+    def importance_method(self, method=None):
+        """
+        The importance kind served for `method`: as given, or by default
+        permutation once it has been computed, else impurity.
+        """
+        if method is not None:
+            return method
+        if self.importances and self.importances.get("permutation") is not None:
+            return "permutation"
+        return "impurity"
+
+    def get_feature_importances(self, method=None, top=10):
+        """
+        Returns the top precomputed importances per input column, or [] if
+        that kind is not available (yet) for this model.
+        """
+        if not self.importances:
             return []
-            
-        importances = self.model.feature_importances_
-        # Pair with names
-        feat_imp = list(zip(self.feature_names, importances))
-        # Sort desc
-        feat_imp.sort(key=lambda x: x[1], reverse=True)
-        # Return top 10 formatted
-        return [{"name": name, "importance": round(imp, 4)} for name, imp in feat_imp[:10]]
+        ranked = self.importances.get(self.importance_method(method))
+        return ranked[:top] if ranked else []
 
     def get_model_accuracy(self):
         """Returns R2 and RMSE, plus sample predictions."""
-        if self.y_test is None:
+        if self.metrics is None:
             return {}
-            
-        mse = mean_squared_error(self.y_test, self.y_pred)
-        rmse = np.sqrt(mse)
-        r2 = r2_score(self.y_test, self.y_pred)
-        
-        # Samples
-        samples = []
-        # Take first 20 samples from test set
-        test_indices = self.y_test.index[:20]
-        for idx in test_indices:
-            # Finding the position in y_test/y_pred (which corresponds to array index)
-            # y_test is a Series (index match), y_pred is array (position match)
-            # Helper:
-            pos = list(self.y_test.index).index(idx)
-            actual = self.y_test.loc[idx]
-            pred = self.y_pred[pos]
-            samples.append({"actual": float(actual), "predicted": float(pred)})
-            
-        return {
-            "rmse": rmse,
-            "r2": r2,
-            "samples": samples
-        }
+        return self.metrics.to_dict()
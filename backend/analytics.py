@@ -0,0 +1,299 @@
+"""
+Precomputed aggregates over the cleaned dataset.
+
+Rollups keeps one cell per distinct (category, Country, channel_type,
+created_year) combination holding its row count and, per measure, the
+sum, min and max. A filtered group-by combines the matching cells with
+numpy bincounts, so it costs in proportion to the number of cells, not
+rows. Top-N channel queries walk a per-measure descending row order kept
+alongside. Both are built once per dataset version; appended rows are
+folded in without a rebuild.
+"""
+import time
+
+import numpy as np
+import pandas as pd
+
+DIMENSIONS = ['category', 'Country', 'channel_type', 'created_year']
+MEASURES = [
+    'subscribers', 'video views', 'uploads', 'video_views_for_the_last_30_days',
+    'lowest_yearly_earnings', 'highest_yearly_earnings',
+]
+STATS = ('count', 'sum', 'mean', 'min', 'max')
+NAME_COLUMN = 'Youtuber'
+MAX_TOP_N = 1000
+# Sorted rows checked per step of a filtered top-N scan; doubles each step
+TOP_SCAN_ROWS = 1024
+
+
+def _dimension_values(df, dim):
+    """A dimension column as plain values: strings, or ints for created_year."""
+    if dim not in df.columns:
+        return np.full(len(df), "Unknown" if dim != 'created_year' else 0, dtype=object)
+    if dim == 'created_year':
+        return df[dim].to_numpy(dtype='float64').astype('int64')
+    return df[dim].astype(str).to_numpy(dtype=object)
+
+
+def _measure_values(df, measure):
+    if measure not in df.columns:
+        return np.zeros(len(df))
+    return df[measure].to_numpy(dtype='float64')
+
+
+def parse_filters(args):
+    """
+    {dimension: [values]} from query parameters like ?category=Music,Gaming
+    &created_year=2015 plus min_year/max_year. Raises ValueError.
+    """
+    filters = {}
+    for dim in DIMENSIONS:
+        raw = args.get(dim)
+        if raw:
+            values = [v.strip() for v in raw.split(',') if v.strip()]
+            if dim == 'created_year':
+                try:
+                    values = [int(v) for v in values]
+                except ValueError:
+                    raise ValueError(f"created_year must be a comma-separated list of years, got {raw!r}")
+            filters[dim] = values
+    for name in ('min_year', 'max_year'):
+        raw = args.get(name)
+        if raw is not None:
+            try:
+                filters[name] = int(raw)
+            except ValueError:
+                raise ValueError(f"{name} must be a year, got {raw!r}")
+    return filters
+
+
+class Rollups:
+    """
+    Cell rollups and top-N orders for one dataset version (data_hash).
+    Treated as immutable once built: appended() returns a new instance,
+    so readers never see a half-applied update.
+    """
+
+    def __init__(self, data_hash):
+        self.data_hash = data_hash
+        self.built_at = None
+        self.build_seconds = None
+        self.vocab = {dim: [] for dim in DIMENSIONS}   # code -> value
+        self.codes = {dim: {} for dim in DIMENSIONS}   # value -> code
+        self.cell_ids = {}                             # tuple of codes -> cell
+        self.cell_codes = np.empty((0, len(DIMENSIONS)), dtype=np.int32)
+        self.count = np.empty(0, dtype=np.int64)
+        self.sums = {m: np.empty(0) for m in MEASURES}
+        self.mins = {m: np.empty(0) for m in MEASURES}
+        self.maxs = {m: np.empty(0) for m in MEASURES}
+        self.row_cell = np.empty(0, dtype=np.int32)
+        self.names = np.empty(0, dtype=object)
+        self.values = {m: np.empty(0) for m in MEASURES}
+        self.order = {m: np.empty(0, dtype=np.int64) for m in MEASURES}
+
+    @classmethod
+    def build(cls, df, data_hash):
+        """Rollups of a cleaned dataset frame (YouTubeAnalyst.df)."""
+        return cls(data_hash).appended(df, data_hash)
+
+    @property
+    def n_rows(self):
+        return len(self.row_cell)
+
+    @property
+    def n_cells(self):
+        return len(self.count)
+
+    def _copy(self, data_hash):
+        new = Rollups(data_hash)
+        new.vocab = {dim: list(values) for dim, values in self.vocab.items()}
+        new.codes = {dim: dict(codes) for dim, codes in self.codes.items()}
+        new.cell_ids = dict(self.cell_ids)
+        new.cell_codes, new.count = self.cell_codes, self.count
+        new.sums, new.mins, new.maxs = dict(self.sums), dict(self.mins), dict(self.maxs)
+        new.row_cell, new.names = self.row_cell, self.names
+        new.values, new.order = dict(self.values), dict(self.order)
+        return new
+
+    def appended(self, df, data_hash):
+        """
+        New Rollups with the cleaned rows of df added after the existing
+        ones: cell totals are updated in place of a regroup, and the new
+        rows are merged into each measure's sorted order.
+        """
+        start = time.perf_counter()
+        new = self._copy(data_hash)
+        n_new = len(df)
+
+        # Dimension codes per new row, growing the vocabularies
+        row_codes = np.empty((n_new, len(DIMENSIONS)), dtype=np.int64)
+        for d, dim in enumerate(DIMENSIONS):
+            inverse, uniques = pd.factorize(_dimension_values(df, dim))
+            codes, vocab = new.codes[dim], new.vocab[dim]
+            mapping = np.empty(len(uniques), dtype=np.int64)
+            for i, value in enumerate(uniques.tolist()):
+                code = codes.get(value)
+                if code is None:
+                    code = codes[value] = len(vocab)
+                    vocab.append(value)
+                mapping[i] = code
+            row_codes[:, d] = mapping[inverse]
+
+        # Cell per new row, factorizing the codes packed into one integer;
+        # combinations not seen before become new cells
+        radix = max(len(new.vocab[dim]) for dim in DIMENSIONS)
+        packed = np.zeros(n_new, dtype=np.int64)
+        for d in range(len(DIMENSIONS)):
+            packed = packed * radix + row_codes[:, d]
+        inverse, combos = pd.factorize(packed)
+        combo_codes = np.empty((len(combos), len(DIMENSIONS)), dtype=np.int64)
+        for d in reversed(range(len(DIMENSIONS))):
+            combos, combo_codes[:, d] = np.divmod(combos, radix)
+        combo_cell = np.empty(len(combo_codes), dtype=np.int32)
+        added_codes = []
+        for i, combo in enumerate(map(tuple, combo_codes.tolist())):
+            cell = new.cell_ids.get(combo)
+            if cell is None:
+                cell = new.cell_ids[combo] = self.n_cells + len(added_codes)
+                added_codes.append(combo)
+            combo_cell[i] = cell
+        row_cell = combo_cell[inverse]
+        n_cells = self.n_cells + len(added_codes)
+        if added_codes:
+            new.cell_codes = np.concatenate([self.cell_codes, np.asarray(added_codes, dtype=np.int32)])
+
+        grow = n_cells - self.n_cells
+        new.count = np.concatenate([self.count, np.zeros(grow, dtype=np.int64)])
+        new.count += np.bincount(row_cell, minlength=n_cells)
+        for m in MEASURES:
+            values = _measure_values(df, m)
+            new.sums[m] = np.concatenate([self.sums[m], np.zeros(grow)]) + np.bincount(
+                row_cell, weights=values, minlength=n_cells)
+            new.mins[m] = np.concatenate([self.mins[m], np.full(grow, np.inf)])
+            np.minimum.at(new.mins[m], row_cell, values)
+            new.maxs[m] = np.concatenate([self.maxs[m], np.full(grow, -np.inf)])
+            np.maximum.at(new.maxs[m], row_cell, values)
+
+            # Merge into the descending order; ties keep row order
+            ids = np.arange(self.n_rows, self.n_rows + n_new, dtype=np.int64)
+            new_order = ids[np.argsort(-values, kind='stable')]
+            new.values[m] = np.concatenate([self.values[m], values])
+            existing = self.order[m]
+            positions = np.searchsorted(-self.values[m][existing], -new.values[m][new_order], side='right')
+            new.order[m] = np.insert(existing, positions, new_order)
+
+        new.row_cell = np.concatenate([self.row_cell, row_cell])
+        names = (df[NAME_COLUMN].astype(str).to_numpy(dtype=object) if NAME_COLUMN in df.columns
+                 else np.full(n_new, "", dtype=object))
+        new.names = np.concatenate([self.names, names])
+        new.built_at = time.time()
+        new.build_seconds = round(time.perf_counter() - start, 4)
+        return new
+
+    def _cell_mask(self, filters):
+        """Boolean mask of cells matching filters (see parse_filters); None means all."""
+        mask = None
+        for d, dim in enumerate(DIMENSIONS):
+            if dim not in filters:
+                continue
+            codes = [self.codes[dim][v] for v in filters[dim] if v in self.codes[dim]]
+            dim_mask = np.isin(self.cell_codes[:, d], codes)
+            mask = dim_mask if mask is None else mask & dim_mask
+        year_col = DIMENSIONS.index('created_year')
+        if 'min_year' in filters or 'max_year' in filters:
+            years = np.asarray(self.vocab['created_year'], dtype=np.int64)[self.cell_codes[:, year_col]]
+            year_mask = (years >= filters.get('min_year', years.min(initial=0))) & \
+                        (years <= filters.get('max_year', years.max(initial=0)))
+            mask = year_mask if mask is None else mask & year_mask
+        return mask
+
+    @staticmethod
+    def _check_measure(measure):
+        if measure not in MEASURES:
+            raise ValueError(f"measure must be one of {MEASURES}, got {measure!r}")
+
+    def aggregate(self, measure, group_by=None, filters=None, sort='count', limit=None):
+        """
+        count, sum, mean, min and max of `measure` over the rows matching
+        filters, per value of group_by (a dimension) or overall. Groups are
+        sorted by `sort`, highest first, and cut to `limit`.
+        """
+        self._check_measure(measure)
+        if group_by is not None and group_by not in DIMENSIONS:
+            raise ValueError(f"group_by must be one of {DIMENSIONS}, got {group_by!r}")
+        if sort not in STATS and sort != group_by:
+            raise ValueError(f"sort must be one of {list(STATS)} or the group_by dimension, got {sort!r}")
+
+        mask = self._cell_mask(filters or {})
+        cells = np.arange(self.n_cells) if mask is None else np.flatnonzero(mask)
+        if group_by is None:
+            keys, n_groups = np.zeros(len(cells), dtype=np.int64), 1
+        else:
+            keys = self.cell_codes[cells, DIMENSIONS.index(group_by)]
+            n_groups = len(self.vocab[group_by])
+
+        count = np.bincount(keys, weights=self.count[cells], minlength=n_groups)
+        total = np.bincount(keys, weights=self.sums[measure][cells], minlength=n_groups)
+        low = np.full(n_groups, np.inf)
+        np.minimum.at(low, keys, self.mins[measure][cells])
+        high = np.full(n_groups, -np.inf)
+        np.maximum.at(high, keys, self.maxs[measure][cells])
+
+        groups = np.flatnonzero(count > 0)
+        stats = {'count': count, 'sum': total, 'min': low, 'max': high}
+        with np.errstate(invalid='ignore', divide='ignore'):
+            stats['mean'] = total / count
+        if sort == group_by:
+            order = sorted(groups.tolist(), key=lambda g: self.vocab[group_by][g])
+        else:
+            order = groups[np.argsort(-stats[sort][groups], kind='stable')].tolist()
+        if limit is not None:
+            order = order[:limit]
+
+        results = []
+        for g in order:
+            row = {group_by: self.vocab[group_by][g]} if group_by is not None else {}
+            row['count'] = int(count[g])
+            row.update({stat: float(stats[stat][g]) for stat in ('sum', 'mean', 'min', 'max')})
+            results.append(row)
+        return results
+
+    def top(self, measure, n=10, filters=None):
+        """The n channels with the highest `measure` among rows matching filters."""
+        self._check_measure(measure)
+        n = max(0, min(n, MAX_TOP_N))
+        order = self.order[measure]
+        mask = self._cell_mask(filters or {})
+        if mask is None:
+            rows = order[:n]
+        else:
+            found, start, step = [], 0, TOP_SCAN_ROWS
+            remaining = n
+            while remaining > 0 and start < len(order):
+                chunk = order[start:start + step]
+                hits = chunk[mask[self.row_cell[chunk]]][:remaining]
+                found.append(hits)
+                remaining -= len(hits)
+                start += step
+                step *= 2
+            rows = np.concatenate(found) if found else order[:0]
+
+        results = []
+        for row in rows.tolist():
+            codes = self.cell_codes[self.row_cell[row]]
+            entry = {'name': self.names[row]}
+            entry.update({dim: self.vocab[dim][code] for dim, code in zip(DIMENSIONS, codes.tolist())})
+            entry[measure] = float(self.values[measure][row])
+            results.append(entry)
+        return results
+
+    def dimensions(self):
+        """Values of each dimension and the available measures."""
+        return {
+            "dimensions": {dim: sorted(values) for dim, values in self.vocab.items()},
+            "measures": list(MEASURES),
+        }
+
+    def info(self):
+        return {"dataset_hash": self.data_hash, "rows": self.n_rows, "cells": self.n_cells,
+                "build_seconds": self.build_seconds}
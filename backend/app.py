@@ -1,81 +1,509 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify
 from flask_cors import CORS
+import hmac
+import io
+import json
 import os
 import sys
+import time
+import zlib
+
+import pandas as pd
 
 # Ensure backend directory is in path if needed (standard import should work if run from root as python backend/app.py)
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from analyst import YouTubeAnalyst
+from backpressure import ConcurrencyLimiter
+from batcher import PredictionBatcher
+from model_manager import ModelManager
+from prediction_cache import PredictionCache
+from profiling import RequestProfiler
+import analytics
+import config
+import intervals
+import metrics
+import model_store
+import neighbors
+import sweep
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for frontend integration
 
-analyst = YouTubeAnalyst()
+# Bounded concurrency and queue; overflow gets 429 (see backpressure.py)
+limiter = ConcurrencyLimiter(
+    app.wsgi_app,
+    max_active=config.SERVER_THREADS,
+    max_queue=config.SERVER_QUEUE_SIZE,
+    queue_timeout=config.SERVER_QUEUE_TIMEOUT,
+)
+app.wsgi_app = limiter
 
 # Path to the dataset in the root directory
 DATASET_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Global YouTube Statistics.csv')
+MODEL_PATH = model_store.DEFAULT_MODEL_PATH
+
+# Memoizes /api/predict results; keys include the model version
+prediction_cache = PredictionCache(
+    max_entries=config.PREDICTION_CACHE_SIZE,
+    ttl_seconds=config.PREDICTION_CACHE_TTL,
+)
+
+# Scores concurrent /api/predict requests together (see batcher.py)
+batcher = PredictionBatcher(max_batch=config.PREDICT_BATCH_MAX, max_wait=config.PREDICT_BATCH_WAIT)
+
+profiler = RequestProfiler(sample_rate=config.PROFILE_SAMPLE_RATE)
+
+def _on_model_swap(new_analyst):
+    # Cached results are keyed by version, but drop them to free memory
+    prediction_cache.clear()
+
+# Holds the serving analyst; reloads swap it atomically
+manager = ModelManager(DATASET_PATH, MODEL_PATH, on_swap=_on_model_swap)
 
 def initialize_model():
-    """Initializes the model if dataset exists."""
-    if os.path.exists(DATASET_PATH):
-        print(f"Loading dataset from {DATASET_PATH}...")
+    """
+    Starts loading the persisted model (retraining only if it is missing or
+    stale) in the background and returns immediately; see /health/ready.
+    Importing this module loads nothing: the dev server below calls this,
+    and wsgi.py loads the model before forking workers.
+    """
+    return manager.start(watch_interval=config.MODEL_RELOAD_INTERVAL)
+
+def not_ready_response():
+    """503 body for requests that arrive before a model is serving."""
+    progress = manager.progress
+    if progress["phase"] in ("failed", "rejected"):
+        reason = (manager.last_reload or {}).get("reason", "Dataset missing?")
+        return jsonify({"error": f"Model not initialized: {reason}"}), 503
+    return jsonify({"error": "Model is loading", "startup": progress}), 503
+
+def is_admin():
+    if not config.ADMIN_TOKEN:
+        return bool(config.ADMIN_OPEN)
+    return hmac.compare_digest(request.headers.get('X-Admin-Token', ''), config.ADMIN_TOKEN)
+
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+    g.profiler = None
+    requested = config.PROFILING_ENABLED and request.headers.get('X-Profile') == '1' and is_admin()
+    if profiler.should_profile(requested):
         try:
-            analyst.load_and_prep_data(DATASET_PATH)
-            print("Training models...")
-            analyst.train_models()
-            print("Model trained and ready.")
-            return True
+            g.profiler = profiler.start()
         except Exception as e:
-            print(f"Error initializing model: {e}")
-            return False
-    else:
-        print(f"Dataset not found at {DATASET_PATH}. Please ensure the file is present.")
-        return False
+            # Profiling must never fail the request
+            print(f"Profiling failed to start: {type(e).__name__}: {e}")
+
+@app.after_request
+def record_request_latency(response):
+    seconds = time.perf_counter() - g.request_start
+    endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+    metrics.REQUEST_SECONDS.observe(seconds, request.method, endpoint, str(response.status_code))
+    if g.profiler is not None:
+        active, g.profiler = g.profiler, None
+        try:
+            profile_id = profiler.finish(active, request.method, request.path, seconds)
+            response.headers['X-Profile-Id'] = str(profile_id)
+        except Exception as e:
+            print(f"Profiling failed to finish: {type(e).__name__}: {e}")
+    return response
+
+@app.teardown_request
+def stop_unfinished_profile(exc):
+    # after_request is skipped when a request fails with an unhandled error
+    active = g.get('profiler')
+    if active is not None:
+        g.profiler = None
+        profiler.stop(active)
+
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """Stage and request latency histograms plus model/cache state, in Prometheus text format."""
+    current = manager.current
+    cache = prediction_cache.stats()
+    load = limiter.stats()
+    sections = [
+        metrics.STAGE_SECONDS.render(),
+        metrics.REQUEST_SECONDS.render(),
+        metrics.QUEUE_SECONDS.render(),
+        metrics.PREDICT_BATCH_SIZE.render(),
+        metrics.PREDICT_BATCH_WAIT_SECONDS.render(),
+        metrics.render_gauges('model_ready', 'Whether a model is serving requests.',
+                              [({}, int(manager.ready))]),
+        metrics.render_gauges('model_info', 'Version of the serving model.',
+                              [({"version": current.version}, 1)] if current else []),
+        metrics.render_gauges('prediction_cache_entries', 'Entries in the prediction cache.',
+                              [({}, cache["entries"])]),
+        metrics.render_gauges('prediction_cache_events_total', 'Prediction cache lookups and removals.',
+                              [({"event": e}, cache[e]) for e in ("hits", "misses", "evictions", "expirations")],
+                              metric_type="counter"),
+        metrics.render_gauges('http_requests_in_flight', 'Requests running or waiting for a slot, this process.',
+                              [({"state": "active"}, load["active"]), ({"state": "waiting"}, load["waiting"])]),
+        metrics.render_gauges('http_requests_rejected_total', 'Requests turned away with 429, this process.',
+                              [({"reason": r}, n) for r, n in load["rejected"].items()],
+                              metric_type="counter"),
+    ]
+    return Response("\n".join(sections) + "\n", mimetype='text/plain; version=0.0.4')
+
+@app.route('/debug/profiles', methods=['GET'])
+def list_profiles():
+    if not is_admin():
+        return jsonify({"error": "Forbidden"}), 403
+    return jsonify(profiler.list())
 
-# Initialize on startup
-model_ready = initialize_model()
+@app.route('/debug/profiles/<int:profile_id>', methods=['GET'])
+def get_profile(profile_id):
+    if not is_admin():
+        return jsonify({"error": "Forbidden"}), 403
+    profile = profiler.get(profile_id)
+    if profile is None:
+        return jsonify({"error": "Profile not found"}), 404
+    return Response(profile["report"], mimetype='text/plain')
 
 @app.route('/health', methods=['GET'])
 def health_check():
-    return jsonify({"status": "healthy", "model_ready": model_ready}), 200
+    current = manager.current
+    return jsonify({
+        "status": "healthy",
+        "live": True,
+        "ready": manager.ready,
+        "model_ready": manager.ready,
+        "startup": manager.progress,
+        "model_version": current.version if current else None,
+        "parallelism": current.parallelism if current else None,
+        "serving": manager.serving_info(current) if current else None,
+        "last_reload": manager.last_reload,
+        "prediction_cache": prediction_cache.stats(),
+        "load": limiter.stats(),
+        "pid": os.getpid(),
+    }), 200
+
+@app.route('/health/live', methods=['GET'])
+def liveness():
+    """The process is up and serving HTTP, whether or not a model is loaded."""
+    return jsonify({"live": True}), 200
+
+@app.route('/health/ready', methods=['GET'])
+def readiness():
+    """200 once a validated, warmed-up model is serving; 503 with load progress before that."""
+    if manager.ready:
+        return jsonify({"ready": True, "model_version": manager.current.version}), 200
+    return jsonify({"ready": False, "startup": manager.progress}), 503
+
+@app.route('/api/admin/reload', methods=['POST'])
+def admin_reload():
+    """Loads (or with {"retrain": true} retrains) a model in the background and hot-swaps it."""
+    if not is_admin():
+        return jsonify({"error": "Forbidden"}), 403
+
+    options = request.get_json(silent=True) or {}
+    retrain = bool(options.get("retrain", False))
+    if options.get("wait"):
+        status = manager.reload(retrain=retrain)
+        return jsonify(status), 200 if status["swapped"] else 409
+    if not manager.reload_async(retrain=retrain):
+        return jsonify({"error": "A reload is already in progress"}), 409
+    return jsonify({"status": "reloading", "retrain": retrain}), 202
+
+@app.route('/api/admin/append', methods=['POST'])
+def admin_append():
+    """
+    Appends new channel rows (same body formats as /api/predict/batch,
+    with earnings) to the dataset and grows the model on them.
+    ?estimators=N sets how many trees / boosting stages to add.
+    """
+    if not is_admin():
+        return jsonify({"error": "Forbidden"}), 403
+    if not manager.ready:
+        return not_ready_response()
+
+    try:
+        records, parse_errors = read_batch_records()
+        if parse_errors:
+            raise ValueError(next(iter(parse_errors.values())))
+        added = request.args.get('estimators', type=int)
+    except Exception as e:
+        return jsonify({"error": f"Could not parse rows: {e}"}), 400
+    if len(records) > config.MAX_BATCH_ROWS:
+        return jsonify({"error": f"Too many rows: {len(records)}, limit is {config.MAX_BATCH_ROWS}"}), 413
+
+    try:
+        report = manager.append(records, added=added)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(report), 200 if report["swapped"] else 409
 
 @app.route('/api/predict', methods=['POST'])
 def predict():
-    if not model_ready:
-        return jsonify({"error": "Model not initialized. Dataset missing?"}), 503
+    current = manager.current
+    if current is None:
+        return not_ready_response()
         
     try:
         data = request.json
+        if not isinstance(data, dict):
+            raise ValueError("Body must be an object of channel statistics")
+        level = request.args.get('interval')
         # Expected keys: subscribers, video views, etc.
-        prediction = analyst.predict(data)
-        accuracy_metrics = analyst.get_model_accuracy()
-        r2_score = accuracy_metrics.get("r2", 0)
-        return jsonify({"prediction": prediction, "accuracy": r2_score})
+        key = (current.version,) + current.input_key(data)
+        if level is None:
+            prediction = prediction_cache.get(key)
+            if prediction is None:
+                prediction = batcher.predict(current, data, inline=g.profiler is not None)["prediction"]
+                prediction_cache.put(key, prediction)
+            return jsonify({"prediction": prediction, "accuracy": current.metrics.r2})
+
+        level = intervals.check_level(level)
+        key += ('interval', level)
+        result = prediction_cache.get(key)
+        if result is None:
+            scored = batcher.predict(current, data, level, inline=g.profiler is not None)
+            result = (scored["prediction"], scored["lower"], scored["upper"])
+            prediction_cache.put(key, result)
+        prediction, lower, upper = result
+        return jsonify({"prediction": prediction, "accuracy": current.metrics.r2,
+                        "interval": {"level": level, "lower": lower, "upper": upper}})
     except Exception as e:
         return jsonify({"error": str(e)}), 400
 
+def read_batch_records():
+    """
+    Parses a batch request body into (records, parse_errors).
+    Accepts a JSON array (or {"records": [...]}), NDJSON, or CSV, either as
+    the request body or as an uploaded 'file'. records is a list of dicts or
+    a DataFrame; parse_errors maps row position -> message for NDJSON lines
+    that are not valid JSON.
+    """
+    upload = request.files.get('file')
+    if upload is not None:
+        body = upload.read()
+        name = (upload.filename or '').lower()
+        if name.endswith('.csv'):
+            kind = 'csv'
+        elif name.endswith(('.ndjson', '.jsonl')):
+            kind = 'ndjson'
+        else:
+            kind = 'json'
+    else:
+        body = request.get_data()
+        mimetype = request.mimetype
+        if mimetype in ('text/csv', 'application/csv'):
+            kind = 'csv'
+        elif mimetype in ('application/x-ndjson', 'application/ndjson', 'application/jsonl'):
+            kind = 'ndjson'
+        else:
+            kind = 'json'
+
+    if kind == 'csv':
+        return pd.read_csv(io.BytesIO(body)), {}
+
+    if kind == 'ndjson':
+        records, parse_errors = [], {}
+        lines = [line for line in body.decode('utf-8').splitlines() if line.strip()]
+        for i, line in enumerate(lines):
+            try:
+                records.append(json.loads(line))
+            except ValueError as e:
+                records.append(None)
+                parse_errors[i] = f"Invalid JSON: {e}"
+        return records, parse_errors
+
+    data = json.loads(body) if body else None
+    if isinstance(data, dict) and 'records' in data:
+        data = data['records']
+    if not isinstance(data, list):
+        raise ValueError("Expected a JSON array of channel objects")
+    return data, {}
+
+@app.route('/api/predict/batch', methods=['POST'])
+def predict_batch():
+    current = manager.current
+    if current is None:
+        return not_ready_response()
+
+    try:
+        records, parse_errors = read_batch_records()
+    except Exception as e:
+        return jsonify({"error": f"Could not parse batch: {e}"}), 400
+
+    if len(records) > config.MAX_BATCH_ROWS:
+        return jsonify({"error": f"Batch too large: {len(records)} rows, limit is {config.MAX_BATCH_ROWS}"}), 413
+
+    try:
+        level = request.args.get('interval')
+        if level is not None:
+            level = intervals.check_level(level)
+        results = current.predict_batch(records, level=level)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 400
+
+    for i, message in parse_errors.items():
+        results[i] = {"error": message}
+    for i, result in enumerate(results):
+        result["index"] = i
+
+    response = {
+        "predictions": results,
+        "count": len(results),
+        "errors": sum(1 for r in results if "error" in r),
+        "accuracy": current.metrics.r2,
+    }
+    if level is not None:
+        response["interval_level"] = level
+    return jsonify(response)
+
+@app.route('/api/predict/sweep', methods=['POST'])
+def predict_sweep():
+    """
+    What-if sweep: predictions for body "base" (same fields as /api/predict)
+    with one or two numeric inputs varied over body "axes" (see sweep.py),
+    as a curve or a grid. ?interval= adds bounds as for /api/predict.
+    """
+    current = manager.current
+    if current is None:
+        return not_ready_response()
+
+    try:
+        data = request.json
+        if not isinstance(data, dict):
+            raise ValueError("Body must be an object with 'base' and 'axes'")
+        level = request.args.get('interval')
+        if level is not None:
+            level = intervals.check_level(level)
+        response = sweep.run(current, data.get('base', {}), data.get('axes'), level)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    response.update({"model_version": current.version, "accuracy": current.metrics.r2})
+    return jsonify(response)
+
 @app.route('/api/feature-importance', methods=['GET'])
 def feature_importance():
-    if not model_ready:
-        return jsonify({"error": "Model not initialized"}), 503
+    current = manager.current
+    if current is None:
+        return not_ready_response()
     
+    method = request.args.get('method')
+    if method not in (None, 'impurity', 'permutation'):
+        return jsonify({"error": "method must be 'impurity' or 'permutation'"}), 400
+
     try:
-        importance = analyst.get_feature_importances()
-        return jsonify(importance)
+        method = current.importance_method(method)
+        importance = current.get_feature_importances(method)
+        if method == 'permutation' and not importance:
+            response = jsonify({"error": "Permutation importances are still being computed"})
+            response.headers['Retry-After'] = '5'
+            return response, 503
+        # Importances are fixed per model version and method, so clients can
+        # revalidate with If-None-Match and get a 304 instead of the body
+        response = jsonify(importance)
+        response.set_etag(f"{current.version}-{method}")
+        response.headers['Cache-Control'] = 'no-cache'
+        response.headers['X-Importance-Method'] = method
+        return response.make_conditional(request)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 @app.route('/api/model-accuracy', methods=['GET'])
 def model_accuracy():
-    if not model_ready:
-        return jsonify({"error": "Model not initialized"}), 503
+    current = manager.current
+    if current is None:
+        return not_ready_response()
         
     try:
-        accuracy = analyst.get_model_accuracy()
+        accuracy = current.get_model_accuracy()
         return jsonify(accuracy)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+def analytics_response(build):
+    """
+    JSON from build(rollups) for the current analytics rollups: 503 until
+    they exist, 400 for bad query parameters. Results only change with the
+    dataset, so the dataset hash (plus query string) is the ETag.
+    """
+    rollups = manager.analytics
+    if rollups is None:
+        if not manager.ready:
+            return not_ready_response()
+        return jsonify({"error": "Analytics are not available"}), 503
+    try:
+        body = build(rollups)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    body["dataset"] = rollups.info()
+    response = jsonify(body)
+    response.set_etag(f"{rollups.data_hash[:16]}-{zlib.crc32(request.query_string):08x}")
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
+
+def _limit_arg(name, default, maximum):
+    raw = request.args.get(name)
+    if raw is None:
+        return default
+    try:
+        value = int(raw)
+    except ValueError:
+        raise ValueError(f"{name} must be an integer, got {raw!r}")
+    if not 1 <= value <= maximum:
+        raise ValueError(f"{name} must be between 1 and {maximum}")
+    return value
+
+@app.route('/api/analytics/aggregate', methods=['GET'])
+def analytics_aggregate():
+    """
+    count/sum/mean/min/max of ?measure= (default subscribers), per value of
+    ?group_by= (a dimension; omit for one overall row), over the rows
+    matching dimension filters such as ?Country=India,Brazil&min_year=2010.
+    ?sort= (a stat, or the group_by dimension for alphabetical) and ?limit=.
+    """
+    def build(rollups):
+        filters = analytics.parse_filters(request.args)
+        group_by = request.args.get('group_by')
+        measure = request.args.get('measure', 'subscribers')
+        groups = rollups.aggregate(measure, group_by, filters, sort=request.args.get('sort', 'count'),
+                                   limit=_limit_arg('limit', None, 10_000))
+        return {"measure": measure, "group_by": group_by, "filters": filters, "groups": groups}
+    return analytics_response(build)
+
+@app.route('/api/analytics/top', methods=['GET'])
+def analytics_top():
+    """The ?n= (default 10) channels with the highest ?measure=, with the same filters as aggregate."""
+    def build(rollups):
+        filters = analytics.parse_filters(request.args)
+        measure = request.args.get('measure', 'subscribers')
+        n = _limit_arg('n', 10, analytics.MAX_TOP_N)
+        return {"measure": measure, "filters": filters, "channels": rollups.top(measure, n, filters)}
+    return analytics_response(build)
+
+@app.route('/api/analytics/dimensions', methods=['GET'])
+def analytics_dimensions():
+    """Filterable dimension values and the measures aggregate and top accept."""
+    return analytics_response(lambda rollups: rollups.dimensions())
+
+@app.route('/api/similar', methods=['POST'])
+def similar_channels():
+    """
+    The ?k= (default 10) channels closest to the posted channel (same body
+    as /api/predict) in scale, age and upload rate, with their actual
+    earnings. ?category= and ?Country= keep only channels with that value.
+    """
+    index = manager.neighbors
+    if index is None:
+        if not manager.ready:
+            return not_ready_response()
+        return jsonify({"error": "Similar channel index is not available"}), 503
+    try:
+        data = request.json
+        if not isinstance(data, dict):
+            raise ValueError("Body must be a JSON object of channel fields")
+        k = _limit_arg('k', 10, neighbors.MAX_K)
+        filters = {dim: request.args[dim] for dim in neighbors.FILTER_DIMENSIONS if request.args.get(dim)}
+        channels = index.query(data, k, filters)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({"k": k, "filters": filters, "channels": channels, "dataset": index.info()})
+
 if __name__ == '__main__':
+    # Development server; for production use gunicorn with wsgi.py
+    initialize_model()
     app.run(debug=True, port=5000)
@@ -0,0 +1,82 @@
+"""
+Request backpressure: a WSGI middleware that bounds how many requests run
+and wait at once, and turns the excess away with 429 instead of letting
+latency grow with the backlog.
+"""
+import json
+import threading
+import time
+
+import metrics
+
+
+class ConcurrencyLimiter:
+    """
+    At most max_active requests run at once. Up to max_queue more wait, for
+    at most queue_timeout seconds, for a free slot; requests beyond that,
+    or that time out waiting, get 429 Too Many Requests with Retry-After.
+    Paths starting with one of `exempt` (health checks, metrics) bypass the
+    limit so probes still answer under overload. Limits are per process.
+    max_active <= 0 disables limiting.
+
+    The slot is released when the wrapped app returns, which covers the
+    whole request for Flask's buffered responses.
+    """
+
+    def __init__(self, app, max_active, max_queue, queue_timeout, exempt=('/health', '/metrics')):
+        self.app = app
+        self.max_active = max_active
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.exempt = tuple(exempt)
+        self._slots = threading.BoundedSemaphore(max(max_active, 1))
+        self._lock = threading.Lock()
+        self.active = 0
+        self.waiting = 0
+        self.rejected = {"queue_full": 0, "queue_timeout": 0}
+
+    def __call__(self, environ, start_response):
+        if self.max_active <= 0 or environ.get('PATH_INFO', '').startswith(self.exempt):
+            return self.app(environ, start_response)
+
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                full = self.waiting >= self.max_queue
+                if not full:
+                    self.waiting += 1
+            if full:
+                return self._reject(start_response, "queue_full")
+            start = time.perf_counter()
+            try:
+                acquired = self._slots.acquire(timeout=self.queue_timeout)
+            finally:
+                with self._lock:
+                    self.waiting -= 1
+            metrics.QUEUE_SECONDS.observe(time.perf_counter() - start)
+            if not acquired:
+                return self._reject(start_response, "queue_timeout")
+
+        with self._lock:
+            self.active += 1
+        try:
+            return self.app(environ, start_response)
+        finally:
+            with self._lock:
+                self.active -= 1
+            self._slots.release()
+
+    def _reject(self, start_response, reason):
+        with self._lock:
+            self.rejected[reason] += 1
+        body = json.dumps({"error": "Server is overloaded, retry later", "reason": reason}).encode()
+        start_response('429 Too Many Requests', [
+            ('Content-Type', 'application/json'),
+            ('Content-Length', str(len(body))),
+            ('Retry-After', str(max(1, round(self.queue_timeout)))),
+        ])
+        return [body]
+
+    def stats(self):
+        with self._lock:
+            return {"active": self.active, "waiting": self.waiting, "max_active": self.max_active,
+                    "max_queue": self.max_queue, "rejected": dict(self.rejected)}
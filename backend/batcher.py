@@ -0,0 +1,123 @@
+"""
+Micro-batching of concurrent single-row predictions.
+
+Request threads hand their input to a PredictionBatcher and block; one
+scoring thread collects whatever is pending, scores it with a single
+predict_batch call (the compiled fast path for small batches) and hands
+each request its own result. Per-call overhead is then paid once per
+batch instead of once per request.
+"""
+import os
+import threading
+import time
+
+import metrics
+
+
+class _Pending:
+    __slots__ = ('analyst', 'input_data', 'level', 'enqueued', 'result', 'error', 'done')
+
+    def __init__(self, analyst, input_data, level):
+        self.analyst = analyst
+        self.input_data = input_data
+        self.level = level
+        self.enqueued = time.perf_counter()
+        self.result = None
+        self.error = None
+        self.done = threading.Event()
+
+
+class PredictionBatcher:
+    """
+    Coalesces concurrent predict calls into batches of at most max_batch.
+
+    The wait is adaptive: while requests arrive one at a time (the last
+    batch held a single request) a request is scored as soon as the
+    scoring thread is free, adding no delay. Once batches form, the
+    scoring thread waits up to max_wait seconds after the oldest pending
+    request for more to arrive before scoring. Requests that come in while
+    a batch is being scored form the next batch either way.
+    max_batch <= 1 disables batching: predict scores on the caller's thread.
+
+    The scoring thread is started on first use, and again in a forked
+    child (threads do not survive fork).
+    """
+
+    def __init__(self, max_batch, max_wait):
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._reset()
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self):
+        self._pending = []
+        self._cond = threading.Condition()
+        self._thread = None
+        self._concurrent = False
+
+    def predict(self, analyst, input_data, level=None, inline=False):
+        """
+        analyst.predict_batch([input_data], level)[0] with the input scored
+        alongside concurrent calls: {"prediction"[, "lower", "upper"]}.
+        Raises ValueError for an input predict would reject.
+        inline: score on the calling thread instead, e.g. so a profiled
+        request's profile shows the scoring.
+        """
+        if self.max_batch <= 1 or inline:
+            result = analyst.predict_batch([input_data], level=level)[0]
+        else:
+            pending = _Pending(analyst, input_data, level)
+            with self._cond:
+                if self._thread is None or not self._thread.is_alive():
+                    self._thread = threading.Thread(target=self._run, name='prediction-batcher', daemon=True)
+                    self._thread.start()
+                self._pending.append(pending)
+                self._cond.notify()
+            pending.done.wait()
+            if pending.error is not None:
+                raise pending.error
+            result = pending.result
+        if "error" in result:
+            raise ValueError(result["error"])
+        return result
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                if self._concurrent and self.max_wait > 0:
+                    deadline = self._pending[0].enqueued + self.max_wait
+                    while len(self._pending) < self.max_batch:
+                        remaining = deadline - time.perf_counter()
+                        if remaining <= 0:
+                            break
+                        self._cond.wait(remaining)
+                batch = self._pending[:self.max_batch]
+                del self._pending[:self.max_batch]
+                self._concurrent = len(batch) > 1
+            self._score(batch)
+
+    def _score(self, batch):
+        started = time.perf_counter()
+        metrics.PREDICT_BATCH_SIZE.observe(len(batch))
+        for pending in batch:
+            metrics.PREDICT_BATCH_WAIT_SECONDS.observe(started - pending.enqueued)
+
+        # One predict_batch per model and interval level; normally just one
+        groups = {}
+        for pending in batch:
+            groups.setdefault((id(pending.analyst), pending.level), []).append(pending)
+        for group in groups.values():
+            first = group[0]
+            try:
+                results = first.analyst.predict_batch([p.input_data for p in group], level=first.level)
+            except Exception as e:
+                for pending in group:
+                    pending.error = e
+            else:
+                for pending, result in zip(group, results):
+                    pending.result = result
+            for pending in group:
+                pending.done.set()
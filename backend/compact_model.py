@@ -0,0 +1,287 @@
+"""
+Serving-only export of a RandomForest model.
+
+All trees are flattened into a handful of contiguous arrays (int32
+features and child indices, float32 thresholds, float64 node values)
+saved as .npy files. Loading memory-maps them, so every process serving
+the same export shares one copy through the page cache, and nothing from
+training (data, holdout, estimator objects) is kept.
+
+Without pruning, predictions are identical to the forest's: thresholds
+are rounded down to the largest float32 not above the original, which
+gives the same decision for every float32 input (trees compare float32
+features), and tree outputs are summed in the same order.
+"""
+import json
+import os
+import shutil
+
+import joblib
+import numpy as np
+from joblib import Parallel, delayed
+import sklearn
+from sklearn.base import BaseEstimator, RegressorMixin
+from sklearn.pipeline import Pipeline
+
+# Bump when the on-disk layout below changes
+EXPORT_FORMAT = 2
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_EXPORT_DIR = os.path.join(BASE_DIR, 'serving')
+
+ARRAYS = ('feature', 'threshold', 'children', 'value', 'roots')
+# Rows traversed together; keeps the (rows x trees) work arrays cache-sized
+CHUNK_ROWS = 1024
+# Traversal steps between dropping cursors that have reached a leaf
+COMPACT_EVERY = 4
+
+
+def _round_down_float32(threshold):
+    """Largest float32 <= each float64 threshold: x <= t and x <= t32 agree for all float32 x."""
+    t32 = threshold.astype(np.float32)
+    too_high = t32.astype(np.float64) > threshold
+    t32[too_high] = np.nextafter(t32[too_high], np.float32(-np.inf))
+    return t32
+
+
+def _flatten_tree(tree, max_depth=None, min_samples_leaf=1):
+    """
+    (feature, threshold, children, value, depth) for one fitted tree_ with
+    local node ids. children[i] is (left, right); a leaf points to itself,
+    so traversal can keep stepping without checking for leaves. Splits
+    deeper than max_depth, or with a child of fewer than min_samples_leaf
+    training samples, are collapsed: the node keeps its own value (the
+    mean of its samples). depth is the number of steps to reach any leaf.
+    """
+    left, right = tree.children_left, tree.children_right
+    samples = tree.n_node_samples
+    n_nodes = tree.node_count
+
+    keep = np.zeros(n_nodes, dtype=bool)
+    leaf = left == -1
+    frontier = np.array([0])
+    depth = 0
+    while frontier.size:
+        keep[frontier] = True
+        internal = frontier[~leaf[frontier]]
+        cut = np.zeros(internal.size, dtype=bool)
+        if max_depth is not None and depth >= max_depth:
+            cut[:] = True
+        if min_samples_leaf > 1:
+            cut |= np.minimum(samples[left[internal]], samples[right[internal]]) < min_samples_leaf
+        leaf[internal[cut]] = True
+        internal = internal[~cut]
+        frontier = np.concatenate([left[internal], right[internal]])
+        if frontier.size:
+            depth += 1
+
+    # Renumber the kept nodes, preserving order (the root stays 0)
+    new_id = np.cumsum(keep) - 1
+    nodes = np.flatnonzero(keep)
+    is_leaf = leaf[nodes]
+    own = np.arange(len(nodes))
+    feature = np.where(is_leaf, 0, tree.feature[nodes]).astype(np.int32)
+    threshold = _round_down_float32(tree.threshold[nodes])
+    children = np.empty((len(nodes), 2), dtype=np.int32)
+    children[:, 0] = np.where(is_leaf, own, new_id[left[nodes]])
+    children[:, 1] = np.where(is_leaf, own, new_id[right[nodes]])
+    value = tree.value[nodes, 0, 0].astype(np.float64)
+    return feature, threshold, children, value, depth
+
+
+class CompactForest(RegressorMixin, BaseEstimator):
+    """
+    Flattened forest with RandomForestRegressor.predict semantics. Used as
+    the final step of the serving pipeline in place of the forest.
+    Node arrays hold all trees back to back; roots[t] is tree t's root and
+    depth the most steps any tree needs to reach a leaf. The source
+    forest's feature_importances_ are carried over for reporting.
+    """
+
+    def __init__(self, feature, threshold, children, value, roots, depth):
+        self.feature = feature
+        self.threshold = threshold
+        self.children = children
+        self.value = value
+        self.roots = roots
+        self.depth = depth
+
+    @classmethod
+    def from_forest(cls, forest, max_depth=None, min_samples_leaf=1):
+        if forest.n_outputs_ != 1:
+            raise ValueError("Only single-output forests can be exported")
+        parts = [_flatten_tree(est.tree_, max_depth, min_samples_leaf) for est in forest.estimators_]
+        sizes = np.array([len(part[0]) for part in parts])
+        offsets = np.concatenate([[0], np.cumsum(sizes)[:-1]]).astype(np.int32)
+        forest_arrays = cls(
+            feature=np.concatenate([p[0] for p in parts]),
+            threshold=np.concatenate([p[1] for p in parts]),
+            # Child ids become global
+            children=np.concatenate([p[2] + off for p, off in zip(parts, offsets)]).astype(np.int32),
+            value=np.concatenate([p[3] for p in parts]),
+            roots=offsets,
+            depth=max(p[4] for p in parts),
+        )
+        forest_arrays.n_features_in_ = forest.n_features_in_
+        forest_arrays.feature_importances_ = forest.feature_importances_
+        return forest_arrays
+
+    def __sklearn_is_fitted__(self):
+        return True
+
+    def fit(self, X, y):
+        raise NotImplementedError("CompactForest is export-only; train a RandomForestRegressor and export it")
+
+    @property
+    def n_nodes(self):
+        return len(self.feature)
+
+    @property
+    def nbytes(self):
+        return sum(getattr(self, name).nbytes for name in ARRAYS)
+
+    def predict(self, X):
+        """
+        Predicts for a dense or sparse feature matrix, CHUNK_ROWS rows at a
+        time. Chunks run on joblib's active backend, so the caller's
+        parallel_config spreads large batches over threads (the numpy
+        gathers release the GIL), like RandomForestRegressor.predict.
+        """
+        return self._chunked(self._predict_block, X)
+
+    def predict_trees(self, X):
+        """(n_rows, n_trees) matrix of each tree's prediction, chunked like predict."""
+        return self._chunked(self._leaf_values, X)
+
+    def _chunked(self, block_fn, X):
+        n_rows = X.shape[0]
+        if n_rows <= CHUNK_ROWS:
+            return block_fn(X)
+        chunks = Parallel()(
+            delayed(block_fn)(X[start:start + CHUNK_ROWS])
+            for start in range(0, n_rows, CHUNK_ROWS)
+        )
+        return np.concatenate(chunks)
+
+    def _predict_block(self, X):
+        leaf_values = self._leaf_values(X)
+        # Summed tree by tree like RandomForestRegressor.predict, so results match bit for bit
+        total = np.zeros(leaf_values.shape[0], dtype=np.float64)
+        for t in range(leaf_values.shape[1]):
+            total += leaf_values[:, t]
+        total /= leaf_values.shape[1]
+        return total
+
+    def _leaf_values(self, X):
+        if hasattr(X, 'toarray'):
+            X = X.toarray()
+        # Trees compare float32 features, as sklearn does
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        n_rows, n_features = X.shape
+        n_trees = len(self.roots)
+        flat_X = X.ravel()
+        feature, threshold, children = self.feature, self.threshold, self.children.ravel()
+        # One cursor per (row, tree), stepped down all trees at once. intp
+        # cursors and np.take are the cheapest gathers numpy offers here.
+        node = np.tile(self.roots.astype(np.intp), n_rows)
+        start = np.repeat(np.arange(n_rows, dtype=np.intp) * n_features, n_trees)
+        active = np.arange(node.size)
+        current = node
+        for step in range(self.depth):
+            go_right = np.take(flat_X, start + np.take(feature, current)) > np.take(threshold, current)
+            current = np.take(children, (current << 1) + go_right).astype(np.intp)
+            if (step + 1) % COMPACT_EVERY == 0 or step + 1 == self.depth:
+                # Leaves point to themselves; write back and drop finished cursors
+                node[active] = current
+                moving = np.take(children, current << 1) != current
+                active, current, start = active[moving], current[moving], start[moving]
+                if not active.size:
+                    break
+
+        return np.take(self.value, node).reshape(n_rows, n_trees)
+
+
+def export(artifact, export_dir=DEFAULT_EXPORT_DIR, max_depth=None, min_samples_leaf=1):
+    """
+    Writes a serving-only copy of a model_store artifact whose regressor is
+    a RandomForest: the forest as flat arrays, plus the fitted transform
+    steps (features, preprocessor) and the metadata serving needs.
+    Replaces export_dir atomically.
+    """
+    pipeline = artifact["pipeline"]
+    forest = CompactForest.from_forest(pipeline.named_steps['regressor'], max_depth, min_samples_leaf)
+
+    # Per process, so workers exporting the same model do not collide
+    tmp_dir = f"{export_dir}.tmp{os.getpid()}"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    for name in ARRAYS:
+        np.save(os.path.join(tmp_dir, f"{name}.npy"), getattr(forest, name))
+    metadata = {k: v for k, v in artifact.items()
+                if k not in ("pipeline", "cleaning_stats", "model_selection")}
+    metadata.update({
+        "transform_steps": pipeline.steps[:-1],
+        "n_features_in": forest.n_features_in_,
+        "feature_importances": forest.feature_importances_,
+        "depth": forest.depth,
+        "pruning": {"max_depth": max_depth, "min_samples_leaf": min_samples_leaf},
+    })
+    joblib.dump(metadata, os.path.join(tmp_dir, 'metadata.joblib'))
+    manifest = {"format": EXPORT_FORMAT, "version": artifact["version"],
+                "max_depth": max_depth, "min_samples_leaf": min_samples_leaf,
+                "n_trees": len(forest.roots), "n_nodes": forest.n_nodes, "depth": forest.depth,
+                "bytes": forest.nbytes}
+    with open(os.path.join(tmp_dir, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f)
+
+    # Processes still mapping the old files keep them until they reload
+    shutil.rmtree(export_dir, ignore_errors=True)
+    try:
+        os.replace(tmp_dir, export_dir)
+    except OSError:
+        # Another process published in between; fine if it is the same export
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        if not is_current(export_dir, artifact["version"], max_depth, min_samples_leaf):
+            raise
+    return manifest
+
+
+def read_manifest(export_dir=DEFAULT_EXPORT_DIR):
+    """The export's manifest.json, or None if missing or in an older format."""
+    try:
+        with open(os.path.join(export_dir, 'manifest.json')) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return manifest if manifest.get("format") == EXPORT_FORMAT else None
+
+
+def is_current(export_dir, version, max_depth=None, min_samples_leaf=1):
+    """True if export_dir already holds this model version with this pruning."""
+    manifest = read_manifest(export_dir)
+    return (manifest is not None and manifest["version"] == version
+            and manifest.get("max_depth") == max_depth
+            and manifest.get("min_samples_leaf") == min_samples_leaf)
+
+
+def load(export_dir=DEFAULT_EXPORT_DIR, mmap=True):
+    """
+    Returns an artifact dict (as model_store.read_artifact) whose pipeline
+    ends in a CompactForest over memory-mapped arrays, or None.
+    """
+    if read_manifest(export_dir) is None:
+        return None
+    metadata = joblib.load(os.path.join(export_dir, 'metadata.joblib'))
+    if metadata.get("sklearn_version") != sklearn.__version__:
+        return None
+    # Plain ndarray views of the maps: same shared pages, without np.memmap's
+    # per-operation subclass overhead
+    arrays = {name: np.load(os.path.join(export_dir, f"{name}.npy"), mmap_mode='r' if mmap else None).view(np.ndarray)
+              for name in ARRAYS}
+    forest = CompactForest(depth=metadata.pop("depth"), **arrays)
+    forest.n_features_in_ = metadata.pop("n_features_in")
+    forest.feature_importances_ = metadata.pop("feature_importances")
+
+    artifact = dict(metadata)
+    artifact["pipeline"] = Pipeline(steps=artifact.pop("transform_steps") + [('regressor', forest)])
+    return artifact
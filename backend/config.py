@@ -0,0 +1,88 @@
+"""Runtime settings, read from environment variables with sensible defaults."""
+import os
+
+
+def _int(name, default):
+    return int(os.environ.get(name, default))
+
+
+def _float(name, default):
+    return float(os.environ.get(name, default))
+
+
+# Largest number of rows accepted by /api/predict/batch in one request
+MAX_BATCH_ROWS = _int('MAX_BATCH_ROWS', 100000)
+
+# /api/predict result cache (0 entries disables it)
+PREDICTION_CACHE_SIZE = _int('PREDICTION_CACHE_SIZE', 10000)
+PREDICTION_CACHE_TTL = _float('PREDICTION_CACHE_TTL', 300)
+
+# Parallelism (joblib convention: -1 = all cores)
+TRAIN_N_JOBS = _int('TRAIN_N_JOBS', -1)
+# Batches at least this large are scored with PREDICT_N_JOBS threads;
+# smaller batches and single rows stay on one thread for latency.
+PREDICT_N_JOBS = _int('PREDICT_N_JOBS', -1)
+PARALLEL_PREDICT_MIN_ROWS = _int('PARALLEL_PREDICT_MIN_ROWS', 10000)
+
+# Hot reload: a candidate model is only published if its holdout R2 reaches
+# MIN_MODEL_R2. MODEL_RELOAD_INTERVAL > 0 polls the artifact and dataset for
+# changes every that many seconds. Admin endpoints require ADMIN_TOKEN in
+# the X-Admin-Token header and are refused while it is unset, unless
+# ADMIN_OPEN=1 opens them without a token (local development only).
+# A model grown by an incremental update must also score at least the
+# model it was grown from on the same holdout, less MAX_INCREMENTAL_R2_DROP.
+MIN_MODEL_R2 = _float('MIN_MODEL_R2', 0.5)
+MAX_INCREMENTAL_R2_DROP = _float('MAX_INCREMENTAL_R2_DROP', 0)
+MODEL_RELOAD_INTERVAL = _float('MODEL_RELOAD_INTERVAL', 0)
+ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN', '')
+ADMIN_OPEN = _int('ADMIN_OPEN', 0)
+
+# Synthetic predictions run on every new model before it starts serving
+WARMUP_PREDICTIONS = _int('WARMUP_PREDICTIONS', 5)
+
+# Per-request profiling: requests with the X-Profile header (if
+# PROFILING_ENABLED) and a random PROFILE_SAMPLE_RATE fraction of all
+# requests are run under cProfile; reports are served at /debug/profiles.
+PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED', '0') == '1'
+PROFILE_SAMPLE_RATE = _float('PROFILE_SAMPLE_RATE', 0)
+
+# Serving memory: with COMPACT_SERVING, a RandomForest is served from a
+# flattened, memory-mapped export (compact_model) written to
+# COMPACT_EXPORT_DIR, which all worker processes share. Optional pruning
+# trades accuracy for size (0 = unlimited depth); see
+# benchmarks/bench_compact_model.py for the trade-off.
+COMPACT_SERVING = os.environ.get('COMPACT_SERVING', '1') == '1'
+COMPACT_EXPORT_DIR = os.environ.get('COMPACT_EXPORT_DIR', '')
+COMPACT_MAX_DEPTH = _int('COMPACT_MAX_DEPTH', 0)
+COMPACT_MIN_SAMPLES_LEAF = _int('COMPACT_MIN_SAMPLES_LEAF', 1)
+
+# Serving (wsgi.py / gunicorn.conf.py). SERVER_WORKERS pre-forked processes
+# (0 = one per core) share the model loaded once in the master; each runs
+# SERVER_THREADS requests at a time. Per process, up to SERVER_QUEUE_SIZE
+# more requests wait at most SERVER_QUEUE_TIMEOUT seconds for a thread; the
+# rest get 429. SERVER_THREADS=0 disables the limit.
+SERVER_BIND = os.environ.get('SERVER_BIND', '0.0.0.0:5000')
+SERVER_WORKERS = _int('SERVER_WORKERS', 0)
+SERVER_THREADS = _int('SERVER_THREADS', 4)
+SERVER_QUEUE_SIZE = _int('SERVER_QUEUE_SIZE', 32)
+SERVER_QUEUE_TIMEOUT = _float('SERVER_QUEUE_TIMEOUT', 2.0)
+
+# joblib.Memory cache of fitted transform steps (features + encoder), keyed
+# by their input rows, so refits over the same data skip them. '' disables;
+# trimmed to TRANSFORM_CACHE_BYTES after each fit.
+TRANSFORM_CACHE_DIR = os.environ.get('TRANSFORM_CACHE_DIR',
+                                     os.path.join(os.path.dirname(os.path.abspath(__file__)), 'transform_cache'))
+TRANSFORM_CACHE_BYTES = os.environ.get('TRANSFORM_CACHE_BYTES', '1G')
+
+# predict_batch scores lists of up to this many dicts with the compiled
+# fast path (no pandas); larger batches go through the pipeline.
+COMPILED_BATCH_MAX_ROWS = _int('COMPILED_BATCH_MAX_ROWS', 256)
+# Micro-batching of concurrent /api/predict requests (batcher.py): up to
+# PREDICT_BATCH_MAX requests are scored together, waiting at most
+# PREDICT_BATCH_WAIT seconds for company once requests arrive concurrently.
+# PREDICT_BATCH_MAX=1 scores every request on its own thread.
+PREDICT_BATCH_MAX = _int('PREDICT_BATCH_MAX', 32)
+PREDICT_BATCH_WAIT = _float('PREDICT_BATCH_WAIT', 0.002)
+
+# Largest grid /api/predict/sweep scores in one request (product of the axis lengths)
+SWEEP_MAX_POINTS = _int('SWEEP_MAX_POINTS', 40000)
@@ -0,0 +1,99 @@
+import hashlib
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CACHE_DIR = os.path.join(BASE_DIR, 'cache')
+
+# Bump when the on-disk layout below changes
+CACHE_FORMAT = 1
+
+
+def dataset_hash(filepath, chunk_size=1 << 20):
+    """Returns the sha256 hex digest of the dataset file."""
+    digest = hashlib.sha256()
+    with open(filepath, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _entry_dir(cache_dir, key):
+    return os.path.join(cache_dir, key)
+
+
+def save_frame(df, cache_dir, key):
+    """
+    Writes the frame as one .npy file per column under cache_dir/key.
+
+    Numeric columns are stored as-is. String and categorical columns are
+    dictionary-encoded: int codes in .npy plus the category list in the
+    manifest. Other cache entries are removed once the new one is in place;
+    entries other processes are still writing are left alone.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    # Per process, so workers caching the same dataset do not collide
+    tmp_dir = _entry_dir(cache_dir, f"{key}.tmp{os.getpid()}")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    columns = []
+    for i, col in enumerate(df.columns):
+        series = df[col]
+        filename = f"{i}.npy"
+        if isinstance(series.dtype, pd.CategoricalDtype) or not pd.api.types.is_numeric_dtype(series):
+            cat = pd.Categorical(series.astype(str) if not isinstance(series.dtype, pd.CategoricalDtype) else series)
+            np.save(os.path.join(tmp_dir, filename), np.ascontiguousarray(cat.codes))
+            columns.append({"name": col, "file": filename, "kind": "category",
+                            "categories": [str(c) for c in cat.categories]})
+        else:
+            np.save(os.path.join(tmp_dir, filename), np.ascontiguousarray(series.to_numpy()))
+            columns.append({"name": col, "file": filename, "kind": "numeric"})
+
+    manifest = {"format": CACHE_FORMAT, "key": key, "rows": len(df), "columns": columns}
+    with open(os.path.join(tmp_dir, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f)
+
+    final_dir = _entry_dir(cache_dir, key)
+    shutil.rmtree(final_dir, ignore_errors=True)
+    try:
+        os.replace(tmp_dir, final_dir)
+    except OSError:
+        # Another process published in between; fine if it is the same entry
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        if load_frame(cache_dir, key) is None:
+            raise
+
+    # Leave other processes' in-progress entries alone
+    for name in os.listdir(cache_dir):
+        if name != key and '.tmp' not in name:
+            shutil.rmtree(os.path.join(cache_dir, name), ignore_errors=True)
+
+
+def load_frame(cache_dir, key):
+    """
+    Returns the cached frame backed by read-only memory maps, or None.
+
+    The column data is not copied, so processes loading the same entry
+    share the page cache instead of each holding their own copy.
+    """
+    entry = _entry_dir(cache_dir, key)
+    try:
+        with open(os.path.join(entry, 'manifest.json')) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if manifest.get("format") != CACHE_FORMAT or manifest.get("key") != key:
+        return None
+
+    data = {}
+    for column in manifest["columns"]:
+        values = np.load(os.path.join(entry, column["file"]), mmap_mode='r')
+        if column["kind"] == "category":
+            values = pd.Categorical.from_codes(values, categories=pd.Index(column["categories"]))
+        data[column["name"]] = values
+    return pd.DataFrame(data, copy=False)
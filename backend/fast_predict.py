@@ -0,0 +1,179 @@
+import threading
+
+import numpy as np
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.preprocessing import OneHotEncoder
+
+from compact_model import CompactForest
+from features import ChannelFeatures, check_numeric, coerce_numeric_inputs, derive
+
+
+class CompiledPredictor:
+    """
+    Single-row inference without pandas or the ColumnTransformer.
+
+    Built from a fitted pipeline of the shape YouTubeAnalyst trains
+    (ChannelFeatures, then OneHotEncoder 'cat' + passthrough 'num', into a
+    RandomForestRegressor or the CompactForest exported from one). Feature
+    values come from ChannelFeatures.transform_one, the one-hot category
+    offsets are precomputed, the feature vector is written straight into a
+    preallocated float32 row, and the trees are evaluated in the same
+    order as RandomForestRegressor.predict, so the result is identical to
+    pipeline.predict. Inputs are validated by features.parse_number, as
+    on the pipeline path, so both accept and reject the same rows.
+    """
+
+    def __init__(self, pipeline):
+        self.features = pipeline.named_steps['features']
+        preprocessor = pipeline.named_steps['preprocessor']
+        self.regressor = pipeline.named_steps['regressor']
+
+        self.categorical_features = []
+        self.category_offsets = []  # per categorical feature: value -> column
+        self.numeric_features = []
+        self.numeric_columns = []
+        column = 0
+        for name, transformer, columns in preprocessor.transformers_:
+            if name == 'remainder':
+                continue
+            if name == 'cat':
+                for feature, categories in zip(columns, transformer.categories_):
+                    self.categorical_features.append(feature)
+                    self.category_offsets.append(
+                        {str(value): column + i for i, value in enumerate(categories)})
+                    column += len(categories)
+            elif name == 'num':
+                for feature in columns:
+                    self.numeric_features.append(feature)
+                    self.numeric_columns.append(column)
+                    column += 1
+
+        self.n_features = column
+        # One preallocated row per thread; Flask serves requests on threads
+        self._local = threading.local()
+        if isinstance(self.regressor, CompactForest):
+            self.trees = None
+        else:
+            self.trees = [est.tree_ for est in self.regressor.estimators_]
+
+    @classmethod
+    def from_pipeline(cls, pipeline):
+        """Returns a compiled predictor, or None if the pipeline shape is unsupported."""
+        try:
+            features = pipeline.named_steps['features']
+            preprocessor = pipeline.named_steps['preprocessor']
+            regressor = pipeline.named_steps['regressor']
+        except (AttributeError, KeyError):
+            return None
+        if list(pipeline.named_steps) != ['features', 'preprocessor', 'regressor']:
+            return None
+        if not isinstance(features, ChannelFeatures):
+            return None
+        if isinstance(regressor, RandomForestRegressor):
+            if regressor.n_outputs_ != 1:
+                return None
+        elif not isinstance(regressor, CompactForest):
+            return None
+        # The fitted transformers_ wrap 'passthrough', so check the spec
+        for name, transformer, _ in preprocessor.transformers:
+            if name == 'num' and transformer != 'passthrough':
+                return None
+            if name == 'cat' and not (isinstance(transformer, OneHotEncoder)
+                                      and transformer.drop is None
+                                      and transformer.min_frequency is None
+                                      and transformer.max_categories is None):
+                return None
+            if name not in ('cat', 'num'):
+                return None
+        if preprocessor.remainder != 'drop':
+            return None
+        return cls(pipeline)
+
+    def _row(self, input_data):
+        """The thread's preallocated feature row, filled for one input dict."""
+        values = self.features.transform_one(input_data)
+
+        row = getattr(self._local, 'row', None)
+        if row is None:
+            row = self._local.row = np.zeros((1, self.n_features), dtype=np.float32)
+        else:
+            row.fill(0)
+        for feature, offsets in zip(self.categorical_features, self.category_offsets):
+            # Unknown categories leave the block all-zero, like handle_unknown='ignore'
+            col = offsets.get(values[feature])
+            if col is not None:
+                row[0, col] = 1.0
+        for feature, col in zip(self.numeric_features, self.numeric_columns):
+            row[0, col] = values[feature]
+        return row
+
+    def predict(self, input_data):
+        """Predicts earnings for one input dict."""
+        row = self._row(input_data)
+        if self.trees is None:
+            return self.regressor.predict(row)[0]
+        # Same accumulation order as RandomForestRegressor.predict
+        total = np.zeros(1, dtype=np.float64)
+        for tree in self.trees:
+            total += tree.predict(row)[:, 0]
+        total /= len(self.trees)
+        return total[0]
+
+    def predict_trees(self, input_data):
+        """Each tree's prediction for one input dict, in forest order."""
+        row = self._row(input_data)
+        if self.trees is None:
+            return self.regressor.predict_trees(row)[0]
+        return np.array([tree.predict(row)[0, 0] for tree in self.trees])
+
+    def matrix(self, inputs):
+        """
+        Feature matrix for many input dicts, one row each. Returns
+        (X, errors): errors maps position -> message for inputs predict
+        would reject; their rows are left zero.
+        """
+        X = np.zeros((len(inputs), self.n_features), dtype=np.float32)
+        errors = {}
+        for i, input_data in enumerate(inputs):
+            try:
+                X[i] = self._row(input_data)[0]
+            except ValueError as e:
+                errors[i] = str(e)
+        return X, errors
+
+    def sweep_matrix(self, base_input, varied):
+        """
+        Feature matrix of base_input repeated once per point, with the
+        numeric inputs in varied ({input: array}, all the same length)
+        taking each point's value and the derived features recomputed to
+        match. Rows equal matrix() of the per-point input dicts. Raises
+        ValueError like predict.
+        """
+        base = self._row(base_input)[0]
+        n_points = len(next(iter(varied.values())))
+        X = np.repeat(base[np.newaxis], n_points, axis=0)
+        values = coerce_numeric_inputs(base_input, self.features.medians_)
+        for col, points in varied.items():
+            values[col] = np.asarray(points, dtype='float64')
+            check_numeric(col, values[col])
+        values.update(derive(values, self.features.year_))
+        for feature, col in zip(self.numeric_features, self.numeric_columns):
+            X[:, col] = values[feature]
+        return X
+
+    def predict_matrix(self, X):
+        """Predictions for rows of matrix(), identical to predict on each input."""
+        if self.trees is None:
+            return self.regressor.predict(X)
+        # The forest's own predict would add joblib dispatch overhead per call
+        total = np.zeros(X.shape[0], dtype=np.float64)
+        for tree in self.trees:
+            total += tree.predict(X)[:, 0]
+        total /= len(self.trees)
+        return total
+
+    def predict_trees_matrix(self, X):
+        """(n_rows, n_trees) per-tree predictions for rows of matrix()."""
+        if self.trees is None:
+            return self.regressor.predict_trees(X)
+        return np.column_stack([tree.predict(X)[:, 0] for tree in self.trees])
@@ -0,0 +1,239 @@
+"""
+Model features from raw channel rows, shared by training, batch and
+single-row inference.
+
+ChannelFeatures is the first step of every model pipeline. It turns raw
+channel columns (a cleaned dataset frame or prediction inputs) into the
+feature frame the encoder and regressor see: numeric inputs are coerced
+and missing values filled with the medians learned in fit, categoricals
+become strings ("Unknown" when missing), and the derived features are
+computed. Its fitted state is pickled with the pipeline, so serving fills
+and derives exactly as training did.
+"""
+import datetime
+import math
+
+import numpy as np
+import pandas as pd
+from sklearn.base import BaseEstimator, TransformerMixin
+from sklearn.utils.validation import check_is_fitted
+
+# Raw inputs the model uses
+NUMERIC_INPUTS = ['subscribers', 'video views', 'uploads', 'created_year', 'video_views_for_the_last_30_days']
+CATEGORICAL_FEATURES = ['category', 'Country', 'channel_type']
+INPUT_COLUMNS = NUMERIC_INPUTS + CATEGORICAL_FEATURES
+
+# Output columns of ChannelFeatures.transform
+NUMERIC_FEATURES = ['subscribers', 'video views', 'uploads', 'views_per_upload', 'channel_age_years',
+                    'video_views_for_the_last_30_days']
+FEATURE_COLUMNS = CATEGORICAL_FEATURES + NUMERIC_FEATURES
+
+# Ratios kept for analysis (the report), never model inputs: (name, numerator, denominator)
+ANALYSIS_RATIOS = [
+    ('earnings_per_sub', 'highest_yearly_earnings', 'subscribers'),
+    ('subscribers_growth_rate', 'subscribers_for_last_30_days', 'subscribers'),
+    ('video_views_growth_rate', 'video_views_for_the_last_30_days', 'video views'),
+]
+
+# Largest magnitude of a numeric input: trees compare features as float32,
+# and larger or non-finite values would not survive the cast
+MAX_INPUT_MAGNITUDE = float(np.finfo(np.float32).max)
+
+
+def safe_divide(numerator, denominator):
+    """Vectorized a / b that yields 0 wherever b is not positive (or NaN)."""
+    num = np.asarray(numerator, dtype='float64')
+    den = np.asarray(denominator, dtype='float64')
+    out = np.zeros(np.broadcast(num, den).shape, dtype='float64')
+    np.divide(num, den, out=out, where=den > 0)
+    return out
+
+
+def derive(values, reference_year):
+    """
+    Derived features from numeric inputs. values maps each of
+    NUMERIC_INPUTS to an array or a scalar; results have the same shape.
+    """
+    # A huge count over a tiny one could leave the float32 range inputs are held to
+    views_per_upload = safe_divide(values['video views'], values['uploads'])
+    return {
+        'views_per_upload': np.clip(views_per_upload, -MAX_INPUT_MAGNITUDE, MAX_INPUT_MAGNITUDE),
+        'channel_age_years': reference_year - np.asarray(values['created_year'], dtype='float64'),
+    }
+
+
+def parse_number(col, raw):
+    """
+    The validation rule for one raw numeric input, shared by every
+    prediction path: returns it as a float, NaN if missing (None or NaN,
+    in any spelling). Raises ValueError if it is not a number, or not
+    finite with magnitude at most MAX_INPUT_MAGNITUDE.
+    """
+    if raw is None:
+        return math.nan
+    if isinstance(raw, np.generic):
+        # Frame values, reported like the same value in a dict
+        raw = raw.item()
+    try:
+        value = float(raw)
+    except OverflowError:
+        value = math.inf
+    except (TypeError, ValueError):
+        raise ValueError(f"'{col}' must be a number, got {raw!r}")
+    if abs(value) > MAX_INPUT_MAGNITUDE:
+        raise ValueError(f"'{col}' must be finite and at most {MAX_INPUT_MAGNITUDE:.4g} in magnitude, "
+                         f"got {raw!r}")
+    return value
+
+
+def parse_numeric(X, col):
+    """
+    (values, errors) for column col of a raw frame, by parse_number:
+    float64 values (NaN for missing and invalid entries) and {row
+    position: message} for the invalid ones. Missing columns are all-missing.
+    """
+    if col not in X.columns:
+        return np.full(len(X), np.nan), {}
+    raw = X[col]
+    try:
+        values = pd.to_numeric(raw, errors='coerce').to_numpy(dtype='float64', copy=True)
+        # Plain numbers parse vectorized; anything else gets the scalar rule
+        odd = np.flatnonzero((np.isnan(values) & raw.notna().to_numpy()) | (np.abs(values) > MAX_INPUT_MAGNITUDE))
+    except (OverflowError, TypeError):
+        # e.g. an integer beyond float range
+        values = np.full(len(X), np.nan)
+        odd = np.arange(len(X))
+    errors = {}
+    for pos in odd:
+        try:
+            values[pos] = parse_number(col, raw.iloc[pos])
+        except ValueError as e:
+            values[pos] = np.nan
+            errors[int(pos)] = str(e)
+    return values, errors
+
+
+def check_numeric(col, values):
+    """Raises parse_number's ValueError for the first entry of a float array it would reject."""
+    bad = np.flatnonzero(~(np.abs(values) <= MAX_INPUT_MAGNITUDE))
+    if len(bad):
+        parse_number(col, values[bad[0]])
+
+
+def analysis_ratios(df):
+    """
+    {name: array} of ANALYSIS_RATIOS for a cleaned dataset frame, 0 where
+    a column is missing or a value is NaN.
+    """
+    ratios = {}
+    for name, num_col, den_col in ANALYSIS_RATIOS:
+        if num_col in df.columns and den_col in df.columns:
+            ratios[name] = np.nan_to_num(safe_divide(df[num_col].to_numpy(), df[den_col].to_numpy()), nan=0.0)
+        else:
+            ratios[name] = np.zeros(len(df))
+    return ratios
+
+
+def coerce_numeric_inputs(input_data, defaults):
+    """
+    Numeric inputs of one raw row as floats, by parse_number: missing
+    values take the default, invalid ones raise ValueError.
+    """
+    values = {}
+    for col in NUMERIC_INPUTS:
+        value = parse_number(col, input_data.get(col))
+        values[col] = defaults[col] if math.isnan(value) else value
+    return values
+
+
+def input_frame(records):
+    """
+    Raw input frame of a list of dicts. If a value does not fit pandas'
+    numeric types (an integer beyond float range) the columns are kept as
+    objects, so parse_number rejects just that row.
+    """
+    try:
+        return pd.DataFrame.from_records(records)
+    except OverflowError:
+        return pd.DataFrame(records, dtype=object)
+
+
+def input_errors(X):
+    """{row position: message} for rows of a raw input frame with an invalid numeric input (see parse_number)."""
+    errors = {}
+    for col in NUMERIC_INPUTS:
+        for pos, message in parse_numeric(X, col)[1].items():
+            errors.setdefault(pos, message)
+    return dict(sorted(errors.items()))
+
+
+class ChannelFeatures(TransformerMixin, BaseEstimator):
+    """
+    Raw channel rows -> FEATURE_COLUMNS frame (see module docstring).
+
+    Fitted state: medians_ of each numeric input (fill values for missing
+    or invalid inputs), vocabularies_ (value counts of each
+    categorical seen in fit) and year_, the year channel ages are counted
+    to: reference_year, or the year fit ran. Missing input columns are
+    treated as all-missing.
+    """
+
+    def __init__(self, reference_year=None):
+        self.reference_year = reference_year
+
+    def fit(self, X, y=None):
+        self.medians_ = {}
+        for col in NUMERIC_INPUTS:
+            values = self._numeric(X, col)
+            values = values[~np.isnan(values)]
+            self.medians_[col] = float(np.median(values)) if len(values) else 0.0
+        self.vocabularies_ = {
+            col: {str(k): int(v) for k, v in self._categorical(X, col).value_counts().items()}
+            for col in CATEGORICAL_FEATURES
+        }
+        self.year_ = self.reference_year or datetime.datetime.now().year
+        return self
+
+    @staticmethod
+    def _numeric(X, col):
+        # Invalid entries are treated as missing here; prediction paths reject them first
+        return parse_numeric(X, col)[0]
+
+    @staticmethod
+    def _categorical(X, col):
+        if col not in X.columns:
+            return pd.Series("Unknown", index=X.index)
+        return X[col].astype(object).where(X[col].notna(), "Unknown").astype(str)
+
+    def transform(self, X):
+        check_is_fitted(self, 'medians_')
+        numeric = {}
+        for col in NUMERIC_INPUTS:
+            values = self._numeric(X, col)
+            numeric[col] = np.where(np.isnan(values), self.medians_[col], values)
+        numeric.update(derive(numeric, self.year_))
+
+        out = {col: self._categorical(X, col).to_numpy() for col in CATEGORICAL_FEATURES}
+        out.update({col: numeric[col] for col in NUMERIC_FEATURES})
+        return pd.DataFrame(out, index=X.index, columns=FEATURE_COLUMNS)
+
+    def transform_one(self, input_data):
+        """
+        transform() for a single input dict without pandas: {feature:
+        value}. Raises ValueError for invalid numeric inputs (see
+        parse_number), which transform() would fill instead.
+        """
+        check_is_fitted(self, 'medians_')
+        numeric = coerce_numeric_inputs(input_data, self.medians_)
+        numeric.update(derive(numeric, self.year_))
+        row = {}
+        for col in CATEGORICAL_FEATURES:
+            raw = input_data.get(col)
+            missing = raw is None or (isinstance(raw, float) and math.isnan(raw))
+            row[col] = "Unknown" if missing else str(raw)
+        for col in NUMERIC_FEATURES:
+            row[col] = float(numeric[col])
+        return row
+
+    def get_feature_names_out(self, input_features=None):
+        return np.asarray(FEATURE_COLUMNS, dtype=object)
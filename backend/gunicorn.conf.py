@@ -0,0 +1,24 @@
+"""gunicorn settings for `gunicorn wsgi:app`, run from backend/. Sizes come from the SERVER_* variables in config.py (imported as app_config: gunicorn reserves `config`)."""
+import multiprocessing
+
+import config as app_config
+
+bind = app_config.SERVER_BIND
+workers = app_config.SERVER_WORKERS or multiprocessing.cpu_count()
+worker_class = 'gthread'
+# The app runs SERVER_THREADS requests at a time and parks up to
+# SERVER_QUEUE_SIZE more (backpressure.ConcurrencyLimiter); one spare
+# thread answers anything beyond that with 429 straight away.
+threads = app_config.SERVER_THREADS + app_config.SERVER_QUEUE_SIZE + 1
+# Import the app in the master so the model is loaded once, before fork
+preload_app = True
+
+
+def when_ready(server):
+    import wsgi
+    wsgi.load_model()
+
+
+def post_fork(server, worker):
+    import wsgi
+    wsgi.start_worker()
@@ -0,0 +1,236 @@
+"""
+Incremental updates: append new channel rows to the dataset and grow the
+model on them instead of retraining on everything.
+"""
+import copy
+import os
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.metrics import mean_squared_error, r2_score
+from sklearn.model_selection import train_test_split
+
+from analyst import YouTubeAnalyst, base_regressor
+from data_cache import DEFAULT_CACHE_DIR, dataset_hash
+import config
+import data_cache
+import ingest
+import model_store
+
+# Fewer new rows than this are all used for training, with no new holdout
+MIN_SPLIT_ROWS = 5
+# Appended rows must carry the earnings the target is built from
+TARGET_COLUMNS = ['lowest_yearly_earnings', 'highest_yearly_earnings']
+
+
+def _raw_frame(new_rows):
+    """
+    Raw rows as a DataFrame with numeric columns parsed (unparseable ->
+    missing). Absent columns are added as missing, like empty CSV cells.
+    """
+    if isinstance(new_rows, pd.DataFrame):
+        df = new_rows.reset_index(drop=True).copy()
+    else:
+        df = pd.DataFrame.from_records(new_rows)
+    missing = [col for col in TARGET_COLUMNS if col not in df.columns]
+    if missing:
+        raise ValueError(f"New rows need {missing} to train on")
+    for col in ingest.NUMERIC_COLUMNS:
+        df[col] = pd.to_numeric(df[col], errors='coerce') if col in df.columns else np.nan
+    for col in ingest.TEXT_COLUMNS + ingest.CATEGORICAL_COLUMNS:
+        if col not in df.columns:
+            df[col] = pd.Series([None] * len(df), dtype=object)
+    return df
+
+
+def _xy(df):
+    analyst = YouTubeAnalyst()
+    analyst.df = df
+    X, y, categorical_features, numeric_features = analyst._training_data()
+    return X, y, categorical_features, numeric_features
+
+
+def append_rows(dataset_path, raw):
+    """
+    Appends raw rows to the dataset CSV in the file's column order and
+    encoding. Columns the file does not have are dropped; missing ones are
+    left empty, as in the original export.
+    """
+    encoding = ingest.detect_encoding(dataset_path)
+    header = pd.read_csv(dataset_path, nrows=0, encoding=encoding).columns
+    with open(dataset_path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        needs_newline = f.tell() > 0
+        if needs_newline:
+            f.seek(-1, os.SEEK_END)
+            needs_newline = f.read(1) not in (b'\n', b'\r')
+    with open(dataset_path, 'a', encoding=encoding, errors='replace', newline='') as f:
+        if needs_newline:
+            f.write('\n')
+        raw.reindex(columns=header).to_csv(f, header=False, index=False)
+
+
+def update(analyst, dataset_path, new_rows, cache_dir=DEFAULT_CACHE_DIR, added=None, compare=False):
+    """
+    Appends new_rows (list of dicts or DataFrame of raw channel rows) to
+    the dataset and grows the model on them. Returns (grown analyst,
+    new dataset hash, report); analyst itself is not modified.
+
+    Only the new rows are parsed, cleaned and fitted. Their missing values
+    are filled from running medians over all rows (CleaningStats, stored
+    with the model; built with one pass over the file the first time) and
+    the model gains warm-started estimators fitted on their training
+    split. Existing rows keep the cleaning they had when ingested. The
+    grown model is scored on the rows analyst held out plus the new rows'
+    holdout, and records them as its holdout_rows.
+    compare=True also times a full retrain (reading the whole file, fitting
+    from scratch on the same rows) and scores it on the same holdout.
+    """
+    start = time.perf_counter()
+    report = {"previous_version": analyst.version}
+    chunksize = model_store.default_chunksize(dataset_path)
+
+    # Cleaned existing rows, normally memory-mapped from the columnar cache
+    existing = model_store.prepared_analyst(dataset_path, dataset_hash(dataset_path), chunksize, cache_dir)
+    cache_columns = list(existing.df.columns)
+
+    stats = copy.deepcopy(analyst.cleaning_stats)
+    if stats is None:
+        t = time.perf_counter()
+        stats = ingest.scan_stats(dataset_path)
+        report["stats_bootstrap_seconds"] = round(time.perf_counter() - t, 3)
+    known = {col: set(stats.vocabulary(col)) for col in ingest.CATEGORICAL_COLUMNS}
+    raw = _raw_frame(new_rows)
+    stats.update(raw)
+
+    new = YouTubeAnalyst()
+    new.df = raw.copy()
+    new._clean_data(medians=stats.fill_values())
+    if len(new.df) == 0:
+        raise ValueError("None of the new rows are usable (video views > 0, created_year >= 2005)")
+
+    # The rows the model held out so far (train_models' split plus each
+    # earlier batch's), so they stay unseen
+    X_old, y_old, _, _ = _xy(existing.df)
+    X_old_train, X_old_test, y_old_train, y_old_test = analyst.holdout_split(X_old, y_old)
+    if len(new.df) >= MIN_SPLIT_ROWS:
+        new_train, new_test = train_test_split(new.df, test_size=0.2, random_state=42)
+    else:
+        new_train, new_test = new.df, new.df.iloc[:0]
+    X_new_test, y_new_test, _, _ = _xy(new_test.copy())
+    X_test = pd.concat([X_old_test, X_new_test])
+    y_test = pd.concat([y_old_test, y_new_test])
+
+    grown = analyst.grow_models(new_train.copy(), X_test, y_test, added=added, trained_rows=len(X_old_train))
+    grown.cleaning_stats = stats
+    # The new rows follow the existing ones in the dataset (and the cache below)
+    grown.holdout_rows = np.concatenate([X_old.index.get_indexer(X_old_test.index),
+                                         len(existing.df) + new_test.index.to_numpy()])
+
+    # Persist the data: raw rows to the CSV, cleaned rows to the cache
+    append_rows(dataset_path, raw)
+    data_hash = dataset_hash(dataset_path)
+    combined = pd.concat([existing.df[cache_columns], new.df.reindex(columns=cache_columns)], ignore_index=True)
+    data_cache.save_frame(combined, cache_dir, existing._cache_key(dataset_path, chunksize, data_hash))
+
+    last = grown.incremental["updates"][-1]
+    report.update({
+        "version": grown.version,
+        "rows_appended": len(raw),
+        "rows_used": len(new.df),
+        "train_rows": len(new_train),
+        "test_rows": len(y_test),
+        "new_categories": {col: sorted(set(stats.vocabulary(col)) - values)
+                           for col, values in known.items() if set(stats.vocabulary(col)) - values},
+        "added_estimators": last["added"],
+        "total_estimators": grown.model.get_params()[grown.incremental["param"]],
+        "fit_seconds": last["fit_seconds"],
+        "r2_before": float(r2_score(y_test, analyst.pipeline.predict(X_test))),
+        "r2": grown.metrics.r2,
+        "rmse": grown.metrics.rmse,
+        "seconds": round(time.perf_counter() - start, 3),
+    })
+
+    if compare:
+        X_new_train, y_new_train, categorical_features, numeric_features = _xy(new_train.copy())
+        report["full_retrain"] = full_retrain(
+            analyst, dataset_path, chunksize,
+            pd.concat([X_old_train, X_new_train]), pd.concat([y_old_train, y_new_train]),
+            X_test, y_test, categorical_features, numeric_features)
+    return grown, data_hash, report
+
+
+def regressed(report):
+    """True if the grown model scores worse than the one it was grown from (see config.MAX_INCREMENTAL_R2_DROP)."""
+    return not report["r2"] >= report["r2_before"] - config.MAX_INCREMENTAL_R2_DROP
+
+
+def full_retrain(analyst, dataset_path, chunksize, X_train, y_train, X_test, y_test,
+                 categorical_features, numeric_features):
+    """Times reading the whole dataset and fitting the base model from scratch; scores it on X_test."""
+    start = time.perf_counter()
+    YouTubeAnalyst().load_and_prep_data(dataset_path, chunksize=chunksize)
+    ingest_seconds = time.perf_counter() - start
+
+    regressor = base_regressor(analyst.model, analyst.incremental)
+    pipeline = YouTubeAnalyst.build_pipeline(regressor, categorical_features, numeric_features)
+    fit_start = time.perf_counter()
+    pipeline.fit(X_train, y_train)
+    fit_seconds = time.perf_counter() - fit_start
+
+    y_pred = pipeline.predict(X_test)
+    return {
+        "train_rows": len(X_train),
+        "ingest_seconds": round(ingest_seconds, 3),
+        "fit_seconds": round(fit_seconds, 3),
+        "seconds": round(time.perf_counter() - start, 3),
+        "r2": float(r2_score(y_test, y_pred)),
+        "rmse": float(np.sqrt(mean_squared_error(y_test, y_pred))),
+    }
+
+
+def format_report(report):
+    lines = [
+        f"Appended {report['rows_appended']} rows ({report['rows_used']} usable, "
+        f"{report['train_rows']} trained on), {report['test_rows']} holdout rows",
+        f"Grew model {report['previous_version']} -> {report['version']}: "
+        f"+{report['added_estimators']} estimators ({report['total_estimators']} total)",
+    ]
+    if report.get("stats_bootstrap_seconds") is not None:
+        lines.append(f"Built running medians/vocabularies from the dataset in {report['stats_bootstrap_seconds']}s")
+    if report["new_categories"]:
+        lines.append(f"New categories (encoded as unknown until a full retrain): {report['new_categories']}")
+    lines.append(f"{'':<22} {'R2':>8} {'RMSE':>14} {'fit s':>8} {'total s':>8}")
+    lines.append(f"{'before update':<22} {report['r2_before']:>8.4f}")
+    lines.append(f"{'incremental':<22} {report['r2']:>8.4f} {report['rmse']:>14,.0f} "
+                 f"{report['fit_seconds']:>8.2f} {report['seconds']:>8.2f}")
+    full = report.get("full_retrain")
+    if full:
+        lines.append(f"{'full retrain':<22} {full['r2']:>8.4f} {full['rmse']:>14,.0f} "
+                     f"{full['fit_seconds']:>8.2f} {full['seconds']:>8.2f}")
+        lines.append(f"Incremental update was {full['seconds'] / report['seconds']:.1f}x faster end to end, "
+                     f"R2 {report['r2'] - full['r2']:+.4f} vs full retrain")
+    if report.get("saved") is False:
+        lines.append("Grown model scored below the model it was grown from and was not saved; "
+                     "the rows stay appended and the next training run uses them")
+    return "\n".join(lines)
+
+
+def append_and_save(dataset_path, new_rows, model_path=model_store.DEFAULT_MODEL_PATH,
+                    cache_dir=DEFAULT_CACHE_DIR, added=None, compare=False):
+    """
+    Grows the saved model (training one first if needed) on new rows and
+    saves it unless it regressed (report["saved"]); returns the report.
+    """
+    analyst, artifact = model_store.load_fresh(model_path, dataset_hash(dataset_path))
+    if analyst is None:
+        print("Model artifact missing or stale, retraining...")
+        analyst = model_store.train_and_save(dataset_path, model_path, cache_dir=cache_dir,
+                                             regressor=model_store.promoted_regressor(artifact))
+    grown, data_hash, report = update(analyst, dataset_path, new_rows, cache_dir, added, compare)
+    report["saved"] = not regressed(report)
+    if report["saved"]:
+        grown.compute_importances(grown.X_test, grown.y_test)
+        model_store.save_artifact(grown, model_path, data_hash)
+    return report
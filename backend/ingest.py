@@ -0,0 +1,205 @@
+import codecs
+
+import numpy as np
+import pandas as pd
+
+# Only the columns cleaning, feature engineering, training and the
+# dashboard actually use; everything else in the export is skipped.
+CATEGORICAL_COLUMNS = ['category', 'Country', 'channel_type']
+TEXT_COLUMNS = ['Youtuber']
+NUMERIC_COLUMNS = [
+    'subscribers', 'video views', 'uploads',
+    'video_views_for_the_last_30_days', 'subscribers_for_last_30_days',
+    'lowest_monthly_earnings', 'highest_monthly_earnings',
+    'lowest_yearly_earnings', 'highest_yearly_earnings',
+    'created_year',
+]
+# Parsed as float64 so missing values survive; cast after cleaning
+INTEGER_COLUMNS = ['video views', 'uploads', 'subscribers']
+
+DEFAULT_CHUNKSIZE = 100000
+ENCODING_SAMPLE_BYTES = 1 << 20
+
+
+def detect_encoding(filepath, sample_bytes=ENCODING_SAMPLE_BYTES):
+    """Returns 'utf-8' if the head of the file decodes as UTF-8, else 'latin-1'."""
+    with open(filepath, 'rb') as f:
+        sample = f.read(sample_bytes)
+    # Incremental decode so a multi-byte character cut at the end is not an error
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    try:
+        decoder.decode(sample, final=len(sample) < sample_bytes)
+        return 'utf-8'
+    except UnicodeDecodeError:
+        return 'latin-1'
+
+
+def read_with_fallback(read, encoding):
+    """
+    read(encoding), retried from the start as latin-1 if the file turns
+    out not to be valid in `encoding` past the sample detect_encoding
+    looked at. latin-1 decodes any byte, so the retry cannot fail on
+    encoding.
+    """
+    try:
+        return read(encoding)
+    except UnicodeDecodeError:
+        if encoding == 'latin-1':
+            raise
+        return read('latin-1')
+
+
+class StreamingMedian:
+    """
+    Median of a stream via a fixed-size uniform reservoir sample.
+
+    Memory is bounded by capacity; the result is exact while fewer than
+    capacity non-missing values have been seen, and an unbiased estimate
+    after that.
+    """
+
+    def __init__(self, capacity=200000, seed=0):
+        self.capacity = capacity
+        # Grows up to capacity, so small streams stay small when pickled
+        self.sample = np.empty(0, dtype='float64')
+        self.seen = 0
+        self._rng = np.random.default_rng(seed)
+
+    def update(self, values):
+        values = np.asarray(values, dtype='float64')
+        values = values[~np.isnan(values)]
+        # Fill the reservoir first
+        free = min(self.capacity - min(self.seen, self.capacity), len(values))
+        if free:
+            self.sample = np.concatenate([self.sample, values[:free]])
+        rest = values[free:]
+        if len(rest):
+            # Algorithm R, vectorized: item t replaces slot j ~ U[0, t]
+            t = np.arange(self.seen + free, self.seen + free + len(rest))
+            j = (self._rng.random(len(rest)) * (t + 1)).astype('int64')
+            keep = j < self.capacity
+            self.sample[j[keep]] = rest[keep]
+        self.seen += len(values)
+
+    def median(self):
+        if len(self.sample) == 0:
+            return np.nan
+        return float(np.median(self.sample))
+
+
+class CleaningStats:
+    """
+    Running statistics of the raw data that cleaning depends on: the
+    median of each numeric column (to fill missing values) and the value
+    counts of each categorical column. Updated chunk by chunk, so appended
+    rows can be folded in without rereading the dataset.
+    """
+
+    def __init__(self):
+        self.rows = 0
+        self.medians = {}  # column -> StreamingMedian
+        self.vocabularies = {}  # column -> {value: count}
+
+    def update(self, chunk):
+        self.rows += len(chunk)
+        for col in NUMERIC_COLUMNS:
+            if col in chunk.columns:
+                values = pd.to_numeric(chunk[col], errors='coerce').to_numpy()
+                self.medians.setdefault(col, StreamingMedian()).update(values)
+        for col in CATEGORICAL_COLUMNS:
+            if col in chunk.columns:
+                counts = self.vocabularies.setdefault(col, {})
+                for value, count in chunk[col].fillna("Unknown").astype(str).value_counts().items():
+                    counts[value] = counts.get(value, 0) + int(count)
+
+    def fill_values(self):
+        """{column: median} for filling missing numeric values."""
+        return {col: sketch.median() for col, sketch in self.medians.items()}
+
+    def vocabulary(self, col):
+        return sorted(self.vocabularies.get(col, {}))
+
+
+def scan_stats(filepath, chunksize=DEFAULT_CHUNKSIZE, encoding=None):
+    """CleaningStats for a whole file, read in chunks without keeping the rows."""
+    def scan(encoding):
+        stats = CleaningStats()
+        for chunk in _read_chunks(filepath, chunksize, encoding):
+            stats.update(chunk)
+        return stats
+
+    return read_with_fallback(scan, encoding or detect_encoding(filepath))
+
+
+def _read_chunks(filepath, chunksize, encoding):
+    header = pd.read_csv(filepath, nrows=0, encoding=encoding).columns
+    usecols = [c for c in TEXT_COLUMNS + CATEGORICAL_COLUMNS + NUMERIC_COLUMNS if c in header]
+    dtypes = {c: 'float64' for c in NUMERIC_COLUMNS if c in header}
+    dtypes.update({c: 'object' for c in TEXT_COLUMNS + CATEGORICAL_COLUMNS if c in header})
+    return pd.read_csv(
+        filepath, usecols=usecols, dtype=dtypes, chunksize=chunksize,
+        encoding=encoding,
+    )
+
+
+def read_clean_streaming(filepath, chunksize=DEFAULT_CHUNKSIZE, encoding=None, progress=None):
+    """
+    Reads and cleans the dataset chunk by chunk.
+
+    Produces the same rows and values as YouTubeAnalyst._clean_data on the
+    used columns, with categoricals dictionary-encoded. Medians (taken over
+    all rows, before filtering, as _clean_data does) come from
+    CleaningStats. Rows are filtered per chunk; rows whose filter column
+    is missing are kept until the median that fills them is known.
+    progress: optional callback(phase, rows_processed) called per chunk.
+    A file that is not valid in the detected encoding is reread as latin-1
+    (see read_with_fallback) rather than having characters replaced.
+    """
+    return read_with_fallback(
+        lambda encoding: _read_clean_streaming(filepath, chunksize, encoding, progress),
+        encoding or detect_encoding(filepath))
+
+
+def _read_clean_streaming(filepath, chunksize, encoding, progress):
+    stats = CleaningStats()
+    parts = []
+    for chunk in _read_chunks(filepath, chunksize, encoding):
+        stats.update(chunk)
+        if progress is not None:
+            progress("reading data", stats.rows)
+
+        keep = np.ones(len(chunk), dtype=bool)
+        if 'video views' in chunk.columns:
+            views = chunk['video views']
+            keep &= (views > 0).to_numpy() | views.isna().to_numpy()
+        if 'created_year' in chunk.columns:
+            year = chunk['created_year']
+            keep &= (year >= 2005).to_numpy() | year.isna().to_numpy()
+        chunk = chunk[keep]
+
+        for col in CATEGORICAL_COLUMNS:
+            if col in chunk.columns:
+                chunk[col] = chunk[col].fillna("Unknown").astype('category')
+        for col in TEXT_COLUMNS:
+            if col in chunk.columns:
+                chunk[col] = chunk[col].fillna("Unknown")
+        parts.append(chunk)
+
+    df = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame()
+    # Categories differ per chunk; concat falls back to object, re-encode once
+    for col in CATEGORICAL_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype(str).astype('category')
+
+    for col, median in stats.fill_values().items():
+        df[col] = df[col].fillna(median)
+    for col in INTEGER_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].fillna(0).astype('int64')
+
+    # Re-apply the filters now that missing values are filled
+    if 'video views' in df.columns:
+        df = df[df['video views'] > 0]
+    if 'created_year' in df.columns:
+        df = df[df['created_year'] >= 2005]
+    return df.reset_index(drop=True)
@@ -0,0 +1,143 @@
+"""
+Prediction intervals without extra model fits.
+
+Split conformal calibration on the held-out rows: each gets a score
+|actual - predicted| / scale, and the interval at level L is
+predicted +- q_L * scale, where q_L is the matching quantile of the
+scores, so on data like the holdout about a fraction L of actual values
+falls inside. For forests the scale is the spread (standard deviation) of
+the per-tree predictions, computed in the same pass as the trees' leaves,
+plus a floor so rows all trees agree on still get a usable width; other
+models get constant-width intervals (scale 1).
+"""
+import math
+
+import numpy as np
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.pipeline import Pipeline
+
+from compact_model import CompactForest
+
+# Held-out rows scored for calibration; larger holdouts are subsampled
+CALIBRATION_MAX_ROWS = 5000
+# Scale floor, as a fraction of the median per-tree spread on the holdout
+SPREAD_FLOOR = 0.1
+
+
+def has_tree_outputs(regressor):
+    """True if per-tree predictions are available for the regressor."""
+    if isinstance(regressor, CompactForest):
+        return True
+    return isinstance(regressor, RandomForestRegressor) and regressor.n_outputs_ == 1
+
+
+def tree_predictions(regressor, Xt):
+    """
+    (n_rows, n_trees) matrix of each tree's prediction for a transformed
+    feature matrix: one apply() for the leaves of all trees, then one
+    gather from the trees' concatenated leaf values.
+    """
+    if isinstance(regressor, CompactForest):
+        return regressor.predict_trees(Xt)
+    trees = [est.tree_ for est in regressor.estimators_]
+    offsets = np.cumsum([0] + [tree.node_count for tree in trees[:-1]])
+    values = np.concatenate([tree.value[:, 0, 0] for tree in trees])
+    return values[regressor.apply(Xt) + offsets]
+
+
+def forest_mean(trees):
+    """
+    Forest predictions from tree_predictions' matrix, summed tree by tree
+    like RandomForestRegressor.predict, so they match it bit for bit.
+    """
+    trees = np.atleast_2d(trees)
+    total = np.zeros(trees.shape[0], dtype=np.float64)
+    for t in range(trees.shape[1]):
+        total += trees[:, t]
+    total /= trees.shape[1]
+    return total
+
+
+def calibrate(pipeline, X, y, y_pred):
+    """
+    Calibration for predict() and from_trees(), from held-out raw inputs
+    X, actual values y and the pipeline's predictions y_pred for them.
+    Stored with the model; None without held-out rows.
+    """
+    y = np.asarray(y, dtype=np.float64)
+    y_pred = np.asarray(y_pred, dtype=np.float64)
+    if len(y) > CALIBRATION_MAX_ROWS:
+        rows = np.random.RandomState(42).choice(len(y), CALIBRATION_MAX_ROWS, replace=False)
+        X, y, y_pred = X.iloc[rows], y[rows], y_pred[rows]
+    if not len(y):
+        return None
+
+    regressor = pipeline.steps[-1][1]
+    if has_tree_outputs(regressor):
+        Xt = Pipeline(pipeline.steps[:-1]).transform(X)
+        spread = tree_predictions(regressor, Xt).std(axis=1)
+        floor = SPREAD_FLOOR * float(np.median(spread))
+        # Every row having identical trees leaves nothing to scale by
+        method = "tree_spread" if floor > 0 else "residual"
+    else:
+        method = "residual"
+    if method == "residual":
+        spread, floor = np.zeros(len(y)), 1.0
+    scores = np.abs(y - y_pred) / (spread + floor)
+    return {"method": method, "floor": floor, "scores": np.sort(scores)}
+
+
+def score_quantile(calibration, level):
+    """
+    Conformal quantile of the calibration scores for coverage `level`,
+    with the finite-sample correction; the largest score when the
+    calibration set is too small for that level.
+    """
+    scores = calibration["scores"]
+    rank = math.ceil((len(scores) + 1) * level)
+    return scores[min(rank, len(scores)) - 1]
+
+
+def bounds(calibration, predictions, scale, level):
+    """
+    (lower, upper) arrays for the predictions at coverage `level`.
+    Earnings are never negative, so both bounds are clipped at 0.
+    """
+    half_width = score_quantile(calibration, level) * np.asarray(scale)
+    predictions = np.asarray(predictions, dtype=np.float64)
+    return np.maximum(predictions - half_width, 0.0), np.maximum(predictions + half_width, 0.0)
+
+
+def predict(calibration, regressor, Xt, level):
+    """
+    (predictions, lower, upper) for a transformed feature matrix. Forests
+    are evaluated once: the per-tree matrix gives both the predictions
+    (identical to regressor.predict) and the spread.
+    """
+    if calibration["method"] == "residual":
+        predictions = regressor.predict(Xt)
+        lower, upper = bounds(calibration, predictions, 1.0, level)
+        return predictions, lower, upper
+    return from_trees(calibration, tree_predictions(regressor, Xt), level)
+
+
+def from_trees(calibration, trees, level):
+    """(predictions, lower, upper) from a (n_rows, n_trees) matrix of per-tree predictions."""
+    predictions = forest_mean(trees)
+    if calibration["method"] == "residual":
+        scale = 1.0
+    else:
+        scale = np.asarray(trees).std(axis=1) + calibration["floor"]
+    lower, upper = bounds(calibration, predictions, scale, level)
+    return predictions, lower, upper
+
+
+def check_level(level):
+    """Validates a requested interval level; returns it as a float."""
+    try:
+        level = float(level)
+    except (TypeError, ValueError):
+        raise ValueError(f"interval must be a number between 0 and 1, got {level!r}")
+    if not 0 < level < 1:
+        raise ValueError(f"interval must be between 0 and 1 (exclusive), got {level}")
+    return level
@@ -0,0 +1,117 @@
+"""
+Minimal in-process metrics with Prometheus text exposition.
+
+Histograms are cumulative since process start, keyed by label values,
+and safe to update from request threads.
+"""
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+# Seconds; spans sub-millisecond predictions to multi-minute training
+DEFAULT_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0,
+)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, extra=None):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Histogram:
+    def __init__(self, name, help_text, label_names=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        self._series = {}  # label values -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * (len(self.buckets) + 2)
+            if index < len(self.buckets):
+                series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def snapshot(self):
+        """{label values: (cumulative bucket counts, sum, count)}"""
+        with self._lock:
+            items = [(k, list(v)) for k, v in self._series.items()]
+        result = {}
+        for labels, series in items:
+            cumulative, running = [], 0
+            for count in series[:len(self.buckets)]:
+                running += count
+                cumulative.append(running)
+            result[labels] = (cumulative, series[-2], series[-1])
+        return result
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for labels, (cumulative, total, count) in sorted(self.snapshot().items()):
+            for bound, running in zip(self.buckets, cumulative):
+                le = 'le="%s"' % bound
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, labels, le)} {running}")
+            le = 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{_format_labels(self.label_names, labels, le)} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(self.label_names, labels)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(self.label_names, labels)} {count}")
+        return "\n".join(lines)
+
+
+def render_gauges(name, help_text, samples, metric_type="gauge"):
+    """samples: list of (labels dict, value)."""
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {metric_type}"]
+    for labels, value in samples:
+        lines.append(f"{name}{_format_labels(labels.keys(), labels.values())} {value}")
+    return "\n".join(lines)
+
+
+STAGE_SECONDS = Histogram(
+    'youtube_analyst_stage_duration_seconds',
+    'Time spent in each YouTubeAnalyst pipeline stage.',
+    ('stage',),
+)
+REQUEST_SECONDS = Histogram(
+    'http_request_duration_seconds',
+    'HTTP request latency by endpoint.',
+    ('method', 'endpoint', 'status'),
+)
+QUEUE_SECONDS = Histogram(
+    'http_request_queue_seconds',
+    'Time requests waited for a free slot before running (backpressure queue).',
+)
+
+PREDICT_BATCH_SIZE = Histogram(
+    'predict_batch_size',
+    'Requests scored together per /api/predict micro-batch.',
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256),
+)
+PREDICT_BATCH_WAIT_SECONDS = Histogram(
+    'predict_batch_wait_seconds',
+    'Time /api/predict requests waited to be picked up by a micro-batch.',
+)
+
+
+@contextmanager
+def timed(stage):
+    """Records the duration of the enclosed block under STAGE_SECONDS{stage}."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - start, stage)
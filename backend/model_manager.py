@@ -0,0 +1,399 @@
+import datetime
+import os
+import threading
+import time
+
+import numpy as np
+from sklearn.metrics import r2_score
+from sklearn.ensemble import RandomForestRegressor
+
+from analyst import ModelMetrics, YouTubeAnalyst
+from compact_model import CompactForest
+from data_cache import DEFAULT_CACHE_DIR, dataset_hash
+import analytics
+import compact_model
+import config
+import incremental
+import intervals
+import model_store
+import neighbors
+
+
+class ModelManager:
+    """
+    Owns the analyst that serves requests and replaces it atomically.
+
+    New models are loaded or trained and validated on a background thread;
+    only a model that passes validation is published, with a single
+    reference assignment. Request handlers should read `current` once and
+    use that object for the whole request, so in-flight requests finish on
+    the model they started with.
+    """
+
+    def __init__(self, dataset_path, model_path, on_swap=None, export_dir=None):
+        self.dataset_path = dataset_path
+        self.model_path = model_path
+        self.export_dir = export_dir or config.COMPACT_EXPORT_DIR or compact_model.DEFAULT_EXPORT_DIR
+        self.on_swap = on_swap
+        self.current = None
+        # Aggregates over the dataset (analytics.Rollups), independent of the model
+        self.analytics = None
+        # Similar-channel KD-trees over the dataset (neighbors.ChannelIndex)
+        self.neighbors = None
+        self.last_reload = None
+        self._progress = {"phase": "idle", "rows_processed": None, "started": None}
+        self._reload_lock = threading.Lock()
+        self._watcher = None
+        self._watched = None
+        self._importance_thread = None
+        # Whether reloading a saved model that lacks permutation importances
+        # computes them; off in forked workers, where the process that
+        # produced the model does it
+        self.importances_on_load = True
+
+    @property
+    def ready(self):
+        return self.current is not None
+
+    def _report(self, phase, rows_processed=None):
+        """Progress callback for model_store / analyst; replaces the dict so readers never see a partial update."""
+        started = self._progress["started"]
+        if phase == "starting" or started is None:
+            started = time.perf_counter()
+        if rows_processed is None:
+            rows_processed = self._progress["rows_processed"]
+        self._progress = {"phase": phase, "rows_processed": rows_processed, "started": started}
+
+    @property
+    def progress(self):
+        """Current load phase, seconds since the load began and rows processed so far."""
+        snapshot = self._progress
+        elapsed = None
+        if snapshot["started"] is not None:
+            elapsed = round(time.perf_counter() - snapshot["started"], 3)
+        return {"phase": snapshot["phase"], "elapsed_seconds": elapsed,
+                "rows_processed": snapshot["rows_processed"]}
+
+    def _swap(self, analyst):
+        self.current = analyst
+        if self.on_swap is not None:
+            self.on_swap(analyst)
+
+    def _holdout(self, analyst):
+        """The (X_test, y_test) rows analyst held out, rebuilt from the data cache."""
+        # Same chunksize default (hence cache entry) as training and the analytics
+        data = model_store.prepared_analyst(self.dataset_path, cache_dir=DEFAULT_CACHE_DIR)
+        X, y, _, _ = data._training_data()
+        _, X_test, _, y_test = analyst.holdout_split(X, y)
+        return X_test, y_test
+
+    def validate(self, candidate):
+        """
+        Checks a candidate before it is published: its holdout R2 is
+        recomputed from the data (guards against a corrupt or mismatched
+        artifact) and must reach config.MIN_MODEL_R2, and a probe
+        prediction must be finite. Returns (ok, details).
+        """
+        X_test, y_test = self._holdout(candidate)
+        r2 = float(r2_score(y_test, candidate.pipeline.predict(X_test)))
+        probe = candidate.predict({'subscribers': 1000000, 'video views': 100000000, 'uploads': 100})
+
+        details = {"holdout_r2": r2, "min_r2": config.MIN_MODEL_R2}
+        if not np.isfinite(probe):
+            return False, dict(details, reason="probe prediction is not finite")
+        if not r2 >= config.MIN_MODEL_R2:
+            return False, dict(details, reason="holdout R2 below threshold")
+        return True, details
+
+    def serving_model(self, analyst, artifact):
+        """
+        The analyst to publish for a validated, saved model. With
+        config.COMPACT_SERVING a RandomForest is exported to export_dir
+        (unless that export is already current) and served from the
+        memory-mapped export, so worker processes share its pages; the
+        full forest is then released. Otherwise the analyst itself is
+        served. Training data is dropped either way.
+        A pruned export is scored (and its prediction intervals calibrated)
+        on the holdout again and must still reach config.MIN_MODEL_R2, else
+        the full model is served.
+        """
+        if not (config.COMPACT_SERVING and isinstance(analyst.model, RandomForestRegressor)
+                and analyst.model.n_outputs_ == 1):
+            return analyst.strip_training_data()
+        max_depth = config.COMPACT_MAX_DEPTH or None
+        min_samples_leaf = config.COMPACT_MIN_SAMPLES_LEAF
+        pruned = max_depth is not None or min_samples_leaf > 1
+        self._report("exporting compact model")
+        exported = None
+        if compact_model.is_current(self.export_dir, analyst.version, max_depth, min_samples_leaf):
+            exported = compact_model.load(self.export_dir)
+        if exported is None:
+            manifest = compact_model.export(artifact, self.export_dir, max_depth, min_samples_leaf)
+            print(f"Compact model exported to {self.export_dir}: {manifest}")
+            exported = compact_model.load(self.export_dir)
+        compact = YouTubeAnalyst.from_artifact(exported)
+        # A reused export may predate importances since attached to the artifact
+        compact.importances = analyst.importances
+        if pruned:
+            X_test, y_test = self._holdout(analyst)
+            y_pred = compact.pipeline.predict(X_test)
+            compact.metrics = ModelMetrics.evaluate(compact.version, y_test, y_pred)
+            compact.interval_calibration = intervals.calibrate(compact.pipeline, X_test, y_test, y_pred)
+            if not compact.metrics.r2 >= config.MIN_MODEL_R2:
+                print(f"Pruned compact model R2 {compact.metrics.r2:.4f} below threshold; serving the full model")
+                return analyst.strip_training_data()
+        return compact
+
+    def warm_up(self, candidate, n=None):
+        """Runs synthetic single and batch predictions so first requests do not pay one-off costs."""
+        n = config.WARMUP_PREDICTIONS if n is None else n
+        if n <= 0:
+            return
+        inputs = [{
+            'subscribers': 10 ** (5 + i % 4),
+            'video views': 10 ** (7 + i % 5),
+            'uploads': 50 * (i + 1),
+            'created_year': 2008 + i % 15,
+        } for i in range(n)]
+        for record in inputs:
+            candidate.predict(record)
+        candidate.predict_batch(inputs)
+
+    def reload(self, retrain=False):
+        """
+        Loads the saved artifact (retraining it if stale), or retrains from
+        scratch with retrain=True, validates it and swaps it in. A retrained
+        model is saved only after it passes validation. Runs on the calling
+        thread; concurrent reloads are serialized.
+        """
+        with self._reload_lock:
+            start = time.perf_counter()
+            status = {
+                "started_at": datetime.datetime.now().isoformat(timespec='seconds'),
+                "retrain": retrain,
+                "previous_version": self.current.version if self.current else None,
+            }
+            data_hash = None
+            try:
+                self._report("starting", 0)
+                self._report("hashing dataset")
+                data_hash = dataset_hash(self.dataset_path)
+                self._report("loading artifact")
+                candidate, artifact = model_store.load_fresh(self.model_path, data_hash)
+                trained = retrain or candidate is None
+                if trained:
+                    print("Training candidate model...")
+                    candidate = model_store.train(
+                        self.dataset_path, data_hash, regressor=model_store.promoted_regressor(artifact),
+                        progress=self._report)
+                self._report("validating")
+                ok, details = self.validate(candidate)
+                status.update(details)
+                status["candidate_version"] = candidate.version
+                if ok:
+                    # Only a validated model replaces the saved artifact
+                    if trained:
+                        artifact = model_store.save_artifact(candidate, self.model_path, data_hash)
+                    candidate = self.serving_model(candidate, artifact)
+                    status["serving"] = self.serving_info(candidate)
+                    self._report("warming up")
+                    self.warm_up(candidate)
+                    self._swap(candidate)
+                    if trained or self.importances_on_load:
+                        self.compute_importances_async(candidate)
+                status["swapped"] = ok
+                self._report("ready" if ok else "rejected")
+            except Exception as e:
+                status.update({"swapped": False, "reason": f"{type(e).__name__}: {e}"})
+                self._report("failed")
+            # The dataset may have changed whether or not the model did
+            self.refresh_analytics(data_hash)
+            status["seconds"] = round(time.perf_counter() - start, 3)
+            self.last_reload = status
+            self._watched = self._fingerprint()
+            print(f"Model reload: {status}")
+            return status
+
+    def append(self, new_rows, added=None):
+        """
+        Appends new rows to the dataset and grows the serving model on them
+        (see incremental.update) instead of retraining from scratch. The
+        grown model is validated, saved and swapped in like a reload, and
+        is also rejected if it scores below the model it was grown from
+        (incremental.regressed). The rows stay appended even if it is
+        rejected, so the next reload retrains on them. Returns the update report.
+        A compact serving model cannot be grown, so the full model is
+        loaded from the saved artifact for the update.
+        """
+        with self._reload_lock:
+            current = self.current
+            if current is None:
+                raise RuntimeError("No model is loaded yet")
+            self._report("appending rows", 0)
+            try:
+                if isinstance(current.model, CompactForest):
+                    current, _ = model_store.load_fresh(self.model_path, dataset_hash(self.dataset_path))
+                    if current is None:
+                        raise RuntimeError("Saved model is out of date with the dataset; reload it first")
+                grown, data_hash, report = incremental.update(current, self.dataset_path, new_rows, added=added)
+            except Exception:
+                self._report("ready")
+                raise
+            self._report("validating")
+            ok, details = self.validate(grown)
+            report.update(details)
+            if ok and incremental.regressed(report):
+                # Same holdout as validate's: the rows grown held out
+                ok = False
+                report["reason"] = "holdout R2 below the model it was grown from"
+            if ok:
+                artifact = model_store.save_artifact(grown, self.model_path, data_hash)
+                grown = self.serving_model(grown, artifact)
+                report["serving"] = self.serving_info(grown)
+                self._report("warming up")
+                self.warm_up(grown)
+                self._swap(grown)
+                self.compute_importances_async(grown)
+            report["swapped"] = ok
+            # The rows are appended either way
+            self.refresh_analytics(data_hash, appended=True)
+            self._report("ready" if ok else "rejected")
+            self.last_reload = dict(report, incremental=True)
+            # Our own writes, not an external change for the watcher
+            self._watched = self._fingerprint()
+            print(f"Incremental update: {report}")
+            return report
+
+    def refresh_analytics(self, data_hash=None, appended=False):
+        """
+        Brings the indexes over the dataset up to date, from the cleaned
+        rows in the data cache: the analytics rollups and the similar
+        channel index. With appended=True the rows past those already
+        rolled up were appended since (append() writes the cache that way)
+        and only they are folded into the rollups; otherwise they are
+        rebuilt. The KD-trees are always rebuilt. Failures are logged and
+        leave the previous index serving.
+        """
+        try:
+            data_hash = data_hash or dataset_hash(self.dataset_path)
+            rollups, index = self.analytics, self.neighbors
+            if all(built is not None and built.data_hash == data_hash for built in (rollups, index)):
+                return
+            frame = model_store.prepared_analyst(self.dataset_path, data_hash, cache_dir=DEFAULT_CACHE_DIR).df
+        except Exception as e:
+            print(f"Analytics refresh failed: {type(e).__name__}: {e}")
+            return
+
+        try:
+            if rollups is None or rollups.data_hash != data_hash:
+                if appended and rollups is not None and len(frame) >= rollups.n_rows:
+                    self.analytics = rollups.appended(frame.iloc[rollups.n_rows:], data_hash)
+                else:
+                    self.analytics = analytics.Rollups.build(frame, data_hash)
+                print(f"Analytics {'updated' if appended else 'built'}: {self.analytics.info()}")
+        except Exception as e:
+            print(f"Analytics rollups failed: {type(e).__name__}: {e}")
+        try:
+            if index is None or index.data_hash != data_hash:
+                self.neighbors = neighbors.ChannelIndex.build(frame, data_hash)
+                print(f"Similar channel index built: {self.neighbors.info()}")
+        except Exception as e:
+            print(f"Similar channel index failed: {type(e).__name__}: {e}")
+
+    @staticmethod
+    def serving_info(analyst):
+        """Model class served and, for a compact export, its size."""
+        info = {"model": type(analyst.model).__name__}
+        if isinstance(analyst.model, CompactForest):
+            info.update({"nodes": analyst.model.n_nodes, "bytes": analyst.model.nbytes,
+                         "depth": analyst.model.depth})
+        return info
+
+    def start(self, watch_interval=0):
+        """
+        Non-blocking startup: loads the first model on a background thread,
+        then starts the watcher. The server can answer liveness checks
+        straight away; `ready` flips once the model is validated and warm.
+        """
+        def run():
+            if not os.path.exists(self.dataset_path):
+                print(f"Dataset not found at {self.dataset_path}. Please ensure the file is present.")
+                self._report("failed")
+                self.last_reload = {"swapped": False, "reason": "dataset not found"}
+                return
+            print(f"Loading model for dataset {self.dataset_path}...")
+            self.reload()
+            self.start_watcher(watch_interval)
+
+        thread = threading.Thread(target=run, daemon=True, name="model-startup")
+        thread.start()
+        return thread
+
+    def compute_importances_async(self, analyst):
+        """
+        Computes permutation importances for a served model on a background
+        thread (the permutations themselves run in worker processes) and
+        stores them in the saved artifact, so each model version pays for
+        this once. Until it finishes, impurity importances are served.
+        """
+        if analyst.importances and analyst.importances.get("permutation") is not None:
+            return None
+
+        def run():
+            try:
+                X_test, y_test = self._holdout(analyst)
+                result = analyst.compute_importances(X_test, y_test)
+                with self._reload_lock:
+                    if model_store.attach_importances(self.model_path, analyst.version, result):
+                        # Our own write, not an external change for the watcher
+                        self._watched = self._fingerprint()
+                print(f"Feature importances for {analyst.version} computed in {result['seconds']}s")
+            except Exception as e:
+                print(f"Feature importances for {analyst.version} failed: {type(e).__name__}: {e}")
+
+        self._importance_thread = threading.Thread(target=run, daemon=True, name="feature-importances")
+        self._importance_thread.start()
+        return self._importance_thread
+
+    def wait_importances(self, timeout=None):
+        """Blocks until a running importance computation finishes (or timeout seconds pass)."""
+        thread = self._importance_thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def wait_ready(self, timeout=None):
+        """Blocks until a model is serving or timeout seconds pass; returns ready."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self.ready and self._progress["phase"] not in ("failed", "rejected"):
+            if deadline is not None and time.monotonic() > deadline:
+                break
+            time.sleep(0.05)
+        return self.ready
+
+    def reload_async(self, retrain=False):
+        """Starts reload() on a background thread; returns False if one is already running."""
+        if self._reload_lock.locked():
+            return False
+        threading.Thread(target=self.reload, kwargs={"retrain": retrain}, daemon=True).start()
+        return True
+
+    def _fingerprint(self):
+        """Modification times of the artifact and dataset, to detect external changes."""
+        def mtime(path):
+            return os.path.getmtime(path) if os.path.exists(path) else None
+        return mtime(self.model_path), mtime(self.dataset_path)
+
+    def start_watcher(self, interval):
+        """Polls the artifact and dataset every interval seconds and reloads when either changes."""
+        if self._watcher is not None or interval <= 0:
+            return
+        self._watched = self._fingerprint()
+
+        def watch():
+            while True:
+                time.sleep(interval)
+                if self._fingerprint() != self._watched and not self._reload_lock.locked():
+                    self.reload()
+
+        self._watcher = threading.Thread(target=watch, daemon=True, name="model-watcher")
+        self._watcher.start()
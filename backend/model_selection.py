@@ -0,0 +1,149 @@
+import time
+
+import numpy as np
+from joblib import Parallel, delayed
+from sklearn.base import clone
+from sklearn.ensemble import (
+    GradientBoostingRegressor,
+    HistGradientBoostingRegressor,
+    RandomForestRegressor,
+)
+from sklearn.metrics import mean_squared_error, r2_score
+from sklearn.model_selection import KFold, ParameterGrid, train_test_split
+
+from analyst import supports_sparse
+
+# (family name, base estimator, parameter grid). Base estimators use a
+# single core; parallelism comes from running candidates side by side.
+SEARCH_SPACE = [
+    ('random_forest', RandomForestRegressor(random_state=42, n_jobs=1), {
+        'n_estimators': [100, 300],
+        'max_depth': [None, 20],
+        'min_samples_leaf': [1, 2],
+    }),
+    ('gradient_boosting', GradientBoostingRegressor(random_state=42), {
+        'n_estimators': [200],
+        'learning_rate': [0.05, 0.1],
+        'max_depth': [3, 5],
+    }),
+    ('hist_gradient_boosting', HistGradientBoostingRegressor(random_state=42), {
+        'max_iter': [200, 500],
+        'learning_rate': [0.05, 0.1],
+        'max_leaf_nodes': [15, 31],
+    }),
+]
+
+# Rows timed one at a time to estimate single-row predict latency
+LATENCY_ROWS = 20
+
+
+def candidates(search_space=SEARCH_SPACE):
+    """Yields (family, params, unfitted estimator) for every grid point."""
+    for family, base, grid in search_space:
+        for params in ParameterGrid(grid):
+            yield family, params, clone(base).set_params(**params)
+
+
+def _prepare_folds(analyst, X, y, categorical_features, numeric_features, n_splits):
+    """Fits the transform steps once per fold; candidates reuse the transformed matrices."""
+    folds = []
+    for train_idx, val_idx in KFold(n_splits=n_splits, shuffle=True, random_state=42).split(X):
+        transform = analyst.build_transform(categorical_features, numeric_features)
+        Xt_train = transform.fit_transform(X.iloc[train_idx])
+        Xt_val = transform.transform(X.iloc[val_idx])
+        folds.append({
+            'X_train': Xt_train,
+            'X_val': Xt_val,
+            'y_train': y.iloc[train_idx].to_numpy(),
+            'y_val': y.iloc[val_idx].to_numpy(),
+        })
+    return folds
+
+
+def _dense(matrix):
+    return matrix.toarray() if hasattr(matrix, 'toarray') else matrix
+
+
+def _evaluate_candidate(estimator, fold):
+    """Fits one candidate on one fold; returns its scores and timings."""
+    X_train, X_val = fold['X_train'], fold['X_val']
+    if not supports_sparse(estimator):
+        X_train, X_val = _dense(X_train), _dense(X_val)
+
+    start = time.perf_counter()
+    estimator.fit(X_train, fold['y_train'])
+    fit_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    y_pred = estimator.predict(X_val)
+    batch_seconds = time.perf_counter() - start
+
+    single = []
+    for i in range(min(LATENCY_ROWS, X_val.shape[0])):
+        row = X_val[i:i + 1]
+        start = time.perf_counter()
+        estimator.predict(row)
+        single.append(time.perf_counter() - start)
+
+    return {
+        'r2': r2_score(fold['y_val'], y_pred),
+        'rmse': float(np.sqrt(mean_squared_error(fold['y_val'], y_pred))),
+        'fit_seconds': fit_seconds,
+        'batch_us_per_row': batch_seconds / X_val.shape[0] * 1e6,
+        'single_row_ms': float(np.median(single)) * 1e3,
+    }
+
+
+def select_model(analyst, search_space=SEARCH_SPACE, n_splits=5, n_jobs=-1):
+    """
+    Cross-validated search over all model families on the training split.
+
+    Every (candidate, fold) pair runs in its own worker process
+    (n_jobs=-1 uses all cores). The held-out test split used by
+    train_models is never seen here. Returns the leaderboard sorted by mean
+    R2, best first; each entry has an unfitted 'estimator' to promote.
+    """
+    X, y, categorical_features, numeric_features = analyst._training_data()
+    X_train, _, y_train, _ = train_test_split(X, y, test_size=0.2, random_state=42)
+    folds = _prepare_folds(analyst, X_train, y_train, categorical_features, numeric_features, n_splits)
+
+    grid = list(candidates(search_space))
+    scores = Parallel(n_jobs=n_jobs)(
+        delayed(_evaluate_candidate)(clone(estimator), fold)
+        for _, _, estimator in grid
+        for fold in folds
+    )
+
+    leaderboard = []
+    for i, (family, params, estimator) in enumerate(grid):
+        fold_scores = scores[i * n_splits:(i + 1) * n_splits]
+        r2s = [s['r2'] for s in fold_scores]
+        leaderboard.append({
+            'family': family,
+            'params': params,
+            'estimator': estimator,
+            'r2_mean': float(np.mean(r2s)),
+            'r2_std': float(np.std(r2s)),
+            'rmse_mean': float(np.mean([s['rmse'] for s in fold_scores])),
+            'fit_seconds': float(np.mean([s['fit_seconds'] for s in fold_scores])),
+            'batch_us_per_row': float(np.mean([s['batch_us_per_row'] for s in fold_scores])),
+            'single_row_ms': float(np.mean([s['single_row_ms'] for s in fold_scores])),
+        })
+    leaderboard.sort(key=lambda entry: entry['r2_mean'], reverse=True)
+    return leaderboard
+
+
+def format_leaderboard(leaderboard):
+    lines = [f"{'#':>2} {'family':<23} {'R2 (cv)':>15} {'RMSE':>12} {'fit s':>7} {'1-row ms':>9} {'batch us/row':>13}  params"]
+    for rank, entry in enumerate(leaderboard, 1):
+        lines.append(
+            f"{rank:>2} {entry['family']:<23} {entry['r2_mean']:>7.4f} ±{entry['r2_std']:.4f} "
+            f"{entry['rmse_mean']:>12,.0f} {entry['fit_seconds']:>7.2f} {entry['single_row_ms']:>9.2f} "
+            f"{entry['batch_us_per_row']:>13.1f}  {entry['params']}"
+        )
+    return "\n".join(lines)
+
+
+def leaderboard_summary(leaderboard):
+    """JSON-friendly leaderboard (without estimator objects) for the artifact."""
+    return [{k: v for k, v in entry.items() if k != 'estimator'} for entry in leaderboard]
@@ -0,0 +1,197 @@
+import os
+import datetime
+
+import joblib
+import sklearn
+from sklearn.base import clone
+
+from analyst import YouTubeAnalyst, MODEL_VERSION, base_regressor
+from data_cache import DEFAULT_CACHE_DIR, dataset_hash
+import ingest
+
+# Bump when the layout of the saved artifact dict changes
+ARTIFACT_FORMAT = 3
+
+# Datasets larger than this are ingested in chunks to bound peak memory
+STREAMING_THRESHOLD_BYTES = 256 * 1024 * 1024
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_MODEL_PATH = os.path.join(BASE_DIR, 'model.joblib')
+
+
+def save_artifact(analyst, model_path, data_hash, model_selection=None):
+    """
+    Saves the fitted pipeline and its metadata as one joblib artifact.
+    model_selection: leaderboard summary, if the model was chosen by search.
+    """
+    artifact = {
+        "format": ARTIFACT_FORMAT,
+        "model_version": MODEL_VERSION,
+        "sklearn_version": sklearn.__version__,
+        "dataset_hash": data_hash,
+        "trained_at": datetime.datetime.now().isoformat(timespec='seconds'),
+        "version": analyst.version,
+        "pipeline": analyst.pipeline,
+        "feature_names": analyst.feature_names,
+        "metrics": analyst.metrics.to_dict(),
+        "model_selection": model_selection,
+        "parallelism": analyst.parallelism,
+        "importances": analyst.importances,
+        "interval_calibration": analyst.interval_calibration,
+        "cleaning_stats": analyst.cleaning_stats,
+        "incremental": analyst.incremental,
+        "holdout_rows": analyst.holdout_rows,
+    }
+    _write_artifact(artifact, model_path)
+    return artifact
+
+
+def _write_artifact(artifact, model_path):
+    # Write to a temp file first so readers never see a half-written artifact
+    tmp_path = model_path + '.tmp'
+    joblib.dump(artifact, tmp_path)
+    os.replace(tmp_path, model_path)
+
+
+def attach_importances(model_path, version, importances):
+    """
+    Stores importances computed after saving into the artifact, if it
+    still holds that model version. Returns True if the artifact was updated.
+    """
+    artifact = read_artifact(model_path)
+    if artifact is None or artifact.get("version") != version:
+        return False
+    artifact["importances"] = importances
+    _write_artifact(artifact, model_path)
+    return True
+
+
+def read_artifact(model_path):
+    """Loads the raw artifact dict, or None if it is missing or unreadable."""
+    if not os.path.exists(model_path):
+        return None
+    try:
+        artifact = joblib.load(model_path)
+    except Exception as e:
+        print(f"Could not read model artifact {model_path}: {e}")
+        return None
+    if not isinstance(artifact, dict) or artifact.get("format") != ARTIFACT_FORMAT:
+        print(f"Ignoring model artifact {model_path}: unknown format")
+        return None
+    return artifact
+
+
+def is_stale(artifact, data_hash):
+    """True if the artifact was built from other data or by other code."""
+    return (
+        artifact.get("dataset_hash") != data_hash
+        or artifact.get("model_version") != MODEL_VERSION
+        or artifact.get("sklearn_version") != sklearn.__version__
+    )
+
+
+def default_chunksize(dataset_path):
+    """Chunk size for streaming ingestion, or None to read the file at once."""
+    if os.path.getsize(dataset_path) > STREAMING_THRESHOLD_BYTES:
+        return ingest.DEFAULT_CHUNKSIZE
+    return None
+
+
+def prepared_analyst(dataset_path, data_hash=None, chunksize=None, cache_dir=DEFAULT_CACHE_DIR,
+                     progress=None):
+    """
+    An analyst holding the cleaned dataset (analyst.df), untrained: the
+    one entry point for the cleaned rows, shared by training, validation,
+    incremental updates, the indexes and the report.
+    data_hash: the file's hash if already known (computed otherwise); part
+    of the cache key.
+    chunksize: rows per streamed chunk; None picks default_chunksize, so
+    every caller reads (and caches) the file the same way.
+    cache_dir: columnar cache the cleaned frame is memory-mapped from, or
+    stored in on a miss (see data_cache); None always reads the CSV.
+    progress: optional callback(phase, rows_processed).
+    """
+    if chunksize is None:
+        chunksize = default_chunksize(dataset_path)
+    analyst = YouTubeAnalyst()
+    analyst.load_and_prep_data(dataset_path, chunksize=chunksize, cache_dir=cache_dir,
+                               data_hash=data_hash, progress=progress)
+    return analyst
+
+
+def train(dataset_path, data_hash=None, chunksize=None, cache_dir=DEFAULT_CACHE_DIR, regressor=None,
+          progress=None):
+    """
+    Trains a fresh analyst on the dataset without saving it.
+    progress: optional callback(phase, rows_processed).
+    """
+    if data_hash is None:
+        data_hash = dataset_hash(dataset_path)
+    analyst = prepared_analyst(dataset_path, data_hash, chunksize, cache_dir, progress)
+    if progress is not None:
+        progress("training", len(analyst.df))
+    analyst.train_models(regressor=regressor)
+    return analyst
+
+
+def train_and_save(dataset_path, model_path=DEFAULT_MODEL_PATH, data_hash=None, chunksize=None,
+                   cache_dir=DEFAULT_CACHE_DIR, regressor=None):
+    """Trains a fresh analyst on the dataset and persists it."""
+    if data_hash is None:
+        data_hash = dataset_hash(dataset_path)
+    analyst = train(dataset_path, data_hash, chunksize, cache_dir, regressor)
+    analyst.compute_importances(analyst.X_test, analyst.y_test)
+    save_artifact(analyst, model_path, data_hash)
+    return analyst
+
+
+def promoted_regressor(artifact):
+    """
+    Unfitted copy of the artifact's estimator, so retraining keeps the
+    promoted configuration (at its size before any incremental growth).
+    """
+    if artifact is None:
+        return None
+    return base_regressor(artifact["pipeline"].named_steps["regressor"], artifact.get("incremental"))
+
+
+def load_fresh(model_path, data_hash):
+    """Returns (analyst or None, artifact); the analyst only if the artifact is up to date."""
+    artifact = read_artifact(model_path)
+    if artifact is not None and not is_stale(artifact, data_hash):
+        print(f"Loaded model artifact {model_path} (trained {artifact['trained_at']}).")
+        return YouTubeAnalyst.from_artifact(artifact), artifact
+    return None, artifact
+
+
+def select_and_save(dataset_path, model_path=DEFAULT_MODEL_PATH, chunksize=None,
+                    cache_dir=DEFAULT_CACHE_DIR, n_jobs=-1):
+    """Runs model selection, retrains the winner and promotes it to the serving artifact."""
+    # Imported here: the search space pulls in every model family
+    import model_selection
+
+    data_hash = dataset_hash(dataset_path)
+    analyst = prepared_analyst(dataset_path, data_hash, chunksize, cache_dir)
+    leaderboard = model_selection.select_model(analyst, n_jobs=n_jobs)
+    print(model_selection.format_leaderboard(leaderboard))
+
+    best = leaderboard[0]
+    print(f"Promoting {best['family']} {best['params']}")
+    analyst.train_models(regressor=clone(best['estimator']))
+    analyst.compute_importances(analyst.X_test, analyst.y_test)
+    save_artifact(analyst, model_path, data_hash,
+                  model_selection=model_selection.leaderboard_summary(leaderboard))
+    return analyst, leaderboard
+
+
+def load_or_train(dataset_path, model_path=DEFAULT_MODEL_PATH):
+    """Returns an analyst from the saved artifact, retraining only if it is stale."""
+    data_hash = dataset_hash(dataset_path)
+    analyst, artifact = load_fresh(model_path, data_hash)
+    if analyst is not None:
+        return analyst
+
+    print("Model artifact missing or stale, retraining...")
+    analyst = train_and_save(dataset_path, model_path, data_hash, regressor=promoted_regressor(artifact))
+    print(f"Model saved to {model_path}.")
+    return analyst
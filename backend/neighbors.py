@@ -0,0 +1,149 @@
+"""
+"Channels like mine": nearest neighbours among the dataset's channels.
+
+ChannelIndex places every cleaned channel in a small standardized space
+(log subscribers, log views, log uploads, channel age, log views per
+upload) and indexes it with KD-trees: one over all channels, one per
+category, one per country and one per (category, country) pair, so a
+filtered lookup searches exactly the matching channels instead of
+scanning the frame. Each channel is in four trees, so the index holds
+four copies of the points. Built once per dataset version.
+"""
+from itertools import combinations
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.neighbors import KDTree
+
+from features import ChannelFeatures, INPUT_COLUMNS
+
+SPACE = ['log_subscribers', 'log_views', 'log_uploads', 'channel_age_years', 'log_views_per_upload']
+# Dimensions lookups can filter on, with a KD-tree per combination of values
+FILTER_DIMENSIONS = ['category', 'Country']
+RESULT_COLUMNS = ['Youtuber', 'category', 'Country', 'channel_type', 'created_year', 'subscribers',
+                  'video views', 'uploads', 'lowest_yearly_earnings', 'highest_yearly_earnings']
+INTEGER_COLUMNS = {'created_year', 'subscribers', 'video views', 'uploads'}
+MAX_K = 100
+LEAF_SIZE = 40
+
+
+def _space(features):
+    """SPACE coordinates from ChannelFeatures numeric outputs (arrays or scalars)."""
+    return np.column_stack([
+        np.log1p(np.maximum(features['subscribers'], 0)),
+        np.log1p(np.maximum(features['video views'], 0)),
+        np.log1p(np.maximum(features['uploads'], 0)),
+        features['channel_age_years'],
+        np.log1p(np.maximum(features['views_per_upload'], 0)),
+    ])
+
+
+def _result_column(series):
+    """(values, labels): category codes and their labels for text columns, else (float64 array, None)."""
+    if not pd.api.types.is_numeric_dtype(series):
+        codes, labels = pd.factorize(series.astype(object))
+        return codes, labels.astype(str).tolist()
+    return series.to_numpy(dtype='float64'), None
+
+
+def _result_value(col, values, labels, row):
+    value = values[row]
+    if labels is not None:
+        return labels[value] if value >= 0 else None
+    if np.isnan(value):
+        return None
+    return int(value) if col in INTEGER_COLUMNS else float(value)
+
+
+class ChannelIndex:
+    """
+    KD-trees over the channels of one dataset version (data_hash), in
+    SPACE scaled to zero mean and unit variance. Query inputs have
+    missing numbers filled with the dataset medians, as predictions do.
+    """
+
+    def __init__(self, data_hash):
+        self.data_hash = data_hash
+        self.build_seconds = None
+
+    @classmethod
+    def build(cls, df, data_hash, reference_year=None, leaf_size=LEAF_SIZE):
+        """Index of a cleaned dataset frame (YouTubeAnalyst.df)."""
+        start = time.perf_counter()
+        index = cls(data_hash)
+        inputs = df.reindex(columns=INPUT_COLUMNS)
+        index.features = ChannelFeatures(reference_year).fit(inputs)
+        points = _space(index.features.transform(inputs))
+        index.mean = points.mean(axis=0)
+        std = points.std(axis=0)
+        index.scale = np.where(std > 0, std, 1.0)
+        points = (points - index.mean) / index.scale
+
+        results = df.reindex(columns=RESULT_COLUMNS)
+        index.columns = {col: _result_column(results[col]) for col in RESULT_COLUMNS}
+        codes, values = {}, {}
+        for dim in FILTER_DIMENSIONS:
+            codes[dim], labels = pd.factorize(results[dim].astype(str))
+            values[dim] = labels.tolist()
+        index.trees = {}
+        for n in range(len(FILTER_DIMENSIONS) + 1):
+            for dims in combinations(FILTER_DIMENSIONS, n):
+                if not dims:
+                    index.trees[()] = (KDTree(points, leaf_size=leaf_size), None)
+                    continue
+                # Rows grouped by their combination of values of dims
+                group = np.zeros(len(points), dtype=np.int64)
+                for dim in dims:
+                    group = group * len(values[dim]) + codes[dim]
+                order = np.argsort(group, kind='stable')
+                starts = np.flatnonzero(np.r_[True, np.diff(group[order]) != 0])
+                for members in np.split(order, starts[1:]):
+                    key = tuple((dim, values[dim][codes[dim][members[0]]]) for dim in dims)
+                    index.trees[key] = (KDTree(points[members], leaf_size=leaf_size), members)
+        index.build_seconds = round(time.perf_counter() - start, 4)
+        return index
+
+    @property
+    def n_channels(self):
+        return self.trees[()][0].data.shape[0]
+
+    def _point(self, input_data):
+        """Scaled SPACE coordinates of one input dict; raises ValueError for bad numbers."""
+        row = self.features.transform_one(input_data)
+        return ((_space(row)[0] - self.mean) / self.scale).reshape(1, -1)
+
+    def query(self, input_data, k=10, filters=None):
+        """
+        The k channels nearest to input_data (a prediction input dict),
+        nearest first, optionally only those matching filters {dimension:
+        value} for dimensions in FILTER_DIMENSIONS. Each result holds the
+        channel's RESULT_COLUMNS and its distance in the scaled space.
+        """
+        if not 1 <= k <= MAX_K:
+            raise ValueError(f"k must be between 1 and {MAX_K}")
+        filters = filters or {}
+        unknown = set(filters) - set(FILTER_DIMENSIONS)
+        if unknown:
+            raise ValueError(f"Can only filter on {FILTER_DIMENSIONS}, got {sorted(unknown)}")
+        point = self._point(input_data)
+
+        key = tuple((dim, str(filters[dim])) for dim in FILTER_DIMENSIONS if dim in filters)
+        if key not in self.trees:
+            return []
+        tree, members = self.trees[key]
+        distances, positions = tree.query(point, k=min(k, tree.data.shape[0]))
+        distances, rows = distances[0], positions[0]
+        if members is not None:
+            rows = members[rows]
+
+        results = []
+        for row, distance in zip(rows.tolist(), distances.tolist()):
+            result = {col: _result_value(col, values, labels, row)
+                      for col, (values, labels) in self.columns.items()}
+            result['distance'] = round(distance, 6)
+            results.append(result)
+        return results
+
+    def info(self):
+        return {"dataset_hash": self.data_hash, "channels": self.n_channels, "build_seconds": self.build_seconds}
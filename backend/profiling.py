@@ -0,0 +1,78 @@
+import cProfile
+import io
+import itertools
+import pstats
+import random
+import threading
+from collections import OrderedDict
+
+
+class RequestProfiler:
+    """
+    Optional cProfile capture for individual requests.
+
+    A request is profiled when it carries the profile header or is picked
+    by random sampling (sample_rate in [0, 1]). The last max_profiles
+    reports are kept in memory, newest last. One request is profiled at a
+    time: requests arriving while another is being profiled run without.
+    """
+
+    def __init__(self, sample_rate=0.0, max_profiles=20, top=40):
+        self.sample_rate = sample_rate
+        self.max_profiles = max_profiles
+        self.top = top
+        self._profiles = OrderedDict()  # id -> summary dict
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        # Held while a profiler is enabled; from Python 3.12 cProfile allows
+        # only one active profiler per process
+        self._active = threading.Lock()
+
+    def should_profile(self, requested):
+        return requested or (self.sample_rate > 0 and random.random() < self.sample_rate)
+
+    def start(self):
+        """An enabled profiler, or None if another request (or tool) is profiling."""
+        if not self._active.acquire(blocking=False):
+            return None
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiling tool, such as a debugger, is active
+            self._active.release()
+            return None
+        return profiler
+
+    def stop(self, profiler):
+        """Stops a profiler from start() without keeping a report."""
+        try:
+            profiler.disable()
+        finally:
+            self._active.release()
+
+    def finish(self, profiler, method, path, seconds):
+        """Stops the profiler, stores its report and returns the profile id."""
+        self.stop(profiler)
+        out = io.StringIO()
+        pstats.Stats(profiler, stream=out).sort_stats('cumulative').print_stats(self.top)
+        with self._lock:
+            profile_id = next(self._ids)
+            self._profiles[profile_id] = {
+                "id": profile_id,
+                "method": method,
+                "path": path,
+                "seconds": round(seconds, 6),
+                "report": out.getvalue(),
+            }
+            while len(self._profiles) > self.max_profiles:
+                self._profiles.popitem(last=False)
+        return profile_id
+
+    def list(self):
+        with self._lock:
+            return [{k: v for k, v in p.items() if k != "report"} for p in self._profiles.values()]
+
+    def get(self, profile_id):
+        with self._lock:
+            return self._profiles.get(profile_id)
@@ -0,0 +1,102 @@
+"""
+What-if sweeps: predictions for a base channel with one or two numeric
+inputs varied over ranges.
+
+An axis is {"feature": input, "values": [...]} or {"feature": input,
+"min": a, "max": b, "steps": n[, "scale": "linear" | "log"]}. Two axes
+span a grid (first axis along rows). All points are scored in one
+YouTubeAnalyst.predict_grid call, which builds the feature matrix from the
+base row directly rather than one input dict per point.
+"""
+import math
+
+import numpy as np
+
+from features import NUMERIC_INPUTS
+import config
+
+MAX_AXES = 2
+SCALES = ('linear', 'log')
+
+
+def _number(raw, name):
+    try:
+        value = float(raw)
+    except (TypeError, ValueError):
+        value = math.nan
+    if not math.isfinite(value):
+        raise ValueError(f"Axis {name} must be a finite number, got {raw!r}")
+    return value
+
+
+def axis_values(axis):
+    """(feature, values array) of one axis spec; raises ValueError."""
+    if not isinstance(axis, dict):
+        raise ValueError("Each axis must be an object")
+    feature = axis.get('feature')
+    if feature not in NUMERIC_INPUTS:
+        raise ValueError(f"Axis feature must be one of {NUMERIC_INPUTS}, got {feature!r}")
+
+    if 'values' in axis:
+        raw = axis['values']
+        if not isinstance(raw, list) or not raw:
+            raise ValueError("Axis 'values' must be a non-empty list")
+        values = np.array([_number(v, "'values' entry") for v in raw])
+    else:
+        low, high = _number(axis.get('min'), "'min'"), _number(axis.get('max'), "'max'")
+        steps = axis.get('steps', 20)
+        if not isinstance(steps, int) or isinstance(steps, bool) or steps < 2:
+            raise ValueError(f"Axis 'steps' must be an integer of at least 2, got {steps!r}")
+        scale = axis.get('scale', 'linear')
+        if scale not in SCALES:
+            raise ValueError(f"Axis 'scale' must be one of {list(SCALES)}, got {scale!r}")
+        if scale == 'log':
+            if low <= 0 or high <= 0:
+                raise ValueError("A log-scale axis needs positive 'min' and 'max'")
+            values = np.geomspace(low, high, steps)
+        else:
+            values = np.linspace(low, high, steps)
+    return feature, values
+
+
+def parse_axes(axes):
+    """[(feature, values)] for a list of one or two axis specs; raises ValueError."""
+    if not isinstance(axes, list) or not 1 <= len(axes) <= MAX_AXES:
+        raise ValueError(f"'axes' must be a list of 1 to {MAX_AXES} axes")
+    parsed = [axis_values(axis) for axis in axes]
+    features = [feature for feature, _ in parsed]
+    if len(set(features)) != len(features):
+        raise ValueError("Each axis must vary a different feature")
+    n_points = math.prod(len(values) for _, values in parsed)
+    if n_points > config.SWEEP_MAX_POINTS:
+        raise ValueError(f"Sweep has {n_points} points, limit is {config.SWEEP_MAX_POINTS}")
+    return parsed
+
+
+def run(analyst, base_input, axes, level=None):
+    """
+    Sweep response for base_input (a prediction input dict) over axes:
+    each axis's values and the predictions as a list (one axis) or a list
+    of rows (two axes), plus lower/upper bounds of the same shape with
+    level. Raises ValueError for bad axes or a bad base_input.
+    """
+    if not isinstance(base_input, dict):
+        raise ValueError("'base' must be an object of channel statistics")
+    parsed = parse_axes(axes)
+    grids = np.meshgrid(*[values for _, values in parsed], indexing='ij')
+    varied = {feature: grid.ravel() for (feature, _), grid in zip(parsed, grids)}
+    shape = grids[0].shape
+
+    scored = analyst.predict_grid(base_input, varied, level)
+    response = {"axes": [{"feature": feature, "values": values.tolist()} for feature, values in parsed]}
+    if level is None:
+        response["predictions"] = np.asarray(scored).reshape(shape).tolist()
+        return response
+    predictions, lower, upper = scored
+    response.update({
+        "predictions": np.asarray(predictions).reshape(shape).tolist(),
+        "lower": np.asarray(lower).reshape(shape).tolist(),
+        "upper": np.asarray(upper).reshape(shape).tolist(),
+        "interval_level": level,
+    })
+    return response
@@ -0,0 +1,49 @@
+"""
+Production WSGI entry point.
+
+    cd backend && gunicorn wsgi:app
+
+gunicorn.conf.py (picked up from the working directory) pre-forks
+SERVER_WORKERS processes with SERVER_THREADS threads each. Importing this
+module loads no model and trains nothing: gunicorn calls load_model() once
+in the master before forking, so workers share the loaded model
+copy-on-write (and the compact model's memory map through the page cache),
+then start_worker() in each worker.
+"""
+import gc
+import os
+
+from app import app, manager
+import config
+
+
+def load_model():
+    """
+    Loads the serving model synchronously (retraining it if missing or
+    stale) and waits for its permutation importances, so workers start
+    with both and none of them repeats the work. Raises if no model could
+    be loaded, so the server does not start workers that can only 503.
+    """
+    if not os.path.exists(manager.dataset_path):
+        raise RuntimeError(f"Dataset not found at {manager.dataset_path}")
+    status = manager.reload()
+    if not manager.ready:
+        raise RuntimeError(f"Model failed to load: {status.get('reason')}")
+    manager.wait_importances()
+    # Objects allocated so far are left alone by the collector, which would
+    # otherwise write to (and so copy) their pages in every worker
+    gc.freeze()
+
+
+def start_worker():
+    """
+    Per-worker setup after fork. Threads do not survive fork, so the model
+    watcher starts here; with several workers, MODEL_RELOAD_INTERVAL is what
+    lets the others follow a reload or append made through one of them.
+    Without preloading, each worker loads the model itself.
+    """
+    manager.importances_on_load = False
+    if manager.ready:
+        manager.start_watcher(config.MODEL_RELOAD_INTERVAL)
+    else:
+        manager.start(watch_interval=config.MODEL_RELOAD_INTERVAL)
@@ -0,0 +1,107 @@
+"""Analytics rollups vs pandas: query latency, build time and incremental appends.
+
+For each dataset size, cleans a synthetic dataset, builds analytics.Rollups
+and times a filtered group-by and a filtered top-N against the same query
+done with pandas on the cleaned frame (results are checked to match). Then
+appends --append-fraction more rows and compares folding them into the
+rollups with rebuilding from scratch.
+
+Usage: python benchmarks/bench_analytics.py [--rows 1000 1000000] [--append-fraction 0.01]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(ROOT_DIR, 'backend'))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from analyst import YouTubeAnalyst
+import analytics
+from synthetic import make_dataset
+
+FILTERS = {'Country': ['United States', 'India', 'Brazil'], 'min_year': 2010}
+MEASURE = 'highest_yearly_earnings'
+
+
+def cleaned(n_rows, seed):
+    analyst = YouTubeAnalyst()
+    analyst.df = make_dataset(n_rows, seed=seed)
+    analyst._clean_data()
+    return analyst.df.reset_index(drop=True)
+
+
+def median_ms(fn, repeats):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return np.median(times) * 1000
+
+
+def pandas_aggregate(df):
+    rows = df[df['Country'].isin(FILTERS['Country']) & (df['created_year'] >= FILTERS['min_year'])]
+    return rows.groupby('category', observed=True)[MEASURE].agg(['count', 'sum', 'mean', 'min', 'max'])
+
+
+def pandas_top(df, n=10):
+    rows = df[df['Country'].isin(FILTERS['Country']) & (df['created_year'] >= FILTERS['min_year'])]
+    return rows.sort_values(MEASURE, ascending=False, kind='stable').head(n)
+
+
+def check(rollups, df):
+    expected = pandas_aggregate(df)
+    got = {g['category']: g for g in rollups.aggregate(MEASURE, 'category', FILTERS)}
+    assert set(got) == set(expected.index.astype(str)), "aggregate groups differ"
+    for category, row in expected.iterrows():
+        g = got[str(category)]
+        assert g['count'] == row['count'] and np.isclose(g['sum'], row['sum']) and g['max'] == row['max']
+    top = [c[MEASURE] for c in rollups.top(MEASURE, 10, FILTERS)]
+    assert np.allclose(top, pandas_top(df)[MEASURE].to_numpy()), "top-N differs"
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[1_000, 1_000_000])
+    parser.add_argument('--append-fraction', type=float, default=0.01)
+    parser.add_argument('--repeats', type=int, default=50)
+    args = parser.parse_args()
+
+    print(f"Filters {FILTERS}, measure {MEASURE!r}\n")
+    print(f"{'rows':>10} {'cells':>6} {'build s':>8} {'agg ms':>8} {'pandas ms':>10} {'top ms':>8} "
+          f"{'pandas ms':>10} {'append s':>9} {'rebuild s':>10}")
+    for n_rows in args.rows:
+        df = cleaned(n_rows, seed=1)
+        start = time.perf_counter()
+        rollups = analytics.Rollups.build(df, 'base')
+        build = time.perf_counter() - start
+        check(rollups, df)
+
+        agg = median_ms(lambda: rollups.aggregate(MEASURE, 'category', FILTERS), args.repeats)
+        agg_pandas = median_ms(lambda: pandas_aggregate(df), max(3, args.repeats // 10))
+        top = median_ms(lambda: rollups.top(MEASURE, 10, FILTERS), args.repeats)
+        top_pandas = median_ms(lambda: pandas_top(df), max(3, args.repeats // 10))
+
+        new = cleaned(max(1, int(n_rows * args.append_fraction)), seed=2)
+        start = time.perf_counter()
+        grown = rollups.appended(new, 'grown')
+        append = time.perf_counter() - start
+        combined = pd.concat([df, new], ignore_index=True)
+        start = time.perf_counter()
+        rebuilt = analytics.Rollups.build(combined, 'grown')
+        rebuild = time.perf_counter() - start
+        # Sums may differ in the last bits: the additions happen in another order
+        by_country = [(g['Country'], g['count'], g['sum']) for g in grown.aggregate(MEASURE, 'Country')]
+        expected = [(g['Country'], g['count'], g['sum']) for g in rebuilt.aggregate(MEASURE, 'Country')]
+        assert [r[:2] for r in by_country] == [r[:2] for r in expected], "appended counts differ"
+        assert np.allclose([r[2] for r in by_country], [r[2] for r in expected]), "appended sums differ"
+        assert all((grown.order[m] == rebuilt.order[m]).all() for m in analytics.MEASURES), "orders differ"
+        check(grown, combined)
+
+        print(f"{n_rows:>10,} {rollups.n_cells:>6} {build:>8.3f} {agg:>8.3f} {agg_pandas:>10.3f} "
+              f"{top:>8.3f} {top_pandas:>10.3f} {append:>9.3f} {rebuild:>10.3f}")
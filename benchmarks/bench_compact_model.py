@@ -0,0 +1,110 @@
+"""Compact model export: size vs accuracy and speed for depth/leaf pruning.
+
+Exports the serving RandomForest (trained if needed) with each combination
+of --max-depth and --min-samples-leaf and reports size, holdout R2/RMSE,
+largest deviation from the full forest, and single-row / batch prediction
+speed. max depth 0 means unlimited; 0/1 is the exact, unpruned export.
+--rows trains on a synthetic dataset of that size in a temporary directory
+instead of using the real dataset and saved model.
+
+Usage: python benchmarks/bench_compact_model.py [--rows N] [--max-depth 0 16 12 8] [--min-samples-leaf 1 5]
+"""
+import argparse
+import os
+import pickle
+import sys
+import tempfile
+import time
+
+import numpy as np
+from sklearn.metrics import mean_squared_error, r2_score
+from sklearn.model_selection import train_test_split
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(os.path.dirname(ROOT_DIR), 'backend'))
+sys.path.append(ROOT_DIR)
+
+from analyst import YouTubeAnalyst
+from data_cache import DEFAULT_CACHE_DIR, dataset_hash
+import compact_model
+import model_store
+from synthetic import write_dataset
+
+DATA_PATH = os.path.join(os.path.dirname(ROOT_DIR), 'Global YouTube Statistics.csv')
+SINGLE_ROW_REPEATS = 200
+PROBE = {'subscribers': 1000000, 'video views': 100000000, 'uploads': 100, 'category': 'Music', 'Country': 'India'}
+
+
+def holdout(dataset_path, cache_dir):
+    """The (X_test, y_test) split train_models held out."""
+    data_hash = dataset_hash(dataset_path)
+    data = model_store.prepared_analyst(dataset_path, data_hash, cache_dir=cache_dir)
+    X, y, _, _ = data._training_data()
+    _, X_test, _, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+    return X_test, y_test
+
+
+def measure(analyst, X_test, y_test, full_pred):
+    start = time.perf_counter()
+    y_pred = analyst.pipeline.predict(X_test)
+    batch_seconds = time.perf_counter() - start
+    timings = []
+    for _ in range(SINGLE_ROW_REPEATS):
+        t = time.perf_counter()
+        analyst.predict(PROBE)
+        timings.append(time.perf_counter() - t)
+    return {
+        "r2": float(r2_score(y_test, y_pred)),
+        "rmse": float(np.sqrt(mean_squared_error(y_test, y_pred))),
+        "max_abs_diff": float(np.max(np.abs(y_pred - full_pred))),
+        "p50_us": float(np.percentile(timings, 50) * 1e6),
+        "batch_rows_per_s": len(X_test) / batch_seconds,
+    }
+
+
+def report(dataset_path, model_path, cache_dir, depths, leaves, export_dir):
+    full, artifact = model_store.load_fresh(model_path, dataset_hash(dataset_path))
+    if full is None:
+        print("Model artifact missing or stale, training...")
+        full = model_store.train_and_save(dataset_path, model_path, cache_dir=cache_dir,
+                                          regressor=model_store.promoted_regressor(artifact))
+        full, artifact = model_store.load_fresh(model_path, dataset_hash(dataset_path))
+    X_test, y_test = holdout(dataset_path, cache_dir)
+    full_pred = full.pipeline.predict(X_test)
+    print(f"Model {full.version}, {len(X_test)} holdout rows\n")
+
+    header = (f"{'max depth':>9} {'min leaf':>8} {'nodes':>9} {'KB':>9} {'R2':>8} {'RMSE':>12} "
+              f"{'max |diff|':>12} {'p50 us':>8} {'batch rows/s':>13}")
+    print(header)
+    forest_bytes = len(pickle.dumps(full.model, protocol=pickle.HIGHEST_PROTOCOL))
+    row = measure(full, X_test, y_test, full_pred)
+    print(f"{'full forest (pickled size)':<28} {forest_bytes / 1024:>9,.0f} {row['r2']:>8.4f} {row['rmse']:>12,.0f} "
+          f"{row['max_abs_diff']:>12.4g} {row['p50_us']:>8.0f} {row['batch_rows_per_s']:>13,.0f}")
+    for depth in depths:
+        for leaf in leaves:
+            manifest = compact_model.export(artifact, export_dir, depth or None, leaf)
+            compact = YouTubeAnalyst.from_artifact(compact_model.load(export_dir))
+            row = measure(compact, X_test, y_test, full_pred)
+            print(f"{depth or 'none':>9} {leaf:>8} {manifest['n_nodes']:>9,} {manifest['bytes'] / 1024:>9,.0f} "
+                  f"{row['r2']:>8.4f} {row['rmse']:>12,.0f} {row['max_abs_diff']:>12.4g} "
+                  f"{row['p50_us']:>8.0f} {row['batch_rows_per_s']:>13,.0f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=None, help="Use a synthetic dataset of this many rows.")
+    parser.add_argument('--max-depth', type=int, nargs='+', default=[0, 20, 16, 12, 10, 8, 6],
+                        help="Depths to prune to (0 = unlimited).")
+    parser.add_argument('--min-samples-leaf', type=int, nargs='+', default=[1, 2, 5, 10],
+                        help="Minimum training samples per leaf to keep a split.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        export_dir = os.path.join(tmp, 'serving')
+        if args.rows:
+            dataset_path = write_dataset(args.rows, os.path.join(tmp, 'data.csv'))
+            report(dataset_path, os.path.join(tmp, 'model.joblib'), os.path.join(tmp, 'cache'),
+                   args.max_depth, args.min_samples_leaf, export_dir)
+        else:
+            report(DATA_PATH, model_store.DEFAULT_MODEL_PATH, DEFAULT_CACHE_DIR,
+                   args.max_depth, args.min_samples_leaf, export_dir)
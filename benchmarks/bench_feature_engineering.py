@@ -0,0 +1,68 @@
+"""Rows/sec of the model's feature step (features.ChannelFeatures): row-wise apply vs vectorized.
+
+Usage: python benchmarks/bench_feature_engineering.py [--sizes 1000 100000 1000000]
+"""
+import argparse
+import datetime
+import os
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(ROOT_DIR, 'backend'))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from analyst import YouTubeAnalyst
+from features import ChannelFeatures
+from synthetic import make_dataset
+
+
+def rowwise_feature_engineering(df):
+    """The earlier DataFrame.apply implementation of the same features, kept as the baseline."""
+    def safe_div(a, b):
+        return a / b if b > 0 else 0
+
+    df['views_per_upload'] = df.apply(lambda x: safe_div(x['video views'], x['uploads']), axis=1)
+    df['channel_age_years'] = datetime.datetime.now().year - df['created_year']
+    df.fillna(0, inplace=True)
+    return df
+
+
+def cleaned_frame(n_rows):
+    """Raw model inputs of n_rows cleaned synthetic channels."""
+    analyst = YouTubeAnalyst()
+    analyst.df = make_dataset(n_rows)
+    analyst._clean_data()
+    X, _, _, _ = analyst._training_data()
+    return X
+
+
+def time_vectorized(df):
+    start = time.perf_counter()
+    ChannelFeatures().fit_transform(df)
+    return time.perf_counter() - start
+
+
+def time_rowwise(df):
+    df = df.copy()
+    start = time.perf_counter()
+    rowwise_feature_engineering(df)
+    return time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000, 100_000, 1_000_000])
+    parser.add_argument('--rowwise-max', type=int, default=1_000_000,
+                        help="Skip the slow row-wise baseline above this many rows.")
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} {'row-wise rows/s':>16} {'vectorized rows/s':>18} {'speedup':>8}")
+    for n in args.sizes:
+        df = cleaned_frame(n)
+        vec = time_vectorized(df)
+        if len(df) <= args.rowwise_max:
+            row = time_rowwise(df)
+            print(f"{len(df):>10} {len(df) / row:>16,.0f} {len(df) / vec:>18,.0f} {row / vec:>7.0f}x")
+        else:
+            print(f"{len(df):>10} {'skipped':>16} {len(df) / vec:>18,.0f} {'-':>8}")
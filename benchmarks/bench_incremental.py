@@ -0,0 +1,39 @@
+"""Incremental update vs full retrain: wall time and holdout accuracy.
+
+Trains the serving model on a synthetic base dataset, appends new rows and
+grows the model on them, and compares with retraining from scratch on the
+same rows. Everything runs in a temporary directory.
+
+Usage: python benchmarks/bench_incremental.py [--rows 10000] [--append 1000 1000] [--add 10]
+"""
+import argparse
+import os
+import sys
+import tempfile
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(ROOT_DIR, 'backend'))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import incremental
+from synthetic import make_dataset, write_dataset
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=10_000, help="Rows in the base dataset.")
+    parser.add_argument('--append', type=int, nargs='+', default=[1_000, 1_000],
+                        help="Rows appended per update; one update per value.")
+    parser.add_argument('--add', type=int, default=None, help="Estimators added per update.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        dataset_path = write_dataset(args.rows, os.path.join(tmp, 'data.csv'))
+        model_path = os.path.join(tmp, 'model.joblib')
+        cache_dir = os.path.join(tmp, 'cache')
+        for i, n_rows in enumerate(args.append):
+            # Different seeds so appended rows are not copies of the base rows
+            new_rows = make_dataset(n_rows, seed=100 + i)
+            report = incremental.append_and_save(dataset_path, new_rows, model_path, cache_dir,
+                                                 added=args.add, compare=True)
+            print(f"\nUpdate {i + 1}:")
+            print(incremental.format_report(report))
@@ -0,0 +1,55 @@
+"""RandomForest training time and batch-predict throughput from 1 to N cores.
+
+Usage: python benchmarks/bench_parallel_scaling.py [--rows 100000] [--jobs 1 2 4 8]
+"""
+import argparse
+import os
+import sys
+import time
+
+from joblib import parallel_config
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(ROOT_DIR, 'backend'))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from analyst import YouTubeAnalyst
+from synthetic import make_dataset
+
+
+def core_counts(max_cores):
+    counts, n = [], 1
+    while n < max_cores:
+        counts.append(n)
+        n *= 2
+    return counts + [max_cores]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--jobs', type=int, nargs='+', default=core_counts(os.cpu_count() or 1))
+    args = parser.parse_args()
+
+    base = YouTubeAnalyst()
+    base.df = make_dataset(args.rows)
+    base._clean_data()
+    X, _, _, _ = base._training_data()
+
+    print(f"{len(base.df)} rows, {os.cpu_count()} cores available")
+    print(f"{'n_jobs':>6} {'fit s':>8} {'fit speedup':>12} {'predict rows/s':>15} {'predict speedup':>16}")
+    fit_1 = rows_1 = None
+    for n_jobs in args.jobs:
+        analyst = YouTubeAnalyst()
+        analyst.df = base.df
+        analyst.train_models(n_jobs=n_jobs)
+        fit = analyst.parallelism['fit_seconds']
+
+        with parallel_config(backend='threading', n_jobs=n_jobs):
+            start = time.perf_counter()
+            analyst.pipeline.predict(X)
+            rows_per_sec = len(X) / (time.perf_counter() - start)
+
+        fit_1 = fit_1 or fit
+        rows_1 = rows_1 or rows_per_sec
+        print(f"{n_jobs:>6} {fit:>8.2f} {fit_1 / fit:>11.2f}x {rows_per_sec:>15,.0f} {rows_per_sec / rows_1:>15.2f}x")
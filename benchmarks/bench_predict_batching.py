@@ -0,0 +1,40 @@
+"""HTTP /api/predict throughput and latency with and without micro-batching.
+
+Starts the app once per --batch-max value (PREDICT_BATCH_MAX; 1 disables
+batching) and load-tests it with run_suite's client. Requests only
+coalesce up to the number running at once, so SERVER_THREADS is set to
+--threads for every run.
+
+Usage: python benchmarks/bench_predict_batching.py [--concurrency 16] [--threads 16] [--batch-max 1 8 32] [--wait 0.002]
+"""
+import argparse
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from run_suite import run_http
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--concurrency', type=int, default=16, help="Client threads.")
+    parser.add_argument('--threads', type=int, default=16, help="SERVER_THREADS for the server.")
+    parser.add_argument('--batch-max', type=int, nargs='+', default=[1, 8, 32])
+    parser.add_argument('--wait', type=float, default=0.002, help="PREDICT_BATCH_WAIT seconds.")
+    parser.add_argument('--workers', type=int, default=0, help="gunicorn workers (0: werkzeug, one process).")
+    parser.add_argument('--startup-timeout', type=float, default=600)
+    args = parser.parse_args()
+
+    print(f"{'batch max':>9} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    for batch_max in args.batch_max:
+        # The server subprocess inherits these
+        os.environ.update(SERVER_THREADS=str(args.threads), PREDICT_BATCH_MAX=str(batch_max),
+                          PREDICT_BATCH_WAIT=str(args.wait), PREDICTION_CACHE_SIZE='0')
+        result = run_http(args.seconds, args.concurrency, args.startup_timeout, args.workers)
+        if 'error' in result:
+            print(f"{batch_max:>9} {result['error']}")
+            continue
+        print(f"{batch_max:>9} {result['requests_per_sec']:>8,.0f} {result['latency_p50_ms']:>8.2f} "
+              f"{result['latency_p99_ms']:>8.2f} {result['errors']:>7}")
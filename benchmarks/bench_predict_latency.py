@@ -0,0 +1,59 @@
+"""Single-row predict latency: pandas/pipeline path vs the compiled fast path.
+
+Usage: python benchmarks/bench_predict_latency.py [--n 2000]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(ROOT_DIR, 'backend'))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import model_store
+from synthetic import DATASET_PATH, make_dataset
+
+INPUT_COLUMNS = [
+    'subscribers', 'video views', 'uploads', 'category', 'Country', 'channel_type',
+    'created_year', 'video_views_for_the_last_30_days', 'subscribers_for_last_30_days',
+]
+
+
+def pipeline_predict(analyst, record):
+    return analyst.pipeline.predict(pd.DataFrame([record]))[0]
+
+
+def latencies(fn, records):
+    times = np.empty(len(records))
+    for i, record in enumerate(records):
+        start = time.perf_counter()
+        fn(record)
+        times[i] = time.perf_counter() - start
+    return times * 1e6  # microseconds
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--n', type=int, default=2000, help="Predictions per path.")
+    args = parser.parse_args()
+
+    analyst = model_store.load_or_train(DATASET_PATH)
+    if analyst.compiled is None:
+        sys.exit("Model pipeline does not support the compiled fast path.")
+
+    df = make_dataset(args.n, seed=1)[INPUT_COLUMNS]
+    records = df.astype(object).where(df.notna(), None).to_dict('records')
+
+    # Warm up both paths, and check they agree exactly
+    for record in records[:50]:
+        assert analyst.compiled.predict(record) == pipeline_predict(analyst, record)
+
+    print(f"{'path':>10} {'p50 us':>10} {'p99 us':>10} {'mean us':>10}")
+    for name, fn in [('pipeline', lambda r: pipeline_predict(analyst, r)),
+                     ('compiled', analyst.compiled.predict)]:
+        t = latencies(fn, records)
+        print(f"{name:>10} {np.percentile(t, 50):>10.1f} {np.percentile(t, 99):>10.1f} {t.mean():>10.1f}")
@@ -0,0 +1,77 @@
+"""Added latency of prediction intervals: predict vs predict_interval, single row and batch.
+
+Measured for the full RandomForest and its compact export. Intervals come
+from the per-tree predictions of the same pass, so the point prediction is
+unchanged (checked) and the cost is the per-tree spread.
+
+Usage: python benchmarks/bench_prediction_intervals.py [--n 2000] [--batch 10000] [--level 0.9]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(ROOT_DIR, 'backend'))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from analyst import YouTubeAnalyst
+import compact_model
+import model_store
+from bench_predict_latency import INPUT_COLUMNS, latencies
+from synthetic import DATASET_PATH, make_dataset
+
+
+def best_seconds(fn, repeats=3):
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def report(name, analyst, records, batch, level):
+    for record in records[:50]:
+        assert analyst.predict_interval(record, level)[0] == analyst.predict(record)
+
+    point = latencies(analyst.predict, records)
+    interval = latencies(lambda r: analyst.predict_interval(r, level), records)
+    point_batch = best_seconds(lambda: analyst.predict_batch(batch))
+    interval_batch = best_seconds(lambda: analyst.predict_batch(batch, level=level))
+    p50, p50_interval = np.percentile(point, 50), np.percentile(interval, 50)
+    print(f"{name:>8} {p50:>9.0f} {p50_interval:>13.0f} {p50_interval - p50:>+9.0f} "
+          f"{np.percentile(interval, 99):>13.0f} {len(batch) / point_batch:>12,.0f} "
+          f"{len(batch) / interval_batch:>16,.0f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--n', type=int, default=2000, help="Single-row predictions per path.")
+    parser.add_argument('--batch', type=int, default=10_000, help="Rows per batch prediction.")
+    parser.add_argument('--level', type=float, default=0.9, help="Interval coverage.")
+    args = parser.parse_args()
+
+    df = make_dataset(args.n, seed=1)[INPUT_COLUMNS]
+    records = df.astype(object).where(df.notna(), None).to_dict('records')
+    batch = make_dataset(args.batch, seed=2)[INPUT_COLUMNS]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        model_path = os.path.join(tmp, 'model.joblib')
+        model_store.train_and_save(DATASET_PATH, model_path)
+        artifact = model_store.read_artifact(model_path)
+        full = YouTubeAnalyst.from_artifact(artifact)
+        if full.interval_calibration is None:
+            sys.exit("Model has no interval calibration.")
+
+        print(f"{args.level:.0%} intervals ({full.interval_calibration['method']}), "
+              f"{len(records)} single rows, batches of {len(batch):,}\n")
+        print(f"{'model':>8} {'p50 us':>9} {'interval p50':>13} {'added':>9} {'interval p99':>13} "
+              f"{'batch rows/s':>12} {'interval rows/s':>16}")
+        report('full', full, records, batch, args.level)
+        export_dir = os.path.join(tmp, 'serving')
+        compact_model.export(artifact, export_dir)
+        report('compact', YouTubeAnalyst.from_artifact(compact_model.load(export_dir)), records, batch, args.level)
@@ -0,0 +1,90 @@
+"""Similar-channel lookup: KD-tree index vs a full scan, at each dataset size.
+
+For each size, cleans a synthetic dataset, builds neighbors.ChannelIndex
+and times ChannelIndex.query unfiltered, by category, and by category and
+country, against a brute-force scan of all channels in the same scaled
+space (results are checked to match). Query channels are drawn from
+another synthetic sample.
+
+Usage: python benchmarks/bench_similar_channels.py [--rows 1000 1000000] [--queries 200] [--k 10]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(ROOT_DIR, 'backend'))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from analyst import YouTubeAnalyst
+from bench_predict_latency import INPUT_COLUMNS
+import neighbors
+from synthetic import make_dataset
+
+FILTERS = [
+    ('none', {}),
+    ('category', {'category': 'Music'}),
+    ('category+country', {'category': 'Music', 'Country': 'India'}),
+]
+
+
+def cleaned(n_rows, seed):
+    analyst = YouTubeAnalyst()
+    analyst.df = make_dataset(n_rows, seed=seed)
+    analyst._clean_data()
+    return analyst.df.reset_index(drop=True)
+
+
+def brute_force(index, points, labels, record, k, filters):
+    """Distances of the k nearest matching channels, by scanning them all."""
+    mask = np.ones(len(points), dtype=bool)
+    for dim, value in filters.items():
+        mask &= labels[dim] == value
+    distances = np.sqrt(((points[mask] - index._point(record)) ** 2).sum(axis=1))
+    return np.sort(distances)[:k]
+
+
+def percentiles_us(fn, records):
+    times = []
+    for record in records:
+        start = time.perf_counter()
+        fn(record)
+        times.append(time.perf_counter() - start)
+    return np.percentile(times, 50) * 1e6, np.percentile(times, 99) * 1e6
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[1_000, 1_000_000])
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--k', type=int, default=10)
+    args = parser.parse_args()
+
+    queries = make_dataset(args.queries, seed=7)[INPUT_COLUMNS]
+    records = queries.astype(object).where(queries.notna(), None).to_dict('records')
+
+    print(f"k={args.k}, {len(records)} queries\n")
+    print(f"{'rows':>10} {'build s':>8} {'filter':>17} {'index p50 us':>13} {'index p99 us':>13} "
+          f"{'scan p50 us':>12}")
+    for n_rows in args.rows:
+        df = cleaned(n_rows, seed=1)
+        start = time.perf_counter()
+        index = neighbors.ChannelIndex.build(df, 'bench')
+        build = time.perf_counter() - start
+
+        # The scaled points held by the unfiltered tree, for the brute-force scan
+        points = np.asarray(index.trees[()][0].data)
+        labels = {dim: df[dim].astype(str).to_numpy() for dim in neighbors.FILTER_DIMENSIONS}
+
+        for name, filters in FILTERS:
+            for record in records[:20]:
+                got = [c['distance'] for c in index.query(record, args.k, filters)]
+                expected = brute_force(index, points, labels, record, args.k, filters)
+                assert np.allclose(got, expected, atol=1e-5), f"{name}: index and scan disagree"
+            p50, p99 = percentiles_us(lambda r: index.query(r, args.k, filters), records)
+            scan, _ = percentiles_us(lambda r: brute_force(index, points, labels, r, args.k, filters),
+                                     records[:max(5, len(records) // 10)])
+            print(f"{n_rows:>10,} {build:>8.2f} {name:>17} {p50:>13.0f} {p99:>13.0f} {scan:>12.0f}")
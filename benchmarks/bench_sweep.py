@@ -0,0 +1,78 @@
+"""What-if sweeps: one batched grid evaluation vs a predict call per point.
+
+Trains the serving model on the synthetic dataset and times sweep.run
+over 2-D grids (subscribers x uploads) of each size, for the full
+RandomForest and its compact export, next to predicting the same points
+one by one (sampled, and checked to give the same predictions).
+
+Usage: python benchmarks/bench_sweep.py [--points 100 1000 10000 40000] [--level 0.9]
+"""
+import argparse
+import math
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(ROOT_DIR, 'backend'))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from analyst import YouTubeAnalyst
+import compact_model
+import model_store
+import sweep
+from synthetic import DATASET_PATH
+
+BASE = {'subscribers': 5_000_000, 'video views': 1_000_000_000, 'uploads': 300, 'created_year': 2015,
+        'category': 'Music', 'Country': 'India', 'channel_type': 'Music'}
+SAMPLED_POINTS = 200
+
+
+def axes_for(n_points):
+    side = max(2, int(round(math.sqrt(n_points))))
+    return [{'feature': 'subscribers', 'min': 1e5, 'max': 1e8, 'steps': side, 'scale': 'log'},
+            {'feature': 'uploads', 'min': 10, 'max': 5000, 'steps': side}]
+
+
+def report(name, analyst, sizes, level):
+    for n_points in sizes:
+        axes = axes_for(n_points)
+        start = time.perf_counter()
+        result = sweep.run(analyst, BASE, axes)
+        seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        sweep.run(analyst, BASE, axes, level)
+        interval_seconds = time.perf_counter() - start
+
+        predictions = np.asarray(result['predictions']).ravel()
+        subscribers, uploads = (np.asarray(axis['values']) for axis in result['axes'])
+        rows, cols = np.unravel_index(
+            np.linspace(0, len(predictions) - 1, SAMPLED_POINTS).astype(int), (len(subscribers), len(uploads)))
+        start = time.perf_counter()
+        for i, j in zip(rows, cols):
+            point = dict(BASE, subscribers=subscribers[i], uploads=uploads[j])
+            assert analyst.predict(point) == predictions[i * len(uploads) + j], "sweep and predict disagree"
+        per_point = (time.perf_counter() - start) / SAMPLED_POINTS
+        print(f"{name:>8} {len(predictions):>8,} {seconds * 1000:>9.1f} {interval_seconds * 1000:>12.1f} "
+              f"{per_point * len(predictions) * 1000:>13.1f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--points', type=int, nargs='+', default=[100, 1_000, 10_000, 40_000])
+    parser.add_argument('--level', type=float, default=0.9, help="Interval coverage for the interval column.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        model_path = os.path.join(tmp, 'model.joblib')
+        model_store.train_and_save(DATASET_PATH, model_path)
+        artifact = model_store.read_artifact(model_path)
+        export_dir = os.path.join(tmp, 'serving')
+        compact_model.export(artifact, export_dir)
+
+        print(f"{'model':>8} {'points':>8} {'sweep ms':>9} {'interval ms':>12} {'one-by-one ms':>13}")
+        report('full', YouTubeAnalyst.from_artifact(artifact), args.points, args.level)
+        report('compact', YouTubeAnalyst.from_artifact(compact_model.load(export_dir)), args.points, args.level)
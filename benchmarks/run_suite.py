@@ -0,0 +1,393 @@
+"""End-to-end benchmark suite over synthetic datasets of increasing size.
+
+For each dataset size it measures ingestion rows/s, training wall time and
+peak RSS, single-row predict p50/p99 and batch predict rows/s, each size in
+a fresh process so peak RSS is not shared between sizes. It then measures
+HTTP req/s for /api/predict against a local server. Results are written as
+JSON; pass --baseline to compare against an earlier run.
+
+Usage:
+    python benchmarks/run_suite.py [--sizes 1k 100k 1m 10m] [--output results.json]
+                                   [--baseline baseline.json] [--tolerance 0.1]
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import resource
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCH_DIR)
+BACKEND_DIR = os.path.join(ROOT_DIR, 'backend')
+DATA_DIR = os.path.join(BENCH_DIR, 'data')
+sys.path.append(BACKEND_DIR)
+sys.path.append(BENCH_DIR)
+
+DEFAULT_SIZES = ['1k', '100k', '1m']
+
+INPUT_COLUMNS = [
+    'subscribers', 'video views', 'uploads', 'category', 'Country', 'channel_type',
+    'created_year', 'video_views_for_the_last_30_days', 'subscribers_for_last_30_days',
+]
+
+# Metric name -> True if higher is better. Only these are compared to a baseline.
+COMPARED_METRICS = {
+    'ingest_rows_per_sec': True,
+    'train_seconds': False,
+    'peak_rss_mb': False,
+    'predict_p50_us': False,
+    'predict_p99_us': False,
+    'batch_rows_per_sec': True,
+    'requests_per_sec': True,
+    'latency_p50_ms': False,
+    'latency_p99_ms': False,
+}
+
+
+def parse_size(text):
+    """'1k' -> 1000, '10m' -> 10000000, '2500' -> 2500."""
+    text = text.strip().lower()
+    multiplier = {'k': 1_000, 'm': 1_000_000}.get(text[-1:], 1)
+    return int(float(text.rstrip('km')) * multiplier)
+
+
+def dataset_for(n_rows, seed=0):
+    """Path to a synthetic CSV with n_rows rows, generated once and reused."""
+    from synthetic import write_dataset
+
+    path = os.path.join(DATA_DIR, f'synthetic-{n_rows}-seed{seed}.csv')
+    if not os.path.exists(path):
+        os.makedirs(DATA_DIR, exist_ok=True)
+        print(f"Generating {n_rows:,} synthetic rows -> {path}")
+        write_dataset(n_rows, path, seed=seed)
+    return path
+
+
+def peak_rss_mb():
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1 << 20) if sys.platform == 'darwin' else peak / 1024
+
+
+def percentiles(values, scale=1.0):
+    values = np.asarray(values) * scale
+    return float(np.percentile(values, 50)), float(np.percentile(values, 99))
+
+
+def sample_records(n, seed=1):
+    from synthetic import make_dataset
+
+    df = make_dataset(n, seed=seed)[INPUT_COLUMNS]
+    return df.astype(object).where(df.notna(), None).to_dict('records')
+
+
+def measure_dataset(path, train_rows, predict_samples, batch_rows):
+    """Runs every in-process measurement for one dataset; called in a child process."""
+    import model_store
+    from analyst import YouTubeAnalyst
+
+    result = {'file_mb': round(os.path.getsize(path) / (1 << 20), 1)}
+
+    analyst = YouTubeAnalyst()
+    chunksize = model_store.default_chunksize(path)
+    start = time.perf_counter()
+    analyst.load_and_prep_data(path, chunksize=chunksize)
+    seconds = time.perf_counter() - start
+    rows = len(analyst.df)
+    result['ingest'] = {
+        'rows': rows,
+        'streaming': chunksize is not None,
+        'seconds': round(seconds, 3),
+        'ingest_rows_per_sec': round(rows / seconds),
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+    }
+
+    # RandomForest fit time grows faster than linearly; cap the training
+    # set so the large sizes still measure ingestion and serving.
+    if train_rows and rows > train_rows:
+        analyst.df = analyst.df.sample(n=train_rows, random_state=0).reset_index(drop=True)
+    start = time.perf_counter()
+    analyst.train_models()
+    result['train'] = {
+        'rows': len(analyst.df),
+        'train_seconds': round(time.perf_counter() - start, 3),
+        'fit_seconds': round(analyst.parallelism['fit_seconds'], 3),
+        'r2': round(analyst.metrics.r2, 5),
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+    }
+
+    records = sample_records(predict_samples)
+    for record in records[:50]:
+        analyst.predict(record)
+    times = []
+    for record in records:
+        start = time.perf_counter()
+        analyst.predict(record)
+        times.append(time.perf_counter() - start)
+    p50, p99 = percentiles(times, 1e6)
+    result['predict'] = {
+        'samples': len(records),
+        'compiled': analyst.compiled is not None,
+        'predict_p50_us': round(p50, 1),
+        'predict_p99_us': round(p99, 1),
+    }
+
+    batch = analyst.df.head(batch_rows)[INPUT_COLUMNS]
+    start = time.perf_counter()
+    analyst.predict_batch(batch)
+    seconds = time.perf_counter() - start
+    result['batch'] = {
+        'rows': len(batch),
+        'seconds': round(seconds, 3),
+        'batch_rows_per_sec': round(len(batch) / seconds),
+    }
+    return result
+
+
+def run_dataset(n_rows, args):
+    """Measures one size in a fresh interpreter and returns its result dict."""
+    path = dataset_for(n_rows)
+    command = [
+        sys.executable, os.path.abspath(__file__), '--worker', path,
+        '--train-rows', str(args.train_rows),
+        '--predict-samples', str(args.predict_samples),
+        '--batch-rows', str(args.batch_rows),
+    ]
+    output = subprocess.run(command, check=True, stdout=subprocess.PIPE, text=True).stdout
+    # The worker prints progress lines; its result is the last line
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+SERVER_SCRIPT = """
+import sys
+sys.path.insert(0, {backend!r})
+import app
+app.initialize_model()
+if not app.manager.wait_ready():
+    sys.exit('model failed to load')
+from werkzeug.serving import run_simple
+run_simple('127.0.0.1', {port}, app.app, threaded=True)
+"""
+
+
+def wait_for_server(url, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(url, timeout=1) as response:
+                if response.status == 200:
+                    return True
+        except OSError:
+            time.sleep(0.2)
+    return False
+
+
+def run_http(seconds, concurrency, startup_timeout, workers=0):
+    """
+    Starts the Flask app on a free port and hammers /api/predict from client
+    threads. workers=0 uses werkzeug's threaded server in one process;
+    otherwise gunicorn (wsgi.py) with that many pre-forked workers.
+    """
+    port = free_port()
+    base_url = f'http://127.0.0.1:{port}'
+    if workers:
+        command = [sys.executable, '-m', 'gunicorn', 'wsgi:app',
+                   '--bind', f'127.0.0.1:{port}', '--workers', str(workers)]
+    else:
+        command = [sys.executable, '-c', SERVER_SCRIPT.format(backend=BACKEND_DIR, port=port)]
+    server = subprocess.Popen(command, cwd=BACKEND_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        if not wait_for_server(base_url + '/health/ready', startup_timeout):
+            return {'error': f'server not ready after {startup_timeout}s'}
+
+        # Distinct payloads so the prediction cache does not answer everything
+        bodies = [json.dumps(r).encode() for r in sample_records(5000, seed=2)]
+        latencies = [[] for _ in range(concurrency)]
+        errors = [0] * concurrency
+        deadline = time.perf_counter() + seconds
+
+        def client(i):
+            n = i
+            while time.perf_counter() < deadline:
+                request = urllib.request.Request(
+                    base_url + '/api/predict', data=bodies[n % len(bodies)],
+                    headers={'Content-Type': 'application/json'})
+                start = time.perf_counter()
+                try:
+                    with urllib.request.urlopen(request, timeout=10) as response:
+                        response.read()
+                    latencies[i].append(time.perf_counter() - start)
+                except OSError:
+                    errors[i] += 1
+                n += concurrency
+
+        start = time.perf_counter()
+        threads = [threading.Thread(target=client, args=(i,)) for i in range(concurrency)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - start
+
+        all_latencies = [x for per_thread in latencies for x in per_thread]
+        if not all_latencies:
+            return {'error': 'no successful requests', 'errors': sum(errors)}
+        p50, p99 = percentiles(all_latencies, 1e3)
+        return {
+            'workers': workers,
+            'concurrency': concurrency,
+            'seconds': round(elapsed, 2),
+            'requests': len(all_latencies),
+            'errors': sum(errors),
+            'requests_per_sec': round(len(all_latencies) / elapsed, 1),
+            'latency_p50_ms': round(p50, 2),
+            'latency_p99_ms': round(p99, 2),
+        }
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT_DIR, check=True,
+                              stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment():
+    import sklearn
+
+    return {
+        'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'sklearn': sklearn.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def flatten(results):
+    """{'1000/ingest/ingest_rows_per_sec': value, 'http/requests_per_sec': value, ...} for compared metrics."""
+    flat = {}
+
+    def walk(prefix, node):
+        for key, value in node.items():
+            path = f'{prefix}/{key}' if prefix else key
+            if isinstance(value, dict):
+                walk(path, value)
+            elif key in COMPARED_METRICS and isinstance(value, (int, float)):
+                flat[path] = value
+
+    walk('', results)
+    return flat
+
+
+def compare(current, baseline, tolerance):
+    """
+    Lines comparing every metric present in both runs. A change worse
+    than tolerance (a fraction, in the metric's bad direction) is flagged;
+    returns (lines, number of regressions).
+    """
+    now, before = flatten(current['results']), flatten(baseline['results'])
+    lines = [f"{'metric':<40} {'baseline':>14} {'current':>14} {'change':>9}"]
+    regressions = 0
+    for path in sorted(set(now) & set(before)):
+        old, new = before[path], now[path]
+        change = (new - old) / old if old else 0.0
+        higher_is_better = COMPARED_METRICS[path.rsplit('/', 1)[-1]]
+        worse = -change if higher_is_better else change
+        flag = ''
+        if worse > tolerance:
+            flag = '  REGRESSION'
+            regressions += 1
+        elif -worse > tolerance:
+            flag = '  improved'
+        lines.append(f"{path:<40} {old:>14,.2f} {new:>14,.2f} {change:>+8.1%}{flag}")
+    return lines, regressions
+
+
+def print_summary(results):
+    print(f"\n{'rows':>10} {'ingest rows/s':>14} {'train s':>8} {'train rows':>10} {'peak MB':>8} "
+          f"{'p50 us':>8} {'p99 us':>8} {'batch rows/s':>13}")
+    for size, r in results.items():
+        if size == 'http':
+            continue
+        print(f"{size:>10} {r['ingest']['ingest_rows_per_sec']:>14,} {r['train']['train_seconds']:>8.2f} "
+              f"{r['train']['rows']:>10,} {r['train']['peak_rss_mb']:>8.0f} {r['predict']['predict_p50_us']:>8.0f} "
+              f"{r['predict']['predict_p99_us']:>8.0f} {r['batch']['batch_rows_per_sec']:>13,}")
+    http = results.get('http')
+    if http and 'error' not in http:
+        print(f"\nHTTP /api/predict: {http['requests_per_sec']} req/s at concurrency {http['concurrency']}, "
+              f"p50 {http['latency_p50_ms']} ms, p99 {http['latency_p99_ms']} ms, {http['errors']} errors")
+    elif http:
+        print(f"\nHTTP /api/predict: {http['error']}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', nargs='+', default=DEFAULT_SIZES,
+                        help="Dataset sizes, e.g. 1k 100k 1m 10m (default: %(default)s).")
+    parser.add_argument('--train-rows', type=int, default=20_000,
+                        help="Cap on training rows per size; 0 trains on everything.")
+    parser.add_argument('--predict-samples', type=int, default=2000)
+    parser.add_argument('--batch-rows', type=int, default=100_000)
+    parser.add_argument('--http-seconds', type=float, default=10,
+                        help="Duration of the HTTP load test; 0 skips it.")
+    parser.add_argument('--http-concurrency', type=int, default=8)
+    parser.add_argument('--http-startup-timeout', type=float, default=600)
+    parser.add_argument('--http-workers', type=int, default=0,
+                        help="Serve with gunicorn and this many workers (default: werkzeug, one process).")
+    parser.add_argument('--output', default=os.path.join(BENCH_DIR, 'results', 'latest.json'))
+    parser.add_argument('--baseline', help="Earlier results JSON to compare against.")
+    parser.add_argument('--tolerance', type=float, default=0.10,
+                        help="Relative change counted as a regression (default: %(default)s).")
+    parser.add_argument('--worker', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(measure_dataset(args.worker, args.train_rows, args.predict_samples, args.batch_rows)))
+        sys.exit(0)
+
+    results = {}
+    for size in args.sizes:
+        n_rows = parse_size(size)
+        print(f"Benchmarking {n_rows:,} rows...")
+        results[str(n_rows)] = run_dataset(n_rows, args)
+    if args.http_seconds > 0:
+        print(f"HTTP load test for {args.http_seconds}s...")
+        results['http'] = run_http(args.http_seconds, args.http_concurrency, args.http_startup_timeout,
+                                   args.http_workers)
+
+    report = {'environment': environment(), 'config': vars(args), 'results': results}
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print_summary(results)
+    print(f"\nResults written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        lines, regressions = compare(report, baseline, args.tolerance)
+        print(f"\nCompared with {args.baseline} ({baseline['environment'].get('commit')}):")
+        print("\n".join(lines))
+        if regressions:
+            sys.exit(f"{regressions} metric(s) regressed by more than {args.tolerance:.0%}")
@@ -0,0 +1,75 @@
+"""Synthetic data shaped like 'Global YouTube Statistics.csv' for benchmarks."""
+import os
+
+import numpy as np
+import pandas as pd
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATASET_PATH = os.path.join(ROOT_DIR, 'Global YouTube Statistics.csv')
+
+# Count-like columns are jittered multiplicatively and kept non-negative
+JITTER_COLUMNS = [
+    'subscribers', 'video views', 'uploads', 'video_views_for_the_last_30_days',
+    'lowest_monthly_earnings', 'highest_monthly_earnings',
+    'lowest_yearly_earnings', 'highest_yearly_earnings',
+    'subscribers_for_last_30_days',
+]
+
+_seed_df = None
+
+
+def _load_seed():
+    global _seed_df
+    if _seed_df is None:
+        try:
+            _seed_df = pd.read_csv(DATASET_PATH, encoding='utf-8')
+        except UnicodeDecodeError:
+            _seed_df = pd.read_csv(DATASET_PATH, encoding='latin-1')
+    return _seed_df
+
+
+def make_dataset(n_rows, seed=0):
+    """Bootstraps n_rows from the real dataset with lognormal noise on counts.
+
+    Resampling keeps the real column set, category vocabularies, missing-value
+    pattern and the views/earnings correlation, so cleaning and training
+    behave as they do on the bundled file.
+    """
+    rng = np.random.default_rng(seed)
+    base = _load_seed()
+    df = base.iloc[rng.integers(0, len(base), size=n_rows)].reset_index(drop=True)
+    for col in JITTER_COLUMNS:
+        if col in df.columns:
+            noise = rng.lognormal(mean=0.0, sigma=0.25, size=n_rows)
+            df[col] = (df[col] * noise).round()
+    df['subscribers'] = df['subscribers'].fillna(0).astype('int64')
+    df['uploads'] = df['uploads'].fillna(0).astype('int64')
+    df['rank'] = np.arange(1, n_rows + 1)
+    return df
+
+
+def write_dataset(n_rows, path, seed=0, chunk_rows=500_000):
+    """
+    Writes a synthetic CSV with the same columns as the real dataset.
+    Rows are generated and appended chunk_rows at a time, so 10M-row files
+    do not need 10M rows in memory.
+    """
+    tmp_path = path + '.tmp'
+    for i, start in enumerate(range(0, n_rows, chunk_rows)):
+        df = make_dataset(min(chunk_rows, n_rows - start), seed=seed + i)
+        df['rank'] += start
+        df.to_csv(tmp_path, index=False, header=(i == 0), mode='w' if i == 0 else 'a')
+    os.replace(tmp_path, path)
+    return path
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Write a synthetic 'Global YouTube Statistics.csv'-shaped file.")
+    parser.add_argument('rows', type=int)
+    parser.add_argument('path')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    write_dataset(args.rows, args.path, seed=args.seed)
+    print(f"Wrote {args.rows} rows to {args.path}")
@@ -1,119 +1,272 @@
-import pandas as pd
-import seaborn as sns
-import matplotlib.pyplot as plt
-import numpy as np
+"""
+Renders the report figures into report/images.
+
+The persisted serving model (retrained only if stale) supplies the
+feature importances and the cleaned-data cache supplies the dataset.
+Each figure is rendered from a small precomputed payload in a worker
+process with the non-interactive Agg backend. A figure is skipped when
+its inputs (dataset hash, model version for model figures, plot
+parameters) match the last render, recorded in report/images/.manifest.json.
+
+Usage: python report/generate_plots.py [--force] [--jobs N] [--only NAME ...]
+"""
+import argparse
+import hashlib
+import json
 import os
-import joblib
 import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
 
-# Add backend to path
-sys.path.append(os.path.abspath("backend"))
-from analyst import YouTubeAnalyst
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import numpy as np
+import seaborn as sns
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(ROOT_DIR, 'backend'))
+import analytics
+import features
+import model_store
+from data_cache import DEFAULT_CACHE_DIR, dataset_hash
 
-# Set style
+DATASET_PATH = os.path.join(ROOT_DIR, 'Global YouTube Statistics.csv')
+OUTPUT_DIR = os.path.join(ROOT_DIR, 'report', 'images')
+MANIFEST_PATH = os.path.join(OUTPUT_DIR, '.manifest.json')
+TARGET = 'highest_yearly_earnings'
+
+# Set style (also applied in worker processes, which import this module)
 sns.set_theme(style="whitegrid")
 plt.rcParams.update({'figure.figsize': (10, 6), 'figure.dpi': 100})
 
-# Create images directory
-output_dir = "report/images"
-if not os.path.exists(output_dir):
-    os.makedirs(output_dir)
-
-# Load Data directly using analyst class to ensure consistency
-print("Initializing Analyst...")
-analyst = YouTubeAnalyst()
-analyst.load_and_prep_data("Global YouTube Statistics.csv")
-
-print("Training Model to get Feature Importances...")
-analyst.train_models() 
-# This populates analyst.model and analyst.feature_names
-
-# Save model while we are at it to fix the broken file
-joblib.dump(analyst.model, "backend/model.joblib")
-
-df = analyst.df
-
-# 1. Correlation Heatmap
-print("Generating Correlation Matrix...")
-plt.figure(figsize=(12, 10))
-numeric_df = df.select_dtypes(include=[np.number])
-corr = numeric_df.corr()
-target = 'highest_yearly_earnings'
-# Fallback target if not in df (analyst logic might not expose it?)
-if target not in df.columns:
-    target = 'video views' # Proxy
-
-if target in corr.columns:
-    cols = corr.nlargest(10, target)[target].index
-    cm = np.corrcoef(df[cols].values.T)
-    sns.heatmap(cm, cbar=True, annot=True, square=True, fmt='.2f', annot_kws={'size': 10}, 
-                yticklabels=cols.values, xticklabels=cols.values, cmap='coolwarm')
-    plt.title('Top 10 Features Correlated with Earnings')
+
+# Renderers: (payload, params, path); run in worker processes
+
+def render_correlation(payload, params, path):
+    plt.figure(figsize=params['figsize'])
+    cols = payload['columns']
+    sns.heatmap(np.asarray(payload['matrix']), cbar=True, annot=True, square=True, fmt='.2f',
+                annot_kws={'size': 10}, yticklabels=cols, xticklabels=cols, cmap='coolwarm')
+    plt.title(f"Top {params['top']} Features Correlated with Earnings")
     plt.tight_layout()
-    plt.savefig(f"{output_dir}/correlation_matrix.png")
+    plt.savefig(path)
     plt.close()
 
-# 2. Earnings Distribution
-print("Generating Earnings Distribution...")
-plt.figure(figsize=(10, 6))
-# Analyst might have filtered or not, let's use what we have
-if 'highest_yearly_earnings' in df.columns:
-    sns.histplot(df['highest_yearly_earnings'], bins=50, kde=True, color='green')
+
+def render_earnings_distribution(payload, params, path):
+    plt.figure(figsize=params['figsize'])
+    sns.histplot(payload['earnings'], bins=params['bins'], kde=True, color='green')
     plt.xscale('log')
     plt.title('Distribution of Yearly Earnings (Log Scale)')
     plt.xlabel('Yearly Earnings ($)')
     plt.ylabel('Frequency')
-    plt.savefig(f"{output_dir}/earnings_distribution.png")
+    plt.savefig(path)
     plt.close()
 
-# 3. Views vs Earnings
-print("Generating Views vs Earnings...")
-plt.figure(figsize=(10, 6))
-if 'video_views_for_the_last_30_days' in df.columns and 'highest_yearly_earnings' in df.columns:
-    sns.scatterplot(x='video_views_for_the_last_30_days', y='highest_yearly_earnings', data=df, alpha=0.6)
+
+def render_views_vs_earnings(payload, params, path):
+    plt.figure(figsize=params['figsize'])
+    sns.scatterplot(x=payload['views'], y=payload['earnings'], alpha=params['alpha'])
     plt.xscale('log')
     plt.yscale('log')
     plt.title('Recent Views vs Highest Yearly Earnings')
     plt.xlabel('Views (Last 30 Days)')
     plt.ylabel('Earnings ($)')
-    plt.savefig(f"{output_dir}/views_vs_earnings.png")
+    plt.savefig(path)
     plt.close()
 
-# 4. Category Performance
-print("Generating Category Performance...")
-plt.figure(figsize=(14, 8))
-if 'highest_yearly_earnings' in df.columns:
-    avg_earnings = df.groupby('category')['highest_yearly_earnings'].mean().sort_values(ascending=False)
-    sns.barplot(x=avg_earnings.values, y=avg_earnings.index, palette='viridis')
+
+def render_category_earnings(payload, params, path):
+    plt.figure(figsize=params['figsize'])
+    sns.barplot(x=payload['means'], y=payload['categories'], hue=payload['categories'],
+                palette='viridis', legend=False)
     plt.title('Average Yearly Earnings by Category')
     plt.xlabel('Average Earnings ($)')
     plt.ylabel('Category')
     plt.tight_layout()
-    plt.savefig(f"{output_dir}/category_earnings.png")
+    plt.savefig(path)
     plt.close()
 
-# 5. Feature Importance
-print("Generating Feature Importance...")
-try:
-    importances = analyst.get_feature_importances()
-    # importances is list of dicts [{'name':.., 'importance':..}]
-    
-    if importances:
-        names = [x['name'] for x in importances]
-        values = [x['importance'] for x in importances]
-        
-        plt.figure(figsize=(12, 6))
-        plt.title("Feature Importances (Random Forest)")
-        plt.bar(range(len(values)), values, align="center")
-        plt.xticks(range(len(values)), names, rotation=45, ha='right')
-        plt.tight_layout()
-        plt.savefig(f"{output_dir}/feature_importance.png")
-        plt.close()
-        print("Feature importance generated.")
+
+def render_feature_importance(payload, params, path):
+    values = payload['values']
+    plt.figure(figsize=params['figsize'])
+    plt.title("Feature Importances (Random Forest)")
+    plt.bar(range(len(values)), values, align="center")
+    plt.xticks(range(len(values)), payload['names'], rotation=45, ha='right')
+    plt.tight_layout()
+    plt.savefig(path)
+    plt.close()
+
+
+# Payloads: computed in the main process from the cleaned frame or the model
+
+def correlation_payload(df, params):
+    # With the analysis-only ratio columns, which the cleaned frame does not hold
+    ratios = features.analysis_ratios(df)
+    df = df.assign(**{name: ratios[name] for name in params['ratios']})
+    corr = df.select_dtypes(include=[np.number]).corr()
+    cols = corr.nlargest(params['top'], TARGET)[TARGET].index
+    return {'columns': list(cols), 'matrix': np.corrcoef(df[cols].values.T)}
+
+
+def category_payload(df, params, data_hash):
+    # Same means as df.groupby('category')[TARGET].mean(), from the analytics rollups
+    groups = analytics.Rollups.build(df, data_hash).aggregate(TARGET, 'category', sort='mean')
+    return {'categories': [g['category'] for g in groups], 'means': [g['mean'] for g in groups]}
+
+
+def importance_payload(analyst, params):
+    importances = analyst.get_feature_importances(top=params['top'])
+    if not importances:
+        return None
+    return {'names': [x['name'] for x in importances], 'values': [x['importance'] for x in importances]}
+
+
+# name -> (file, renderer, input: 'data' or 'model', params); params are part of the fingerprint
+FIGURES = {
+    'correlation_matrix': ('correlation_matrix.png', render_correlation, 'data',
+                           {'figsize': [12, 10], 'top': 10,
+                            'ratios': [name for name, _, _ in features.ANALYSIS_RATIOS]}),
+    'earnings_distribution': ('earnings_distribution.png', render_earnings_distribution, 'data',
+                              {'figsize': [10, 6], 'bins': 50}),
+    'views_vs_earnings': ('views_vs_earnings.png', render_views_vs_earnings, 'data',
+                          {'figsize': [10, 6], 'alpha': 0.6}),
+    'category_earnings': ('category_earnings.png', render_category_earnings, 'data',
+                          {'figsize': [14, 8]}),
+    'feature_importance': ('feature_importance.png', render_feature_importance, 'model',
+                           {'figsize': [12, 6], 'top': 10}),
+}
+
+
+def fingerprint(name, inputs):
+    """Digest of everything a figure depends on besides this file's code."""
+    _, _, _, params = FIGURES[name]
+    blob = json.dumps({'figure': name, 'params': params, 'inputs': inputs}, sort_keys=True)
+    return hashlib.sha256(blob.encode()).hexdigest()
+
+
+def read_manifest():
+    try:
+        with open(MANIFEST_PATH) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def write_manifest(manifest):
+    tmp = MANIFEST_PATH + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp, MANIFEST_PATH)
+
+
+def render(name, payload):
+    """Worker entry point: renders one figure, returns (name, seconds)."""
+    start = time.perf_counter()
+    filename, renderer, _, params = FIGURES[name]
+    renderer(payload, params, os.path.join(OUTPUT_DIR, filename))
+    return name, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--force', action='store_true', help="Render every figure, even if unchanged.")
+    parser.add_argument('--jobs', type=int, default=os.cpu_count() or 1, help="Worker processes.")
+    parser.add_argument('--only', nargs='+', choices=list(FIGURES), help="Figures to consider.")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    timings = {}
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    names = args.only or list(FIGURES)
+    manifest = read_manifest()
+
+    t = time.perf_counter()
+    data_hash = dataset_hash(DATASET_PATH)
+    inputs = {name: {'dataset_hash': data_hash} for name in names if FIGURES[name][2] == 'data'}
+    analyst = None
+    if any(FIGURES[name][2] == 'model' for name in names):
+        # Reuse the persisted serving model (retrained only if stale) for feature importances
+        print("Loading model...")
+        analyst = model_store.load_or_train(DATASET_PATH)
+        method = analyst.importance_method()
+        for name in names:
+            if FIGURES[name][2] == 'model':
+                inputs[name] = {'model_version': analyst.version, 'importance_method': method}
+    timings['load model'] = time.perf_counter() - t
+
+    digests = {name: fingerprint(name, inputs[name]) for name in names}
+    stale = [name for name in names
+             if args.force or manifest.get(name) != digests[name]
+             or not os.path.exists(os.path.join(OUTPUT_DIR, FIGURES[name][0]))]
+
+    payloads = {}
+    t = time.perf_counter()
+    if any(FIGURES[name][2] == 'data' for name in stale):
+        # Cleaned rows, from the columnar cache when possible
+        df = model_store.prepared_analyst(DATASET_PATH, data_hash, cache_dir=DEFAULT_CACHE_DIR).df
+        builders = {
+            'correlation_matrix': lambda params: correlation_payload(df, params),
+            'earnings_distribution': lambda params: {'earnings': df[TARGET].to_numpy()},
+            'views_vs_earnings': lambda params: {'views': df['video_views_for_the_last_30_days'].to_numpy(),
+                                                 'earnings': df[TARGET].to_numpy()},
+            'category_earnings': lambda params: category_payload(df, params, data_hash),
+        }
+        for name in stale:
+            if name in builders:
+                payloads[name] = builders[name](FIGURES[name][3])
+    if 'feature_importance' in stale:
+        payloads['feature_importance'] = importance_payload(analyst, FIGURES['feature_importance'][3])
+        if payloads['feature_importance'] is None:
+            print("No feature importances returned.")
+            del payloads['feature_importance']
+    timings['prepare data'] = time.perf_counter() - t
+
+    rendered, failed = {}, {}
+    t = time.perf_counter()
+    jobs = max(1, min(args.jobs, len(payloads)))
+    if payloads:
+        print(f"Rendering {len(payloads)} figure(s) with {jobs} worker(s)...")
+    if jobs == 1:
+        for name, payload in payloads.items():
+            try:
+                rendered[name] = render(name, payload)[1]
+            except Exception as e:
+                failed[name] = f"{type(e).__name__}: {e}"
     else:
-        print("No feature importances returned.")
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            futures = {name: pool.submit(render, name, payload) for name, payload in payloads.items()}
+            for name, future in futures.items():
+                try:
+                    rendered[name] = future.result()[1]
+                except Exception as e:
+                    failed[name] = f"{type(e).__name__}: {e}"
+    timings['render'] = time.perf_counter() - t
+
+    for name in rendered:
+        manifest[name] = digests[name]
+    write_manifest(manifest)
+
+    print(f"\n{'figure':<24} {'status':<10} {'seconds':>8}")
+    for name in names:
+        if name in rendered:
+            status, seconds = 'rendered', f"{rendered[name]:.2f}"
+        elif name in failed:
+            status, seconds = 'failed', '-'
+        elif name in stale:
+            status, seconds = 'no data', '-'
+        else:
+            status, seconds = 'unchanged', '-'
+        print(f"{name:<24} {status:<10} {seconds:>8}")
+    for step, seconds in timings.items():
+        print(f"{step:<24} {'':<10} {seconds:>8.2f}")
+    print(f"{'total':<24} {'':<10} {time.perf_counter() - start:>8.2f}")
+    for name, error in failed.items():
+        print(f"Error rendering {name}: {error}")
+    return 1 if failed else 0
 
-except Exception as e:
-    print(f"Error plotting feature importance: {e}")
 
-print("All plots generated.")
+if __name__ == '__main__':
+    sys.exit(main())
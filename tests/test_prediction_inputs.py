@@ -0,0 +1,100 @@
+"""
+Every prediction path (compiled single row and small batch, pipeline
+frame batch, sweep grid) applies the same rule to numeric inputs, for
+the full forest, the pipeline without the compiled path and the compact
+export: bad numbers are a per-row error everywhere, NaN spellings mean
+missing everywhere.
+
+Usage: python -m pytest -q tests
+"""
+import os
+import sys
+
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(ROOT_DIR, 'backend'))
+
+from analyst import YouTubeAnalyst
+from features import input_frame
+import compact_model
+import config
+import model_store
+
+DATASET_PATH = os.path.join(ROOT_DIR, 'Global YouTube Statistics.csv')
+VALID = {'subscribers': 5_000_000, 'video views': 1_000_000_000, 'uploads': 300, 'created_year': 2015,
+         'category': 'Music', 'Country': 'India', 'channel_type': 'Music'}
+BAD_SUBSCRIBERS = ['inf', '-inf', float('inf'), 1e300, '1e39', 10 ** 400, 'abc', [1]]
+MISSING_SUBSCRIBERS = [None, float('nan'), 'nan', 'NaN']
+
+
+@pytest.fixture(scope='module')
+def models(tmp_path_factory):
+    tmp = tmp_path_factory.mktemp('models')
+    full = YouTubeAnalyst()
+    full.load_and_prep_data(DATASET_PATH)
+    full.train_models(RandomForestRegressor(n_estimators=20, random_state=0), n_jobs=1)
+    model_path = str(tmp / 'model.joblib')
+    model_store.save_artifact(full, model_path, 'test')
+    artifact = model_store.read_artifact(model_path)
+
+    pipeline_only = YouTubeAnalyst.from_artifact(artifact)
+    pipeline_only.compiled = None
+    compact_model.export(artifact, str(tmp / 'serving'))
+    compact = YouTubeAnalyst.from_artifact(compact_model.load(str(tmp / 'serving')))
+    return {'full': YouTubeAnalyst.from_artifact(artifact), 'pipeline': pipeline_only, 'compact': compact}
+
+
+def outcomes(analyst, row):
+    """(path, prediction or error message) for row through each prediction path."""
+    results = []
+
+    def single(fn):
+        try:
+            return float(fn())
+        except ValueError as e:
+            return str(e)
+
+    results.append(('predict', single(lambda: analyst.predict(row))))
+    results.append(('predict_interval', single(lambda: analyst.predict_interval(row, 0.9)[0])))
+    small = [VALID, row]
+    large = [VALID] * (config.COMPILED_BATCH_MAX_ROWS + 1) + [row]
+    for name, records in [('small batch', small), ('large batch', large),
+                          ('frame batch', input_frame(small))]:
+        result = analyst.predict_batch(records)[-1]
+        results.append((name, result.get('prediction', result.get('error'))))
+    base = {k: v for k, v in row.items() if k != 'uploads'}
+    results.append(('sweep', single(lambda: analyst.predict_grid(base, {'uploads': np.array([300.0])})[0])))
+    return results
+
+
+@pytest.mark.parametrize('model', ['full', 'pipeline', 'compact'])
+@pytest.mark.parametrize('value', BAD_SUBSCRIBERS, ids=lambda value: repr(value)[:12])
+def test_bad_number_is_a_row_error_on_every_path(models, model, value):
+    analyst = models[model]
+    results = outcomes(analyst, dict(VALID, subscribers=value))
+    for path, outcome in results:
+        assert isinstance(outcome, str) and "'subscribers'" in outcome, (path, outcome)
+    # One rule, so one message
+    assert len({outcome for _, outcome in results}) == 1, results
+    # The rest of the batch is still scored
+    batch = analyst.predict_batch([VALID] * 300 + [dict(VALID, subscribers=value)])
+    assert all('prediction' in r for r in batch[:-1]) and 'error' in batch[-1]
+
+
+@pytest.mark.parametrize('model', ['full', 'pipeline', 'compact'])
+@pytest.mark.parametrize('value', MISSING_SUBSCRIBERS, ids=lambda value: repr(value)[:12])
+def test_nan_means_missing_on_every_path(models, model, value):
+    analyst = models[model]
+    without = {k: v for k, v in VALID.items() if k != 'subscribers'}
+    expected = dict(outcomes(analyst, without))
+    for path, outcome in outcomes(analyst, dict(VALID, subscribers=value)):
+        assert outcome == expected[path], (path, outcome)
+
+
+def test_out_of_range_sweep_axis_is_rejected(models):
+    for analyst in models.values():
+        with pytest.raises(ValueError, match="'uploads'"):
+            analyst.predict_grid(VALID, {'uploads': np.array([1.0, 1e300])})